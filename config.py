@@ -7,4 +7,164 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-super-secret-key-336996-proauto-crm'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'app.db')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    PERMANENT_SESSION_LIFETIME = timedelta(hours=24)  # Сессия на 24 часа
+
+    # Вход: алгоритм хэширования паролей (старые хэши пересчитываются при входе),
+    # ограничение неудачных попыток (и сколько пар адрес/логин помнит воркер), число
+    # одновременных проверок хэша и время жизни кэша пользователей
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    LOGIN_RATE_LIMIT = int(os.environ.get('LOGIN_RATE_LIMIT', 5))
+    LOGIN_RATE_WINDOW = int(os.environ.get('LOGIN_RATE_WINDOW', 300))
+    LOGIN_RATE_MAX_KEYS = int(os.environ.get('LOGIN_RATE_MAX_KEYS', 10000))
+    LOGIN_HASH_CONCURRENCY = int(os.environ.get('LOGIN_HASH_CONCURRENCY', 4))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+
+    # Сессии: sql (таблица session_record), redis (SESSION_REDIS_URL; без адреса — заменитель
+    # в памяти процесса) или cookie (подписанная cookie Flask). Срок жизни — PERMANENT_SESSION_LIFETIME,
+    # перед хранилищем стоит LRU-кэш воркера на SESSION_CACHE_SIZE сессий и SESSION_CACHE_TTL секунд;
+    # выход и отзыв сессий сбрасывают этот кэш во всех воркерах через счётчик отзывов в хранилище
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'sql')
+    SESSION_REDIS_URL = os.environ.get('SESSION_REDIS_URL', '')
+    SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE', 10000))
+    SESSION_CACHE_TTL = int(os.environ.get('SESSION_CACHE_TTL', 10))
+
+    # Обновления открытых страниц через /api/live (Server-Sent Events): local — в пределах
+    # воркера, redis — между воркерами через канал Redis, off — выключено (по умолчанию; local
+    # включён в профиле development). Каждое подключение занимает поток, поэтому gunicorn
+    # запускается с потоками (-k gthread) или gevent, а при нескольких воркерах нужен redis.
+    LIVE_BACKEND = os.environ.get('LIVE_BACKEND', 'off')
+    LIVE_REDIS_URL = os.environ.get('LIVE_REDIS_URL') or os.environ.get('SESSION_REDIS_URL', '')
+    LIVE_QUEUE_SIZE = int(os.environ.get('LIVE_QUEUE_SIZE', 256))
+    LIVE_KEEPALIVE = int(os.environ.get('LIVE_KEEPALIVE', 15))
+    LIVE_MAX_STREAMS = int(os.environ.get('LIVE_MAX_STREAMS', 100))
+
+    # Фоновый планировщик (таблица job): thread — поток в каждом процессе приложения, off — задачи
+    # выполняет только отдельный процесс `flask run-scheduler`. Несколько исполнителей не мешают
+    # друг другу: задачу берёт в аренду на SCHEDULER_LEASE секунд тот, кто успел первым.
+    # SCHEDULER_JOBS — интервалы периодических задач в секундах, 0 выключает задачу
+    SCHEDULER = os.environ.get('SCHEDULER', 'off')
+    SCHEDULER_POLL = float(os.environ.get('SCHEDULER_POLL', 5))
+    SCHEDULER_LEASE = int(os.environ.get('SCHEDULER_LEASE', 600))
+    SCHEDULER_BATCH_SIZE = int(os.environ.get('SCHEDULER_BATCH_SIZE', 500))
+    SCHEDULER_MAX_ATTEMPTS = int(os.environ.get('SCHEDULER_MAX_ATTEMPTS', 5))
+    SCHEDULER_JOBS = {
+        'sweep-overdue-tasks': int(os.environ.get('OVERDUE_SWEEP_INTERVAL', 60)),
+        'advance-event-statuses': int(os.environ.get('EVENT_STATUS_INTERVAL', 60)),
+        'queue-event-reminders': int(os.environ.get('EVENT_REMINDER_INTERVAL', 60)),
+        'purge-sessions': int(os.environ.get('PURGE_SESSIONS_INTERVAL', 3600)),
+        'purge-tombstones': int(os.environ.get('PURGE_TOMBSTONES_INTERVAL', 86400)),
+    }
+    # За сколько минут до начала события создаётся напоминание
+    EVENT_REMINDER_MINUTES = int(os.environ.get('EVENT_REMINDER_MINUTES', 15))
+
+    # Сериализация JSON: auto (orjson, если установлен), orjson или json (стандартная библиотека)
+    JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto')
+
+    # Инструментирование запросов: /metrics (Prometheus) и заголовок Server-Timing.
+    # PROFILE_SLOW_REQUESTS_MS > 0 включает сэмплирующий профилировщик: стеки запросов
+    # дольше порога сохраняются в PROFILE_DIR в формате folded (flamegraph.pl, speedscope)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '0') == '1'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+    METRICS_REQUIRE_TOKEN = False
+    PROFILE_SLOW_REQUESTS_MS = int(os.environ.get('PROFILE_SLOW_REQUESTS_MS', 0))
+    PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.005))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(basedir, 'instance', 'profiles')
+
+    # Базовая линия `flask bench-routes`: с ней сравниваются задержки следующих прогонов
+    BENCH_BASELINE = os.environ.get('BENCH_BASELINE') or os.path.join(basedir, 'benchmarks', 'baseline.json')
+
+    # PRAGMA, которые выполняются на каждом новом соединении с SQLite
+    SQLITE_PRAGMAS = {}
+
+    # Очередь записи: изменения из API фиксируются одним потоком воркера пачками до MAX_BATCH
+    WRITE_QUEUE = os.environ.get('WRITE_QUEUE', '0') == '1'
+    WRITE_QUEUE_MAX_BATCH = int(os.environ.get('WRITE_QUEUE_MAX_BATCH', 64))
+
+    # Карточек на странице задач, контактов и склада; остальные подгружаются при прокрутке
+    LIST_PAGE_SIZE = int(os.environ.get('LIST_PAGE_SIZE', 50))
+
+    # Списки API: размер страницы по умолчанию, максимум и заголовок X-Total-Count
+    API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 100))
+    API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+    API_TOTAL_COUNT = os.environ.get('API_TOTAL_COUNT', '1') != '0'
+
+    # /api/sync: изменений в ответе и сколько дней хранятся записи об удалениях
+    SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', 500))
+    SYNC_TOMBSTONE_DAYS = int(os.environ.get('SYNC_TOMBSTONE_DAYS', 90))
+
+    # Сколько событий показывает клетка месячного календаря; остальные — ссылкой «+N ещё» на день
+    CALENDAR_MONTH_CELL_EVENTS = int(os.environ.get('CALENDAR_MONTH_CELL_EVENTS', 4))
+
+    # События: reject — POST/PUT /api/events отклоняет пересечения с другими событиями (409),
+    # allow — сохраняет; клиент может переопределить ?conflicts=. Наибольшее окно /api/events/freebusy
+    EVENT_CONFLICTS = os.environ.get('EVENT_CONFLICTS', 'allow')
+    FREEBUSY_MAX_DAYS = int(os.environ.get('FREEBUSY_MAX_DAYS', 366))
+
+    # Фото контактов: хранилище по содержимому в MEDIA_ROOT, наибольший размер загрузки,
+    # стороны квадратных миниатюр (первая — для списка контактов), потоки пула миниатюр
+    # и сколько секунд запрос ждёт недостроенную миниатюру. Файлы кэшируются на MEDIA_MAX_AGE секунд
+    MEDIA_ROOT = os.environ.get('MEDIA_ROOT') or os.path.join(basedir, 'instance', 'media')
+    MEDIA_MAX_AGE = int(os.environ.get('MEDIA_MAX_AGE', 365 * 24 * 3600))
+    PHOTO_MAX_SIZE = int(os.environ.get('PHOTO_MAX_SIZE', 10 * 1024 * 1024))
+    PHOTO_THUMB_SIZES = (128, 512)
+    PHOTO_WORKERS = int(os.environ.get('PHOTO_WORKERS', 2))
+    PHOTO_THUMB_TIMEOUT = int(os.environ.get('PHOTO_THUMB_TIMEOUT', 10))
+
+    # Потоковая выгрузка /api/<entity>/export: сколько строк читать из БД за раз
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+
+    # Массовые операции /api/<entity>/bulk: размер пачки внутри одной транзакции
+    BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', 500))
+
+    # Сколько секунд хранить статистику склада /api/cars/stats (сбрасывается при изменении автомобилей)
+    CAR_STATS_TTL = int(os.environ.get('CAR_STATS_TTL', 60))
+
+    # Сводка /api/dashboard: сколько секунд хранить на пользователя и что считать «новым» контактом
+    DASHBOARD_TTL = int(os.environ.get('DASHBOARD_TTL', 5))
+    DASHBOARD_NEW_CONTACT_DAYS = int(os.environ.get('DASHBOARD_NEW_CONTACT_DAYS', 7))
+
+    # Статика кэшируется браузером на год; адреса версионируются через url_for (?v=mtime)
+    SEND_FILE_MAX_AGE_DEFAULT = timedelta(days=365)
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    # Отладочный сервер — один процесс с потоками, локального брокера достаточно
+    LIVE_BACKEND = os.environ.get('LIVE_BACKEND', 'local')
+
+
+class ProductionConfig(Config):
+    # Пул соединений на воркер: pool_size постоянных + max_overflow временных
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+    }
+    # WAL: читатели не блокируются записью из других воркеров
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64 * 1024)),  # отрицательное — в КиБ
+        'temp_store': 'MEMORY',
+    }
+    # /metrics раскрывает маршруты и нагрузку: в продакшене без METRICS_TOKEN приложение не запустится
+    METRICS_REQUIRE_TOKEN = True
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite://'
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+
+
+config = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+    'default': DevelopmentConfig,
+}
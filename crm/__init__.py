@@ -0,0 +1,63 @@
+import os
+from flask import Flask, current_app
+from sqlalchemy import event
+from config import basedir, config
+from crm.extensions import db, migrate
+from crm.live import init_live
+from crm.media import init_media
+from crm.metrics import init_metrics
+from crm.serialization import init_json
+from crm.sessions import init_sessions
+from crm.writes import init_write_queue
+
+
+def create_app(config_name=None, **overrides):
+    # Профиль выбирается аргументом или переменной FLASK_CONFIG (development, production, testing)
+    app = Flask(__name__, root_path=basedir)
+    app.config.from_object(config[config_name or os.environ.get('FLASK_CONFIG', 'default')])
+    app.config.update(overrides)
+
+    db.init_app(app)
+    migrate.init_app(app, db, directory=os.path.join(app.root_path, 'migrations'))
+
+    # Модули доменов импортируются только при сборке приложения
+    from crm import auth, api, dashboard, tasks, calendar, contacts, warehouse, notifications
+    for module in (auth, api, dashboard, tasks, calendar, contacts, warehouse, notifications):
+        app.register_blueprint(module.bp)
+
+    from crm.commands import register_commands
+    from crm.jobs import init_scheduler
+    register_commands(app)
+
+    init_write_queue(app)
+    init_sessions(app)
+    init_json(app)
+    init_live(app)
+    init_scheduler(app)
+    init_media(app)
+    init_metrics(app)
+    app.url_defaults(static_file_version)
+    if app.config['SQLITE_PRAGMAS']:
+        with app.app_context():
+            if db.engine.dialect.name == 'sqlite':
+                event.listen(db.engine, 'connect', apply_sqlite_pragmas(app.config['SQLITE_PRAGMAS']))
+    return app
+
+
+def apply_sqlite_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+    return on_connect
+
+
+# Статика отдаётся с долгим кэшем, а url_for добавляет к адресу версию файла (mtime),
+# поэтому после изменения файла браузер запросит его заново
+def static_file_version(endpoint, values):
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        path = os.path.join(current_app.static_folder, values['filename'])
+        if os.path.isfile(path):
+            values['v'] = int(os.stat(path).st_mtime)
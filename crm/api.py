@@ -0,0 +1,472 @@
+import csv
+import hashlib
+import io
+import json
+from flask import Blueprint, Response, abort, current_app, g, jsonify, request, stream_with_context, url_for
+from sqlalchemy.exc import IntegrityError
+from crm.auth import login_required
+from crm.cache import get_table_versions
+from crm.extensions import db
+from crm.live import publish_change
+from crm.models import Task, CalendarEvent, Contact, Car, SyncTombstone
+from crm.serialization import compile_encoder
+from crm.sync import record_tombstones, sync_versions
+from crm.writes import run_write
+
+bp = Blueprint('api', __name__)
+
+# Сущности, доступные через общие эндпоинты /api/<entity>/...
+API_MODELS = {
+    'tasks': Task,
+    'events': CalendarEvent,
+    'contacts': Contact,
+    'cars': Car,
+}
+API_ENTITIES = {model: entity for entity, model in API_MODELS.items()}
+
+
+# Выборка полей для списков API; по умолчанию отдаются все api_fields модели. Поля
+# приводятся к порядку api_fields без повторов: по ним кэшируется кодировщик
+def parse_fields(model):
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    fields = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = sorted(fields - set(model.api_fields))
+    if unknown:
+        raise ValueError(f"Неизвестные поля: {', '.join(unknown)}")
+    return tuple(name for name in model.api_fields if name in fields)
+
+
+# Условные запросы: ETag строки строится из updated_at, ETag списка — из версии таблицы
+def not_modified(etag, last_modified=None):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def conditional(response, etag, last_modified=None):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Браузер хранит ответ, но перед использованием переспрашивает сервер
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified_response(etag, last_modified=None):
+    return conditional(Response(status=304), etag, last_modified)
+
+
+def detail_response(model, obj_id):
+    if hasattr(model, 'updated_at'):
+        # Сначала читается только updated_at: на 304 строка не загружается и не сериализуется
+        row = db.session.query(model.updated_at).filter(model.id == obj_id).first()
+        if row is None:
+            abort(404)
+        etag = f'{model.__table__.name}-{obj_id}-{row.updated_at.timestamp():.6f}' if row.updated_at else None
+        if etag and not_modified(etag, row.updated_at):
+            return not_modified_response(etag, row.updated_at)
+        obj = db.session.get(model, obj_id)
+        if etag:
+            return conditional(jsonify(obj.to_dict()), etag, row.updated_at)
+        return jsonify(obj.to_dict())
+
+    obj = db.session.get(model, obj_id) or abort(404)
+    response = jsonify(obj.to_dict())
+    etag = hashlib.sha1(response.get_data()).hexdigest()
+    if not_modified(etag):
+        return not_modified_response(etag)
+    return conditional(response, etag)
+
+
+class WriteRejected(Exception):
+    # Проверка внутри транзакции записи отклонила изменение: транзакция откатывается,
+    # body уходит клиенту с кодом status
+    def __init__(self, body, status=409):
+        super().__init__(body)
+        self.body = body
+        self.status = status
+
+
+def rejected_response(e):
+    db.session.rollback()
+    return jsonify(e.body), e.status
+
+
+# Ошибки разбора тела запроса (нет поля, неверная дата или правило повторения)
+INVALID_INPUT = (KeyError, ValueError, TypeError)
+
+
+def error_message(e):
+    if isinstance(e, KeyError):
+        return f'Не указано обязательное поле {e}'
+    if isinstance(e, IntegrityError):
+        return 'Нарушено ограничение целостности (дубликат или пустое поле)'
+    return str(e) or e.__class__.__name__
+
+
+def invalid_response(e):
+    db.session.rollback()
+    return jsonify({'error': error_message(e)}), 400
+
+
+def set_owner(obj, user_id):
+    # Автор новой записи — пользователь запроса (по нему /api/events/freebusy?user= отбирает события)
+    if hasattr(obj, 'user_id') and obj.user_id is None:
+        obj.user_id = user_id
+
+
+# Изменение одной записи; через очередь записи, если она включена (WRITE_QUEUE).
+# validate(obj) вызывается после flush в той же транзакции и может бросить WriteRejected.
+# После COMMIT изменение рассылается открытым страницам (/api/live).
+def create_response(model, validate=None):
+    data = request.get_json()
+    # g недоступен в потоке очереди записи, поэтому автор берётся заранее
+    owner = g.user['id']
+
+    def create():
+        obj = model.from_dict(data)
+        set_owner(obj, owner)
+        db.session.add(obj)
+        db.session.flush()
+        if validate is not None:
+            validate(obj)
+        return obj.to_dict(), obj.row_version
+
+    try:
+        item, version = run_write(create)
+    except WriteRejected as e:
+        return rejected_response(e)
+    except INVALID_INPUT as e:
+        return invalid_response(e)
+    publish_change(API_ENTITIES[model], 'created', item['id'], version, item)
+    return jsonify(item), 201
+
+
+def update_response(model, obj_id, validate=None):
+    data = request.get_json()
+
+    def update():
+        obj = db.session.get(model, obj_id)
+        if obj is None:
+            return None
+        obj.update_from_dict(data)
+        db.session.flush()
+        if validate is not None:
+            validate(obj)
+        return obj.to_dict(), obj.row_version
+
+    try:
+        result = run_write(update)
+    except WriteRejected as e:
+        return rejected_response(e)
+    except INVALID_INPUT as e:
+        return invalid_response(e)
+    if result is None:
+        abort(404)
+    item, version = result
+    publish_change(API_ENTITIES[model], 'updated', obj_id, version, item)
+    return jsonify(item)
+
+
+def delete_response(model, obj_id):
+    def delete():
+        obj = db.session.get(model, obj_id)
+        if obj is None:
+            return None
+        db.session.delete(obj)
+        db.session.flush()
+        return obj.row_version
+
+    version = run_write(delete)
+    if version is None:
+        abort(404)
+    publish_change(API_ENTITIES[model], 'deleted', obj_id, version)
+    return '', 204
+
+
+def api_list_response(model, query, extra=None):
+    # extra — объекты вне таблицы (повторения серий), они добавляются к первой странице
+    table_name = model.__table__.name
+    version, = get_table_versions((table_name,))
+    query_hash = hashlib.sha1(request.query_string).hexdigest()[:12]
+    etag = f'{table_name}-v{version}-{query_hash}'
+    if not_modified(etag):
+        return not_modified_response(etag)
+
+    try:
+        limit = int(request.args.get('limit', current_app.config['API_PAGE_SIZE']))
+        after = request.args.get('after')
+        after = int(after) if after else None
+        fields = parse_fields(model)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = max(1, min(limit, current_app.config['API_MAX_PAGE_SIZE']))
+
+    with_count = current_app.config['API_TOTAL_COUNT'] and request.args.get('count', '1') != '0'
+    total = query.order_by(None).count() if with_count else None
+    extra = extra if after is None else None
+    if total is not None and extra:
+        total += len(extra)
+
+    # Keyset-пагинация по первичному ключу: стоимость страницы не зависит от её номера
+    if after is not None:
+        query = query.filter(model.id > after)
+    query = query.order_by(None).order_by(model.id.asc()).limit(limit + 1)
+
+    # Строки читаются кортежами колонок и кодируются без создания ORM-объектов
+    columns, encode = compile_encoder(model, fields or model.api_fields)
+    rows = query.with_entities(*columns).all()
+    items = [encode(row) for row in rows[:limit]]
+    last_id = rows[limit - 1][0] if len(rows) > limit else None
+    if extra:
+        extra_items = [obj.to_dict() for obj in extra]
+        if fields:
+            extra_items = [{name: item[name] for name in fields} for item in extra_items]
+        items = extra_items + items
+
+    response = jsonify(items)
+    if total is not None:
+        response.headers['X-Total-Count'] = str(total)
+    if last_id is not None:
+        response.headers['X-Next-Cursor'] = str(last_id)
+        args = request.args.to_dict()
+        args['after'] = last_id
+        next_url = url_for(request.endpoint, **request.view_args, **args)
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return conditional(response, etag)
+
+
+# Потоковая выгрузка: строки читаются пачками через yield_per и сразу отдаются клиенту
+def iter_export_items(model, fields):
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    columns, encode = compile_encoder(model, fields or model.api_fields)
+    for row in model.query.order_by(model.id.asc()).with_entities(*columns).yield_per(batch_size):
+        yield encode(row)
+
+
+def export_ndjson(items):
+    batch = []
+    for item in items:
+        batch.append(current_app.json.dumps(item, ensure_ascii=False))
+        if len(batch) >= current_app.config['EXPORT_BATCH_SIZE']:
+            yield '\n'.join(batch) + '\n'
+            batch = []
+    if batch:
+        yield '\n'.join(batch) + '\n'
+
+
+def export_csv(items, fields):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    rows = 0
+    for item in items:
+        writer.writerow(item)
+        rows += 1
+        if rows >= current_app.config['EXPORT_BATCH_SIZE']:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    yield buffer.getvalue()
+
+
+@bp.route('/api/<entity>/export')
+@login_required
+def api_export(entity):
+    model = API_MODELS.get(entity)
+    if model is None:
+        return jsonify({'error': f'Неизвестная сущность: {entity}'}), 404
+    try:
+        fields = parse_fields(model)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    export_format = request.args.get('format', 'ndjson')
+    items = iter_export_items(model, fields)
+    if export_format == 'csv':
+        body = export_csv(items, fields or model.api_fields)
+        mimetype = 'text/csv'
+    elif export_format == 'ndjson':
+        body = export_ndjson(items)
+        mimetype = 'application/x-ndjson'
+    else:
+        return jsonify({'error': f'Неизвестный формат: {export_format}'}), 400
+
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={entity}.{export_format}'
+    return response
+
+
+# Массовые операции: все пачки выполняются в одной транзакции, ошибки возвращаются по каждому элементу
+def iter_bulk_items():
+    if request.mimetype == 'application/x-ndjson':
+        for line in request.stream:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('items')
+        if not isinstance(data, list):
+            raise ValueError('Ожидается массив элементов или NDJSON')
+        yield from data
+
+
+def iter_batches(items, size):
+    batch = []
+    for index, item in enumerate(items):
+        batch.append((index, item))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def bulk_error(index, e):
+    return {'index': index, 'error': error_message(e)}
+
+
+def is_row_id(value):
+    # JSON true/false в Python — тоже int, идентификатором записи они не считаются
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def bulk_key_value(item, key):
+    if not isinstance(item, dict):
+        raise ValueError('Элемент должен быть JSON-объектом')
+    value = item.get(key)
+    if value is not None and not (is_row_id(value) if key == 'id' else isinstance(value, str)):
+        raise ValueError(f'Неверное значение {key}: {value!r}')
+    return value
+
+
+def bulk_upsert(model, batch, result):
+    key = getattr(model, 'bulk_key', 'id')
+    column = getattr(model, key)
+    # Ключ проверяется у каждого элемента отдельно: неверный ключ — ошибка только этого элемента
+    values = {}
+    for index, item in batch:
+        try:
+            values[index] = bulk_key_value(item, key)
+        except ValueError as e:
+            values[index] = e
+    keys = {value for value in values.values() if value is not None and not isinstance(value, ValueError)}
+    existing = {getattr(obj, key): obj for obj in model.query.filter(column.in_(keys))} if keys else {}
+
+    for index, item in batch:
+        try:
+            value = values[index]
+            if isinstance(value, ValueError):
+                raise value
+            # Точка сохранения на элемент: ошибка откатывает только его, а не всю пачку
+            with db.session.begin_nested():
+                obj = existing.get(value)
+                if obj is not None:
+                    obj.update_from_dict(item)
+                    action = 'updated'
+                elif key == 'id' and value is not None:
+                    raise ValueError(f'Запись {value} не найдена')
+                else:
+                    obj = model.from_dict(item)
+                    set_owner(obj, g.user['id'])
+                    db.session.add(obj)
+                    action = 'created'
+            result[action] += 1
+            if key != 'id':
+                existing[getattr(obj, key)] = obj
+        except (KeyError, ValueError, TypeError, IntegrityError) as e:
+            result['errors'].append(bulk_error(index, e))
+
+
+def bulk_delete(model, batch, result):
+    ids = {item for _, item in batch if is_row_id(item)}
+    found = {row[0] for row in db.session.query(model.id).filter(model.id.in_(ids))} if ids else set()
+    for index, item in batch:
+        if not is_row_id(item) or item not in found:
+            result['errors'].append({'index': index, 'error': f'Запись {item} не найдена'})
+    if found:
+        record_tombstones(db.session, model, found)
+        result['deleted'] += model.query.filter(model.id.in_(found)).delete(synchronize_session=False)
+
+
+@bp.route('/api/<entity>/bulk', methods=['POST', 'DELETE'])
+@login_required
+def api_bulk(entity):
+    model = API_MODELS.get(entity)
+    if model is None:
+        return jsonify({'error': f'Неизвестная сущность: {entity}'}), 404
+
+    batch_size = request.args.get('batch_size', current_app.config['BULK_BATCH_SIZE'], type=int)
+    result = {'created': 0, 'updated': 0, 'deleted': 0, 'errors': []}
+    handler = bulk_delete if request.method == 'DELETE' else bulk_upsert
+    try:
+        for batch in iter_batches(iter_bulk_items(), max(1, batch_size)):
+            handler(model, batch, result)
+            db.session.flush()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+    db.session.commit()
+    # Массовое изменение — одно событие со счётчиками: страницы обновляются целиком
+    publish_change(entity, 'bulk', version=sync_versions()[0], created=result['created'],
+                   updated=result['updated'], deleted=result['deleted'])
+    return jsonify(result)
+
+
+# Синхронизация изменений: строки с row_version больше since и удаления после since.
+# Номера изменений уникальны во всех таблицах, поэтому страница режется по номеру без
+# потери строк; клиент применяет сначала deleted, затем changed.
+@bp.route('/api/sync')
+@login_required
+def api_sync():
+    try:
+        since = int(request.args.get('since', 0))
+        limit = int(request.args.get('limit', current_app.config['SYNC_PAGE_SIZE']))
+    except ValueError:
+        return jsonify({'error': 'since и limit должны быть числами'}), 400
+    limit = max(1, min(limit, current_app.config['API_MAX_PAGE_SIZE']))
+
+    # Номер читается до строк: всё, что не больше него, уже зафиксировано
+    latest, purged = sync_versions()
+    if 0 < since < purged:
+        return jsonify({'error': 'Журнал удалений очищен, нужна полная синхронизация', 'resync': True}), 410
+
+    entities = {model.__tablename__: entity for entity, model in API_MODELS.items()}
+    candidates = []
+    encoders = {}
+    for entity, model in API_MODELS.items():
+        columns, encode = encoders[entity] = compile_encoder(model, model.api_fields)
+        rows = model.query.with_entities(*columns, model.row_version).filter(
+            model.row_version > since, model.row_version <= latest
+        ).order_by(model.row_version.asc()).limit(limit + 1)
+        candidates += [(row[-1], entity, row) for row in rows]
+    if since:
+        tombstones = db.session.query(SyncTombstone.version, SyncTombstone.entity, SyncTombstone.row_id).filter(
+            SyncTombstone.version > since, SyncTombstone.version <= latest
+        ).order_by(SyncTombstone.version.asc()).limit(limit + 1)
+        candidates += [(version, entities[name], row_id) for version, name, row_id in tombstones
+                       if name in entities]
+
+    candidates.sort(key=lambda candidate: candidate[0])
+    page = candidates[:limit]
+    more = len(candidates) > limit
+    changes = {entity: {'changed': [], 'deleted': []} for entity in API_MODELS}
+    for version, entity, row in page:
+        if isinstance(row, int):
+            changes[entity]['deleted'].append(row)
+        else:
+            changes[entity]['changed'].append(encoders[entity][1](row))
+
+    token = page[-1][0] if more else max(since, latest)
+    return jsonify({'token': str(token), 'more': more, 'changes': changes})
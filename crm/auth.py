@@ -0,0 +1,163 @@
+import secrets
+import threading
+import time as time_module
+from collections import OrderedDict, deque
+from functools import lru_cache
+from flask import Blueprint, current_app, g, render_template, request, redirect, url_for, session, flash
+from werkzeug.security import check_password_hash, generate_password_hash
+from crm.extensions import db
+from crm.models import User
+
+bp = Blueprint('auth', __name__)
+
+
+@bp.record_once
+def init_auth(state):
+    # Проверка scrypt занимает десятки МБ памяти: при наплыве входов считаем не больше N хэшей сразу
+    state.app.extensions['login_hash_slots'] = threading.BoundedSemaphore(
+        state.app.config['LOGIN_HASH_CONCURRENCY'])
+
+
+# Кэш пользователей по user_id из сессии: проверка входа не обращается к БД на каждом запросе
+_user_cache = {}
+_user_cache_lock = threading.Lock()
+
+
+def load_user(user_id):
+    now = time_module.monotonic()
+    with _user_cache_lock:
+        entry = _user_cache.get(user_id)
+    if entry and entry[0] > now:
+        return entry[1]
+    row = db.session.query(User.id, User.username, User.email).filter(User.id == user_id).first()
+    user = row._asdict() if row else None
+    with _user_cache_lock:
+        _user_cache[user_id] = (now + current_app.config['USER_CACHE_TTL'], user)
+    return user
+
+
+def forget_user(user_id):
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
+
+# Проверка аутентификации
+def login_required(f):
+    def decorated_function(*args, **kwargs):
+        user = load_user(session['user_id']) if 'user_id' in session else None
+        if user is None:
+            if session:
+                session.clear()
+            return redirect(url_for('auth.login', next=request.url))
+        g.user = user
+        return f(*args, **kwargs)
+
+    decorated_function.__name__ = f.__name__
+    return decorated_function
+
+
+# Ограничение неудачных попыток входа: скользящее окно на пару (адрес, логин) в пределах воркера.
+# Пары упорядочены по последней неудаче: при записи новой с начала удаляются пары, все попытки
+# которых вне окна, и самые старые сверх LOGIN_RATE_MAX_KEYS
+_login_failures = OrderedDict()
+_login_failures_lock = threading.Lock()
+
+
+def login_blocked(key):
+    window_start = time_module.monotonic() - current_app.config['LOGIN_RATE_WINDOW']
+    with _login_failures_lock:
+        failures = _login_failures.get(key)
+        if not failures:
+            return False
+        while failures and failures[0] < window_start:
+            failures.popleft()
+        if not failures:
+            del _login_failures[key]
+            return False
+        return len(failures) >= current_app.config['LOGIN_RATE_LIMIT']
+
+
+def record_login_failure(key):
+    now = time_module.monotonic()
+    window_start = now - current_app.config['LOGIN_RATE_WINDOW']
+    with _login_failures_lock:
+        failures = _login_failures.get(key)
+        if failures is None:
+            failures = _login_failures[key] = deque()
+        failures.append(now)
+        _login_failures.move_to_end(key)
+        while _login_failures:
+            oldest = next(iter(_login_failures.values()))
+            if oldest[-1] >= window_start and len(_login_failures) <= current_app.config['LOGIN_RATE_MAX_KEYS']:
+                break
+            _login_failures.popitem(last=False)
+
+
+def reset_login_failures(key):
+    with _login_failures_lock:
+        _login_failures.pop(key, None)
+
+
+@lru_cache(maxsize=None)
+def dummy_password_hash(method):
+    # Для несуществующего логина проверяется этот хэш, чтобы время ответа не выдавало,
+    # есть ли такой пользователь; префикс хэша показывает текущие параметры алгоритма
+    return generate_password_hash(secrets.token_hex(16), method=method)
+
+
+def verify_password(user, password):
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    with current_app.extensions['login_hash_slots']:
+        if user is None or not user.password_hash:
+            check_password_hash(dummy_password_hash(method), password)
+            return False
+        if not check_password_hash(user.password_hash, password):
+            return False
+        # Хэш со старыми параметрами пересчитывается, пока пароль известен
+        if user.password_hash.split('$', 1)[0] != dummy_password_hash(method).split('$', 1)[0]:
+            user.set_password(password)
+            db.session.commit()
+    return True
+
+
+# Маршрут для входа
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if 'user_id' in session:
+        return redirect(url_for('dashboard.index'))
+
+    if request.method == 'POST':
+        username = request.form.get('username', '').strip()
+        password = request.form.get('password', '')
+        key = (request.remote_addr, username.lower())
+
+        if login_blocked(key):
+            flash('Слишком много попыток входа, попробуйте позже')
+            return render_template('login.html'), 429
+
+        user = User.query.filter_by(username=username).first()
+        if verify_password(user, password):
+            reset_login_failures(key)
+            session.clear()
+            session['user_id'] = user.id
+            session['username'] = user.username
+            session.permanent = True
+
+            next_page = request.args.get('next')
+            if next_page:
+                return redirect(next_page)
+            return redirect(url_for('dashboard.index'))
+        else:
+            record_login_failure(key)
+            flash('Неверный логин или пароль')
+
+    return render_template('login.html')
+
+
+# Маршрут для выхода
+@bp.route('/logout')
+def logout():
+    if 'user_id' in session:
+        forget_user(session['user_id'])
+    session.clear()
+    return redirect(url_for('auth.login'))
@@ -0,0 +1,146 @@
+import json
+import os
+import statistics
+import threading
+import time as time_module
+from datetime import datetime, timedelta
+from flask.json.provider import DefaultJSONProvider
+from crm.extensions import db
+from crm.serialization import OrjsonProvider, compile_encoder, orjson
+
+
+# Маршруты нагрузочного прогона: имя в базовой линии -> адрес. Адреса с датами строятся
+# от текущего дня, чтобы окно календаря попадало в сгенерированные события.
+def benchmark_routes():
+    today = datetime.utcnow().date()
+    month_start = today.replace(day=1)
+    return {
+        'dashboard': '/',
+        'api/dashboard': '/api/dashboard',
+        'tasks': '/tasks',
+        'tasks?status': '/tasks?status=pending&priority=high',
+        'calendar/day': '/calendar/day',
+        'calendar/week': '/calendar/week',
+        'calendar/month': '/calendar/month',
+        'contacts': '/contacts?category=partner',
+        'contacts?search': '/contacts?search=иван',
+        'warehouse': '/warehouse?status=sold',
+        'api/tasks': '/api/tasks?limit=100',
+        'api/tasks?fields': '/api/tasks?limit=100&fields=id,title,status,due_date',
+        'api/events?window': f'/api/events?start={month_start}&end={month_start + timedelta(days=31)}&limit=100',
+        'api/events/freebusy': f'/api/events/freebusy?start={month_start}&end={month_start + timedelta(days=31)}'
+                               f'&hours=9-18&duration=30',
+        'api/contacts': '/api/contacts?limit=100',
+        'api/contacts/search': '/api/contacts/search?q=петр',
+        'api/cars': '/api/cars?limit=100',
+        'api/cars/stats': '/api/cars/stats',
+    }
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure_route(app, user_id, url, requests, concurrency, warmup):
+    # Клиенты в потоках одного процесса проходят весь стек WSGI, без сети
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(count):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+        for _ in range(warmup):
+            client.get(url)
+        own = []
+        for _ in range(count):
+            started = time_module.perf_counter()
+            response = client.get(url)
+            own.append(time_module.perf_counter() - started)
+            if response.status_code >= 400:
+                with lock:
+                    errors.append(response.status_code)
+        with lock:
+            latencies.extend(own)
+
+    per_worker = max(1, requests // concurrency)
+    threads = [threading.Thread(target=worker, args=(per_worker,)) for _ in range(concurrency)]
+    started = time_module.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time_module.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, results, meta):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'meta': meta, 'routes': results}, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def regressions(results, baseline, tolerance, min_delta_ms=0.0):
+    # Регрессия — p95 хуже базовой линии больше чем на tolerance (0.2 = 20%) и на min_delta_ms:
+    # у быстрых маршрутов разброс между прогонами составляет миллисекунды
+    found = {}
+    for name, result in results.items():
+        base = baseline.get('routes', {}).get(name)
+        if base and result['p95_ms'] > base['p95_ms'] * (1 + tolerance) + min_delta_ms:
+            found[name] = (base['p95_ms'], result['p95_ms'])
+    return found
+
+
+# Сериализация списка: ORM-объекты + to_dict + json против кортежей колонок + кодировщика
+def measure_serialization(app, model, limit):
+    providers = {'json': DefaultJSONProvider(app)}
+    if orjson is not None:
+        providers['orjson'] = OrjsonProvider(app)
+    columns, encode = compile_encoder(model, model.api_fields)
+    query = model.query.order_by(model.id.asc()).limit(limit)
+
+    def orm_items():
+        return [obj.to_dict() for obj in query.all()]
+
+    def tuple_items():
+        return [encode(row) for row in query.with_entities(*columns).all()]
+
+    results = {}
+    for name, build, provider in (('to_dict + json', orm_items, providers['json']),
+                                  *((f'encoder + {backend}', tuple_items, provider)
+                                    for backend, provider in providers.items())):
+        db.session.expunge_all()
+        started = time_module.perf_counter()
+        items = build()
+        built = time_module.perf_counter()
+        body = provider.dumps(items)
+        results[name] = {
+            'rows': len(items),
+            'build_ms': round((built - started) * 1000, 1),
+            'dumps_ms': round((time_module.perf_counter() - built) * 1000, 1),
+            'bytes': len(body.encode()),
+        }
+        results[name]['total_ms'] = round(results[name]['build_ms'] + results[name]['dumps_ms'], 1)
+    db.session.expunge_all()
+    # Кодировщик обязан давать те же словари, что и to_dict
+    results['same_output'] = orm_items()[:1000] == tuple_items()[:1000]
+    return results
@@ -0,0 +1,69 @@
+import threading
+import time as time_module
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from crm.extensions import db
+from crm.models import TableVersion
+
+
+# Версии таблиц хранятся в БД (table_version) и растут в той же транзакции, что меняет
+# строки таблицы, поэтому одинаковы для всех воркеров. По ним сбрасываются кэши агрегатов
+# и строятся ETag списков.
+@event.listens_for(Session, 'after_flush')
+def remember_changed_tables(session, flush_context):
+    changed = session.info.setdefault('changed_tables', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if obj.__table__.name != 'table_version':
+            changed.add(obj.__table__.name)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def remember_bulk_changes(orm_execute_state):
+    if ((orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete)
+            and orm_execute_state.bind_mapper):
+        changed = orm_execute_state.session.info.setdefault('changed_tables', set())
+        changed.add(orm_execute_state.bind_mapper.local_table.name)
+
+
+@event.listens_for(Session, 'before_commit')
+def bump_table_versions(session):
+    session.flush()
+    changed = session.info.pop('changed_tables', None)
+    if not changed:
+        return
+    connection = session.connection()
+    for name in sorted(changed):
+        updated = connection.execute(
+            TableVersion.__table__.update().where(TableVersion.name == name)
+            .values(version=TableVersion.version + 1)
+        )
+        if updated.rowcount == 0:
+            connection.execute(TableVersion.__table__.insert().values(name=name, version=1))
+
+
+def get_table_versions(names):
+    rows = dict(db.session.query(TableVersion.name, TableVersion.version).filter(TableVersion.name.in_(names)))
+    return tuple(rows.get(name, 0) for name in names)
+
+
+@event.listens_for(Session, 'after_rollback')
+def forget_changed_tables(session):
+    session.info.pop('changed_tables', None)
+
+
+# Небольшой TTL-кэш: значение живёт ttl секунд и пока не изменились связанные таблицы
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def cached(key, ttl, tables, compute):
+    versions = get_table_versions(tables)
+    now = time_module.monotonic()
+    with _cache_lock:
+        entry = _cache.get(key)
+    if entry and entry[0] > now and entry[1] == versions:
+        return entry[2]
+    value = compute()
+    with _cache_lock:
+        _cache[key] = (now + ttl, versions, value)
+    return value
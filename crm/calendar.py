@@ -0,0 +1,381 @@
+import heapq
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone
+from flask import Blueprint, abort, current_app, jsonify, render_template, request
+from sqlalchemy import or_, type_coerce
+from crm.api import WriteRejected, api_list_response, create_response, delete_response, detail_response, \
+    update_response
+from crm.auth import login_required
+from crm.extensions import db
+from crm.freebusy import free_slots, merge_intervals, parse_hours
+from crm.live import publish_change
+from crm.models import CalendarEvent, EVENT_DURATION_SQL
+from crm.writes import run_write
+
+bp = Blueprint('calendar', __name__)
+
+
+def longest_event_duration():
+    if db.engine.dialect.name != 'sqlite':
+        return None
+    days = db.session.execute(db.text(f'SELECT max({EVENT_DURATION_SQL}) FROM calendar_event')).scalar()
+    return timedelta(days=days) if days is not None else None
+
+
+def events_between(start, end):
+    # События, пересекающие полуинтервал [start, end), включая начавшиеся раньше окна.
+    # Нижняя граница по start_time (start минус самое длинное событие) превращает
+    # условие пересечения в ограниченный диапазон по индексу ix_calendar_event_start_end.
+    query = CalendarEvent.query.filter(CalendarEvent.start_time < end, CalendarEvent.end_time > start,
+                                       CalendarEvent.recurrence_rule.is_(None))
+    longest = longest_event_duration()
+    if longest is not None:
+        query = query.filter(CalendarEvent.start_time >= start - longest - timedelta(seconds=1))
+    return query.order_by(CalendarEvent.start_time.asc())
+
+
+# Часы, которые показывают сетки дня и недели
+CALENDAR_HOURS = {
+    'day': range(8, 21),
+    'week': range(8, 20),
+}
+
+
+def recurring_series_between(start, end):
+    return CalendarEvent.query.filter(
+        CalendarEvent.recurrence_rule.isnot(None),
+        CalendarEvent.start_time < end,
+        or_(CalendarEvent.recurrence_until.is_(None), CalendarEvent.recurrence_until > start)
+    )
+
+
+def busy_blocks(start, end, user_id=None):
+    # Занятые блоки внутри [start, end): отменённые события не занимают время. Начало и конец
+    # обычных событий читаются без преобразования в datetime (в SQLite это строки ISO, которые
+    # сравниваются так же), в datetime переводятся только границы склеенных блоков.
+    active = CalendarEvent.status != 'cancelled'
+    query = events_between(start, end).filter(active)
+    series_query = recurring_series_between(start, end).filter(active)
+    if user_id is not None:
+        query = query.filter(CalendarEvent.user_id == user_id)
+        series_query = series_query.filter(CalendarEvent.user_id == user_id)
+    rows = query.with_entities(type_coerce(CalendarEvent.start_time, db.String),
+                               type_coerce(CalendarEvent.end_time, db.String))
+    single = [(as_datetime(block_start), as_datetime(block_end)) for block_start, block_end in merge_intervals(rows)]
+    occurrences = sorted((occurrence.start_time, occurrence.end_time) for series in series_query
+                         for occurrence in series.occurrences(start, end))
+    blocks = merge_intervals(heapq.merge(single, occurrences)) if occurrences else single
+    return [(max(block_start, start), min(block_end, end)) for block_start, block_end in blocks]
+
+
+def as_datetime(value):
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def as_day(value):
+    # Дата 'YYYY-MM-DD' из строки ISO (SQLite без разбора типа) или из datetime (другие СУБД)
+    return value.date().isoformat() if isinstance(value, datetime) else value[:10]
+
+
+def find_conflicts(start, end, exclude_id=None):
+    # События и повторения серий, пересекающие [start, end)
+    active = CalendarEvent.status != 'cancelled'
+    query = events_between(start, end).filter(active)
+    series_query = recurring_series_between(start, end).filter(active)
+    if exclude_id is not None:
+        query = query.filter(CalendarEvent.id != exclude_id)
+        series_query = series_query.filter(CalendarEvent.id != exclude_id)
+    found = [(event.start_time, event.id, event.title, event.end_time, False) for event in query]
+    found += [(occurrence.start_time, series.id, series.title, occurrence.end_time, True)
+              for series in series_query for occurrence in series.occurrences(start, end)]
+    return [{'id': event_id, 'title': title, 'start': event_start.isoformat(), 'end': event_end.isoformat(),
+             'occurrence': occurrence}
+            for event_start, event_id, title, event_end, occurrence in sorted(found)]
+
+
+def reject_conflicts():
+    # ?conflicts=reject|allow, по умолчанию EVENT_CONFLICTS. У серии проверяется первое повторение.
+    if request.args.get('conflicts', current_app.config['EVENT_CONFLICTS']) != 'reject':
+        return None
+
+    def validate(event):
+        if event.status == 'cancelled':
+            return
+        conflicts = find_conflicts(event.start_time, event.end_time, exclude_id=event.id)
+        if conflicts:
+            raise WriteRejected({'error': 'Время пересекается с другими событиями', 'conflicts': conflicts})
+
+    return validate
+
+
+def events_in_window(start, end):
+    # Обычные события и повторения серий в окне, отсортированные по началу
+    events = events_between(start, end).all()
+    occurrences = [occurrence for series in recurring_series_between(start, end)
+                   for occurrence in series.occurrences(start, end)]
+    if not occurrences:
+        return events
+    return sorted(events + occurrences, key=lambda event: event.start_time)
+
+
+def calendar_window(view_type, current_date):
+    day = datetime.combine(current_date.date(), time.min)
+    if view_type == 'day':
+        return day, day + timedelta(days=1)
+    if view_type == 'week':
+        start_of_week = day - timedelta(days=day.weekday())
+        return start_of_week, start_of_week + timedelta(days=7)
+    # Месяц показывается сеткой из 6 недель, начиная с понедельника первой недели
+    start_of_month = day.replace(day=1)
+    start_of_grid = start_of_month - timedelta(days=start_of_month.weekday())
+    return start_of_grid, start_of_grid + timedelta(days=42)
+
+
+def bucket_events(events, window_start, window_end, hours):
+    # Один проход по событиям: день -> час -> список событий.
+    # Многодневные события попадают в каждый день, который пересекают; продолжающиеся
+    # с прошлого дня и выходящие за видимые часы прижимаются к краю сетки.
+    buckets = defaultdict(lambda: defaultdict(list))
+    for event in events:
+        end_time = max(event.end_time, event.start_time + timedelta(microseconds=1))
+        day = max(event.start_time, window_start).date()
+        last_day = (min(end_time, window_end) - timedelta(microseconds=1)).date()
+        while day <= last_day:
+            hour = event.start_time.hour if day == event.start_time.date() else 0
+            if hours:
+                hour = min(max(hour, hours[0]), hours[-1])
+            buckets[day][hour].append(event)
+            day += timedelta(days=1)
+    return buckets
+
+
+def calendar_grid(view_type, current_date, window_start, window_end, events):
+    hours = CALENDAR_HOURS.get(view_type)
+    buckets = bucket_events(events, window_start, window_end, hours)
+    today = datetime.utcnow().date()
+
+    cells = []
+    day = window_start
+    while day < window_end:
+        by_hour = buckets.get(day.date(), {})
+        cell = {
+            'date': day,
+            'is_today': day.date() == today,
+            'is_current_month': day.month == current_date.month,
+        }
+        if hours:
+            cell['hours'] = [(hour, by_hour.get(hour, [])) for hour in hours]
+        else:
+            cell['events'] = [event for hour in sorted(by_hour) for event in by_hour[hour]]
+        cells.append(cell)
+        day += timedelta(days=1)
+
+    if view_type == 'month':
+        return [cells[week * 7:week * 7 + 7] for week in range(len(cells) // 7)]
+    return cells
+
+
+def month_grid(current_date, window_start, window_end, limit):
+    # Месяц: в клетке показываются первые limit событий дня и число остальных («+N ещё»).
+    # Сначала по индексу ix_calendar_event_start_end (без чтения строк таблицы) читаются
+    # начало, конец и id всех событий сетки; по ним считаются события дня
+    # и отбираются показываемые. Название и тип читаются только для них и для многодневных
+    # событий; повторения серий раскладываются как в calendar_grid.
+    series = recurring_series_between(window_start, window_end).all()
+    series_ids = {item.id for item in series}
+    bounds = [CalendarEvent.start_time < window_end, CalendarEvent.end_time > window_start]
+    longest = longest_event_duration()
+    if longest is not None:
+        bounds.append(CalendarEvent.start_time >= window_start - longest - timedelta(seconds=1))
+    # Запрос Core, а не Query: тысячи строк не проходят через загрузчик ORM. SQLite хранит
+    # даты строками ISO, их достаточно обрезать до дня; другие СУБД отдают datetime
+    start_column, end_column = CalendarEvent.start_time, CalendarEvent.end_time
+    if db.engine.dialect.name == 'sqlite':
+        start_column, end_column = type_coerce(start_column, db.String), type_coerce(end_column, db.String)
+    rows = db.session.execute(db.select(start_column, end_column, CalendarEvent.id).where(*bounds)).all()
+
+    totals = defaultdict(int)
+    shown_ids = []
+    multi_day_ids = []
+    for start, end, event_id in rows:
+        if event_id in series_ids:
+            continue
+        day = as_day(start)
+        if day != as_day(end):
+            multi_day_ids.append(event_id)
+            continue
+        totals[day] += 1
+        if totals[day] <= limit:
+            shown_ids.append(event_id)
+
+    ids = shown_ids + multi_day_ids
+    events = db.session.execute(db.select(CalendarEvent.id, CalendarEvent.title, CalendarEvent.start_time,
+                                          CalendarEvent.end_time, CalendarEvent.event_type)
+                                .where(CalendarEvent.id.in_(ids))).all() if ids else []
+    events += [occurrence for item in series for occurrence in item.occurrences(window_start, window_end)]
+    events.sort(key=lambda event: event.start_time)
+
+    weeks = calendar_grid('month', current_date, window_start, window_end, events)
+    for week in weeks:
+        for cell in week:
+            shown = cell['events']
+            cell['events'] = shown[:limit]
+            # Однодневные события дня, которые не читались, тоже входят в «+N ещё»
+            total = totals[cell['date'].date().isoformat()]
+            cell['more'] = len(shown) - len(cell['events']) + total - min(total, limit)
+    return weeks
+
+
+@bp.route('/calendar/<view_type>')
+@login_required
+def calendar_view(view_type):
+    if view_type not in ('day', 'week', 'month'):
+        abort(404)
+    date_str = request.args.get('date')
+    if date_str:
+        try:
+            current_date = datetime.fromisoformat(date_str)
+        except ValueError:
+            current_date = datetime.utcnow()
+    else:
+        current_date = datetime.utcnow()
+
+    # Получаем события, пересекающие выбранный день/неделю/месяц
+    window_start, window_end = calendar_window(view_type, current_date)
+    if view_type == 'month':
+        events = None
+        grid = month_grid(current_date, window_start, window_end, current_app.config['CALENDAR_MONTH_CELL_EVENTS'])
+    else:
+        events = events_in_window(window_start, window_end)
+        grid = calendar_grid(view_type, current_date, window_start, window_end, events)
+
+    return render_template(f'calendar/view_{view_type}.html',
+                           events=events,
+                           grid=grid,
+                           hours=CALENDAR_HOURS.get(view_type),
+                           current_date=current_date,
+                           view_type=view_type)
+
+
+@bp.route('/api/events', methods=['GET', 'POST'])
+@login_required
+def api_events():
+    if request.method == 'POST':
+        return create_response(CalendarEvent, validate=reject_conflicts())
+
+    start = request.args.get('start')
+    end = request.args.get('end')
+
+    events_query = CalendarEvent.query
+    occurrences = None
+    if start and end:
+        try:
+            window_start, window_end = datetime.fromisoformat(start), datetime.fromisoformat(end)
+        except ValueError:
+            pass
+        else:
+            events_query = events_between(window_start, window_end)
+            occurrences = sorted((occurrence for series in recurring_series_between(window_start, window_end)
+                                  for occurrence in series.occurrences(window_start, window_end)),
+                                 key=lambda occurrence: occurrence.start_time)
+
+    return api_list_response(CalendarEvent, events_query, extra=occurrences)
+
+
+def parse_datetime(value):
+    # Время с часовым поясом переводится в UTC без пояса, как хранятся события
+    value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_window():
+    start = parse_datetime(request.args['start'])
+    end = parse_datetime(request.args['end'])
+    if end <= start:
+        raise ValueError('end должен быть позже start')
+    if end - start > timedelta(days=current_app.config['FREEBUSY_MAX_DAYS']):
+        raise ValueError(f"Окно больше {current_app.config['FREEBUSY_MAX_DAYS']} дней")
+    return start, end
+
+
+# Занятое и свободное время в окне [start, end): ?duration — минимальная длина свободного
+# промежутка в минутах, ?hours=9-18 — искать только в рабочие часы, ?user — события, созданные пользователем
+@bp.route('/api/events/freebusy')
+@login_required
+def api_events_freebusy():
+    try:
+        start, end = parse_window()
+        min_length = timedelta(minutes=request.args.get('duration', 0, type=int))
+        hours = parse_hours(request.args['hours']) if request.args.get('hours') else None
+    except (KeyError, ValueError, TypeError) as e:
+        return jsonify({'error': f'Неверные параметры: {e}'}), 400
+
+    busy = busy_blocks(start, end, request.args.get('user', type=int))
+    free = free_slots(busy, start, end, min_length, hours)
+    return jsonify({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'busy': [{'start': block_start.isoformat(), 'end': block_end.isoformat()} for block_start, block_end in busy],
+        'free': [{'start': slot_start.isoformat(), 'end': slot_end.isoformat()} for slot_start, slot_end in free],
+    })
+
+
+# Проверка времени до сохранения: события, с которыми пересечётся [start, end);
+# ?exclude — id редактируемого события
+@bp.route('/api/events/conflicts')
+@login_required
+def api_events_conflicts():
+    try:
+        start, end = parse_window()
+    except (KeyError, ValueError, TypeError) as e:
+        return jsonify({'error': f'Неверные параметры: {e}'}), 400
+    return jsonify({'conflicts': find_conflicts(start, end, request.args.get('exclude', type=int))})
+
+
+@bp.route('/api/events/<int:event_id>', methods=['GET', 'PUT', 'DELETE'])
+@login_required
+def api_event(event_id):
+    if request.method == 'GET':
+        return detail_response(CalendarEvent, event_id)
+
+    if request.method == 'PUT':
+        return update_response(CalendarEvent, event_id, validate=reject_conflicts())
+
+    elif request.method == 'DELETE':
+        occurrence = request.args.get('occurrence')
+        if not occurrence:
+            return delete_response(CalendarEvent, event_id)
+        try:
+            occurrence = parse_datetime(occurrence)
+        except ValueError:
+            return jsonify({'error': 'occurrence должен быть датой ISO 8601'}), 400
+
+        def delete_occurrence():
+            # Дата, не совпадающая с началом события или повторения серии (в том числе уже
+            # исключённого), — 404: удаляется только то, что клиент видел в календаре
+            event = db.session.get(CalendarEvent, event_id)
+            if event is None:
+                return None
+            if event.recurrence_rule:
+                window_end = occurrence + timedelta(microseconds=1)
+                if not any(item.start_time == occurrence for item in event.occurrences(occurrence, window_end)):
+                    return None
+                # Удаление одного повторения серии — это исключение, а не удаление серии
+                event.set_recurrence(event.recurrence_rule,
+                                     event.get_exdates() + [occurrence])
+                db.session.flush()
+                return 'updated', event.row_version, event.to_dict()
+            if event.start_time != occurrence:
+                return None
+            db.session.delete(event)
+            db.session.flush()
+            return 'deleted', event.row_version, None
+
+        result = run_write(delete_occurrence)
+        if result is None:
+            abort(404)
+        action, version, item = result
+        publish_change('events', action, event_id, version, item)
+        return '', 204
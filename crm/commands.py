@@ -0,0 +1,383 @@
+import click
+import tempfile
+import threading
+import time as time_module
+from datetime import datetime, timedelta
+from flask import current_app
+from flask.cli import with_appcontext
+from crm.api import API_MODELS
+from crm.benchmarks import benchmark_routes, load_baseline, measure_route, measure_serialization, regressions, \
+    save_baseline
+from crm.calendar import events_between, recurring_series_between
+from crm.contacts import CONTACT_PAGE_KEYS, filtered_contacts_query
+from crm.demo import create_demo_data, init_database
+from crm.extensions import db
+from crm.jobs import ensure_periodic_jobs, get_scheduler
+from crm.media import purge_unreferenced
+from crm.models import User, Task, CalendarEvent, Contact, Job, CONTACT_FTS_REBUILD
+from crm.sync import purge_tombstones
+from crm.synthetic import generate_data
+from crm.pagination import keyset_query
+from crm.sweeps import OVERDUE_KEYS, OVERDUE_STATUSES, REMINDER_KEYS, newly_overdue_tasks, upcoming_events
+from crm.tasks import TASK_PAGE_KEYS, filtered_tasks_query
+from crm.warehouse import CAR_PAGE_KEYS, filtered_cars_query
+
+
+@click.command('init-db')
+@with_appcontext
+@click.option('--demo', is_flag=True, help='Заполнить пустые таблицы демо-данными (пользователь «Сергей»).')
+def init_db_command(demo):
+    """Применяет миграции и при необходимости добавляет демо-данные."""
+    init_database(with_demo=demo)
+    print('База данных готова')
+
+
+@click.command('seed-demo')
+@with_appcontext
+def seed_demo_command():
+    """Добавляет демо-данные в пустые таблицы."""
+    create_demo_data()
+    print('Демо-данные добавлены')
+
+
+@click.command('create-user')
+@with_appcontext
+@click.argument('username')
+@click.argument('email')
+@click.password_option(help='Пароль; если не указан, будет запрошен.')
+def create_user_command(username, email, password):
+    """Создаёт пользователя или меняет пароль существующего."""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        user = User(username=username, email=email)
+        db.session.add(user)
+    user.set_password(password)
+    db.session.commit()
+    revoke_user_sessions(user.id)
+    print(f'Пользователь {username} сохранён')
+
+
+def revoke_user_sessions(user_id):
+    if hasattr(current_app.session_interface, 'revoke_user'):
+        current_app.session_interface.revoke_user(user_id)
+
+
+@click.command('revoke-sessions')
+@with_appcontext
+@click.argument('username')
+def revoke_sessions_command(username):
+    """Завершает все сессии пользователя (серверные сессии)."""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f'Пользователь {username} не найден')
+    revoke_user_sessions(user.id)
+    print(f'Сессии пользователя {username} завершены')
+
+
+@click.command('purge-sessions')
+@with_appcontext
+def purge_sessions_command():
+    """Удаляет просроченные серверные сессии."""
+    store = getattr(current_app.session_interface, 'store', None)
+    print(f'Удалено сессий: {store.purge_expired() if store else 0}')
+
+
+@click.command('purge-tombstones')
+@with_appcontext
+@click.option('--days', default=None, type=int,
+              help='Сколько дней хранить записи об удалениях (по умолчанию SYNC_TOMBSTONE_DAYS).')
+def purge_tombstones_command(days):
+    """Удаляет старые записи об удалениях для /api/sync."""
+    days = current_app.config['SYNC_TOMBSTONE_DAYS'] if days is None else days
+    print(f'Удалено записей об удалениях: {purge_tombstones(days)}')
+
+
+@click.command('purge-photos')
+@with_appcontext
+@click.option('--min-age', default=3600, help='Не трогать файлы моложе стольких секунд.')
+def purge_photos_command(min_age):
+    """Удаляет фото контактов, на которые не ссылается ни один контакт."""
+    referenced = {photo for photo, in db.session.query(Contact.photo).filter(Contact.photo.isnot(None))}
+    print(f'Удалено фото: {purge_unreferenced(referenced, min_age)}')
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index():
+    """Пересобирает полнотекстовый индекс контактов."""
+    for statement in CONTACT_FTS_REBUILD:
+        db.session.execute(db.text(statement))
+    db.session.commit()
+    print(f'Проиндексировано контактов: {Contact.query.count()}')
+
+
+# Таблицы, которые растут с данными: проход по всему их индексу — тоже полное сканирование
+LARGE_TABLES = tuple(model.__tablename__ for model in API_MODELS.values())
+
+
+def explain_query_plan(query):
+    # План и признак LIMIT: со LIMIT проход по индексу в порядке ORDER BY останавливается через limit строк
+    statement = str(query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {statement}')).all()
+    return [row[-1] for row in rows], ' LIMIT ' in statement
+
+
+def full_scan_steps(plan, limited=False):
+    # Полный проход по таблице без индекса, сортировка во временном B-дереве и проход по всему
+    # индексу большой таблицы (SCAN ... USING INDEX), если его не ограничивает LIMIT
+    problems = []
+    for step in plan:
+        if step.startswith('SCAN ') and ' USING ' not in step and ' VIRTUAL TABLE INDEX ' not in step:
+            problems.append(step)
+        elif step.startswith('SCAN ') and step.split()[1] in LARGE_TABLES and not limited:
+            problems.append(step)
+        elif step.startswith('USE TEMP B-TREE'):
+            problems.append(step)
+    return problems
+
+
+def hot_queries(now):
+    # Запросы страниц, календаря, сводки, API и планировщика; их планы проверяют
+    # `flask check-query-plans` и tests/test_query_plans.py
+    queries = {
+        'contacts?search': filtered_contacts_query(search_query='иван'),
+        'contacts?search=phone': filtered_contacts_query(search_query='+7 999'),
+        'calendar/api_events': events_between(now, now + timedelta(days=31)),
+        'calendar/recurring-series': recurring_series_between(now, now + timedelta(days=31)),
+        'dashboard/overdue': Task.query.filter(Task.due_date < now, Task.status.notin_(('completed', 'cancelled'))),
+        'dashboard/new-contacts': db.session.query(db.func.count(Contact.id)).filter(
+            Contact.created_at >= now - timedelta(days=7)),
+        'calendar/longest-event': db.session.query(
+            db.func.max(db.func.julianday(CalendarEvent.end_time) - db.func.julianday(CalendarEvent.start_time))
+        ),
+    }
+    for entity, model in API_MODELS.items():
+        queries[f'api/{entity}?after'] = model.query.filter(model.id > 0).order_by(model.id.asc()).limit(100)
+
+    # Страницы списков по курсору (первая, следующая, курсор с NULL в первом ключе) и пачки планировщика
+    page_size = current_app.config['LIST_PAGE_SIZE'] + 1
+    batch_size = current_app.config['SCHEDULER_BATCH_SIZE']
+    cursors = {
+        'tasks': (filtered_tasks_query, TASK_PAGE_KEYS, (now, 1)),
+        'tasks?status': (lambda: filtered_tasks_query('pending'), TASK_PAGE_KEYS, (now, 1)),
+        'tasks?priority': (lambda: filtered_tasks_query(priority_filter='high'), TASK_PAGE_KEYS, (now, 1)),
+        'tasks?status&priority': (lambda: filtered_tasks_query('pending', 'high'), TASK_PAGE_KEYS, (now, 1)),
+        'contacts': (filtered_contacts_query, CONTACT_PAGE_KEYS, ('Иванов', 1)),
+        'contacts?category': (lambda: filtered_contacts_query('client'), CONTACT_PAGE_KEYS, ('Иванов', 1)),
+        'warehouse': (filtered_cars_query, CAR_PAGE_KEYS, ('Toyota', 'Camry', 1)),
+        'warehouse?status': (lambda: filtered_cars_query('in_stock'), CAR_PAGE_KEYS, ('Toyota', 'Camry', 1)),
+    }
+    for name, (build, keys, values) in cursors.items():
+        queries[f'{name} page 1'] = keyset_query(build(), keys, None, page_size)
+        queries[f'{name} cursor'] = keyset_query(build(), keys, values, page_size)
+        queries[f'{name} cursor=null'] = keyset_query(build(), keys, (None,) + values[1:], page_size)
+    for status in OVERDUE_STATUSES:
+        queries[f'scheduler/overdue-tasks?{status} cursor'] = keyset_query(
+            newly_overdue_tasks(status, now - timedelta(days=1), now), OVERDUE_KEYS, (now - timedelta(hours=1), 1),
+            batch_size)
+    queries['scheduler/event-reminders cursor'] = keyset_query(
+        upcoming_events(now, now + timedelta(minutes=15)), REMINDER_KEYS, (now + timedelta(minutes=5), 1),
+        batch_size)
+    return queries
+
+
+@click.command('check-query-plans')
+@with_appcontext
+def check_query_plans():
+    """Проверяет через EXPLAIN QUERY PLAN, что запросы страниц используют индексы."""
+    failed = False
+    for name, query in hot_queries(datetime.utcnow()).items():
+        plan, limited = explain_query_plan(query)
+        problems = full_scan_steps(plan, limited)
+        print(f"{'FAIL' if problems else 'ok  '} {name}: {'; '.join(plan)}")
+        failed = failed or bool(problems)
+    if failed:
+        raise SystemExit(1)
+
+
+def run_write_benchmark(app, threads, total):
+    # threads клиентов параллельно создают задачи через POST /api/tasks
+    counts = {'ok': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    with app.app_context():
+        user = User(username='bench', email='bench@example.com')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    def worker(count):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+        for i in range(count):
+            try:
+                ok = client.post('/api/tasks', json={'title': f'Задача {i}'}).status_code == 201
+            except Exception:
+                ok = False
+            with lock:
+                counts['ok' if ok else 'errors'] += 1
+
+    workers = [threading.Thread(target=worker, args=(total // threads,)) for _ in range(threads)]
+    started = time_module.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return counts['ok'] / (time_module.perf_counter() - started), counts['errors']
+
+
+@click.command('bench-writes')
+@click.option('--threads', default=8, help='Количество параллельных клиентов.')
+@click.option('--requests', 'total', default=800, help='Всего запросов на режим.')
+def bench_writes(threads, total):
+    """Сравнивает скорость записи через API: SQLite по умолчанию, WAL и WAL с очередью записи."""
+    from crm import create_app
+
+    modes = {
+        'default': ('development', {}),
+        'wal': ('production', {'WRITE_QUEUE': False}),
+        'wal+queue': ('production', {'WRITE_QUEUE': True}),
+    }
+    for name, (profile, overrides) in modes.items():
+        with tempfile.TemporaryDirectory() as directory:
+            app = create_app(profile, SQLALCHEMY_DATABASE_URI=f'sqlite:///{directory}/bench.db', **overrides)
+            with app.app_context():
+                db.create_all()
+            rate, errors = run_write_benchmark(app, threads, total)
+            with app.app_context():
+                db.engine.dispose()
+        print(f'{name:10} {rate:8.0f} запросов/с, ошибок: {errors}')
+
+
+@click.command('generate-data')
+@with_appcontext
+@click.option('--tasks', default=0, help='Сколько задач добавить.')
+@click.option('--events', default=0, help='Сколько событий добавить.')
+@click.option('--contacts', default=0, help='Сколько контактов добавить.')
+@click.option('--cars', default=0, help='Сколько автомобилей добавить.')
+@click.option('--seed', default=42, help='Зерно генератора: одинаковое зерно даёт одинаковые данные.')
+@click.option('--batch-size', default=10000, help='Строк в одной пачке INSERT.')
+def generate_data_command(tasks, events, contacts, cars, seed, batch_size):
+    """Заполняет таблицы синтетическими данными для нагрузочных тестов."""
+    started = time_module.perf_counter()
+
+    def progress(model, inserted):
+        print(f'\r{model.__tablename__}: {inserted}', end='', flush=True)
+
+    counts = generate_data(tasks, events, contacts, cars, seed=seed, batch_size=batch_size, progress=progress)
+    print()
+    print(', '.join(f'{name}: {count}' for name, count in counts.items()),
+          f'за {time_module.perf_counter() - started:.1f} с')
+
+
+@click.command('bench-routes')
+@with_appcontext
+@click.option('--requests', default=50, help='Запросов на маршрут.')
+@click.option('--concurrency', default=1, help='Параллельных клиентов.')
+@click.option('--warmup', default=2, help='Прогревочных запросов на клиента.')
+@click.option('--route', 'only', multiple=True, help='Только указанные маршруты (имя из списка).')
+@click.option('--baseline', default=None, help='Файл базовой линии (по умолчанию BENCH_BASELINE).')
+@click.option('--save', is_flag=True, help='Сохранить результат как новую базовую линию.')
+@click.option('--tolerance', default=0.2, help='Допустимое ухудшение p95 относительно базовой линии.')
+@click.option('--min-delta', default=0.0, help='Ухудшение p95 меньше стольких мс не считается регрессией.')
+def bench_routes(requests, concurrency, warmup, only, baseline, save, tolerance, min_delta):
+    """Измеряет задержки (p50/p95/p99) и пропускную способность страниц и API."""
+    user = User.query.order_by(User.id).first()
+    if user is None:
+        raise click.ClickException('Нет пользователей: выполните flask create-user или flask seed-demo')
+    baseline = baseline or current_app.config['BENCH_BASELINE']
+    previous = load_baseline(baseline)
+
+    routes = benchmark_routes()
+    unknown = set(only) - set(routes)
+    if unknown:
+        raise click.ClickException(f"Неизвестные маршруты: {', '.join(sorted(unknown))}")
+    app = current_app._get_current_object()
+    results = {}
+    print(f"{'маршрут':24} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}  ошибок")
+    for name, url in routes.items():
+        if only and name not in only:
+            continue
+        result = measure_route(app, user.id, url, requests, concurrency, warmup)
+        results[name] = result
+        base = previous.get('routes', {}).get(name)
+        delta = f"  (p95 было {base['p95_ms']})" if base else ''
+        print(f"{name:24} {result['rps']:8} {result['p50_ms']:8} {result['p95_ms']:8} {result['p99_ms']:8}  "
+              f"{result['errors']}{delta}")
+
+    if save:
+        meta = {
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'requests': requests,
+            'concurrency': concurrency,
+            'warmup': warmup,
+            'rows': {model.__tablename__: db.session.query(db.func.count(model.id)).scalar()
+                     for model in API_MODELS.values()},
+        }
+        save_baseline(baseline, results, meta)
+        print(f'Базовая линия сохранена: {baseline}')
+        return
+
+    found = regressions(results, previous, tolerance, min_delta)
+    for name, (before, after) in found.items():
+        print(f'РЕГРЕССИЯ {name}: p95 {before} -> {after} мс')
+    if found:
+        raise SystemExit(1)
+
+
+@click.command('bench-serialization')
+@with_appcontext
+@click.option('--rows', default=100000, help='Сколько строк каждой таблицы сериализовать.')
+def bench_serialization(rows):
+    """Сравнивает to_dict + json с кодировщиками по кортежам колонок (и orjson)."""
+    app = current_app._get_current_object()
+    for entity, model in API_MODELS.items():
+        results = measure_serialization(app, model, rows)
+        same = results.pop('same_output')
+        print(f'{entity}: {next(iter(results.values()))["rows"]} строк, результат совпадает: {"да" if same else "НЕТ"}')
+        for name, result in results.items():
+            print(f"  {name:18} выборка {result['build_ms']:8} мс  json {result['dumps_ms']:8} мс  "
+                  f"всего {result['total_ms']:8} мс  {result['bytes'] // 1024} КБ")
+
+
+@click.command('run-scheduler')
+@with_appcontext
+@click.option('--once', is_flag=True, help='Выполнить задачи, срок которых наступил, и выйти (для cron).')
+def run_scheduler(once):
+    """Запускает фоновый планировщик в отдельном процессе."""
+    scheduler = get_scheduler()
+    ensure_periodic_jobs(current_app.config['SCHEDULER_JOBS'])
+    if once:
+        print(f'Выполнено задач: {scheduler.run_pending()}')
+        return
+    print(f'Планировщик запущен ({scheduler.worker_id}), Ctrl+C — остановка')
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+@click.command('list-jobs')
+@with_appcontext
+def list_jobs():
+    """Показывает задачи планировщика и их состояние."""
+    for job in Job.query.order_by(Job.finished_at.isnot(None), Job.run_at.asc()):
+        if job.finished_at:
+            state = 'ошибка' if job.last_error else 'выполнена'
+        elif job.locked_until and job.locked_until > datetime.utcnow():
+            state = f'выполняется ({job.locked_by})'
+        else:
+            state = f"следующий запуск {job.run_at:%Y-%m-%d %H:%M:%S}"
+        every = f'каждые {job.interval} с' if job.interval else 'разовая'
+        print(f'{job.name:28} {every:16} {state}')
+        if job.last_error:
+            print(f'{"":28} последняя ошибка: {job.last_error}')
+
+
+def register_commands(app):
+    for command in (init_db_command, seed_demo_command, create_user_command, revoke_sessions_command,
+                    purge_sessions_command, purge_tombstones_command, purge_photos_command, rebuild_search_index,
+                    check_query_plans, bench_writes, generate_data_command, bench_routes, bench_serialization,
+                    run_scheduler, list_jobs):
+        app.cli.add_command(command)
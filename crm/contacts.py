@@ -0,0 +1,146 @@
+from flask import Blueprint, abort, current_app, render_template, request, jsonify, url_for
+from crm.api import api_list_response, create_response, delete_response, detail_response, update_response
+from crm.auth import login_required
+from crm.extensions import db
+from crm.live import publish_change
+from crm.media import PhotoRejected, generate_thumbnails, store_photo
+from crm.models import Contact, format_full_name
+from crm.writes import run_write
+from crm.pagination import next_page_links, only_requested, paginate
+from crm.search import search_contacts
+
+bp = Blueprint('contacts', __name__)
+
+# Ключи сортировки страниц списка (курсор ?cursor=); у поиска — смещение
+CONTACT_PAGE_KEYS = (Contact.last_name, Contact.id)
+
+
+def filtered_contacts_query(category_filter='all', search_query=''):
+    contacts_query = Contact.query
+
+    if category_filter != 'all':
+        contacts_query = contacts_query.filter_by(category=category_filter)
+    if search_query:
+        return search_contacts(contacts_query, search_query)
+
+    return contacts_query.order_by(Contact.last_name.asc())
+
+
+def contacts_page():
+    category_filter = request.args.get('category', 'all')
+    search_query = request.args.get('search', '').strip()
+    # Результаты поиска упорядочены по релевантности, их страницы идут по смещению
+    keys = None if search_query else CONTACT_PAGE_KEYS
+    query = only_requested(filtered_contacts_query(category_filter, search_query), Contact)
+    contacts, cursor = paginate(query, keys, request.args.get('cursor'))
+    return {'contacts': contacts, 'category_filter': category_filter, 'search_query': search_query,
+            'next_page': next_page_links('contacts.contacts', 'contacts.contact_cards', cursor)}
+
+
+@bp.route('/contacts')
+@login_required
+def contacts():
+    return render_template('contacts.html', **contacts_page())
+
+
+@bp.route('/contacts/cards')
+@login_required
+def contact_cards():
+    return render_template('partials/contact_cards.html', **contacts_page())
+
+
+@bp.route('/api/contacts/search')
+@login_required
+def api_contacts_search():
+    search_query = request.args.get('q', '').strip()
+    if len(search_query) < 2:
+        return jsonify([])
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    rows = search_contacts(Contact.query, search_query, ranked=False).with_entities(
+        Contact.id, Contact.last_name, Contact.first_name, Contact.middle_name,
+        Contact.phone, Contact.email, Contact.company
+    ).limit(limit).all()
+    return jsonify([{
+        'id': row.id,
+        'full_name': format_full_name(row.last_name, row.first_name, row.middle_name),
+        'phone': row.phone,
+        'email': row.email,
+        'company': row.company
+    } for row in rows])
+
+
+@bp.route('/api/contacts', methods=['GET', 'POST'])
+@login_required
+def api_contacts():
+    if request.method == 'POST':
+        return create_response(Contact)
+
+    return api_list_response(Contact, Contact.query)
+
+
+@bp.route('/api/contacts/<int:contact_id>', methods=['GET', 'PUT', 'DELETE'])
+@login_required
+def api_contact(contact_id):
+    if request.method == 'GET':
+        return detail_response(Contact, contact_id)
+
+    if request.method == 'PUT':
+        return update_response(Contact, contact_id)
+
+    elif request.method == 'DELETE':
+        return delete_response(Contact, contact_id)
+
+
+def set_contact_photo(contact_id, key):
+    def update():
+        contact = db.session.get(Contact, contact_id)
+        if contact is None:
+            return None
+        contact.photo = key
+        db.session.flush()
+        return contact.to_dict(), contact.row_version
+
+    result = run_write(update)
+    if result is None:
+        abort(404)
+    item, version = result
+    publish_change('contacts', 'updated', contact_id, version, item)
+    return item
+
+
+# Загрузка фото: тело запроса — сам файл (Content-Type: image/...) или форма multipart с полем photo.
+# Файл пишется на диск по мере чтения, миниатюры строятся в фоне
+@bp.route('/api/contacts/<int:contact_id>/photo', methods=['PUT', 'DELETE'])
+@login_required
+def api_contact_photo(contact_id):
+    if request.method == 'DELETE':
+        set_contact_photo(contact_id, None)
+        return '', 204
+
+    if db.session.get(Contact, contact_id) is None:
+        abort(404)
+    # Соединение с БД не держится, пока клиент передаёт файл
+    db.session.close()
+    max_size = current_app.config['PHOTO_MAX_SIZE']
+    if request.content_length is not None and request.content_length > max_size + 64 * 1024:
+        return jsonify({'error': f'Файл больше {max_size // (1024 * 1024)} МБ'}), 413
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('photo')
+        if upload is None:
+            return jsonify({'error': 'Нет поля photo'}), 400
+        stream = upload.stream
+    else:
+        stream = request.stream
+    try:
+        key = store_photo(stream, max_size)
+    except PhotoRejected as e:
+        return jsonify({'error': str(e)}), e.status
+
+    set_contact_photo(contact_id, key)
+    generate_thumbnails(key)
+    return jsonify({
+        'photo': key,
+        'url': url_for('media.photo', key=key),
+        'thumbnails': {size: url_for('media.thumbnail', size=size, key=key)
+                       for size in current_app.config['PHOTO_THUMB_SIZES']},
+    })
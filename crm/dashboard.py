@@ -0,0 +1,79 @@
+import hashlib
+from datetime import datetime, time, timedelta
+from flask import Blueprint, Response, current_app, g, render_template
+from crm.api import conditional, not_modified, not_modified_response
+from crm.auth import login_required
+from crm.cache import cached
+from crm.calendar import events_in_window
+from crm.extensions import db
+from crm.models import Task, Contact, Car
+
+bp = Blueprint('dashboard', __name__)
+
+# Сводка для главной страницы: все счётчики одним набором агрегатных запросов
+DASHBOARD_TABLES = ('task', 'calendar_event', 'contact', 'car')
+
+
+def compute_dashboard():
+    now = datetime.utcnow()
+    today = datetime.combine(now.date(), time.min)
+
+    tasks_by_status = dict(db.session.query(Task.status, db.func.count(Task.id)).group_by(Task.status).all())
+    overdue_query = Task.query.filter(Task.due_date < now, Task.status.notin_(('completed', 'cancelled')))
+    today_events = events_in_window(today, today + timedelta(days=1))
+
+    return {
+        'tasks': {
+            'by_status': tasks_by_status,
+            'active': tasks_by_status.get('pending', 0) + tasks_by_status.get('in_progress', 0),
+            'overdue': overdue_query.count(),
+            'overdue_list': [task.to_dict() for task in overdue_query.order_by(Task.due_date.asc()).limit(5)]
+        },
+        'events': {
+            'today': len(today_events),
+            'today_list': [event.to_dict() for event in today_events[:10]]
+        },
+        'contacts': {
+            'total': db.session.query(db.func.count(Contact.id)).scalar(),
+            'new': db.session.query(db.func.count(Contact.id)).filter(
+                Contact.created_at >= now - timedelta(days=current_app.config['DASHBOARD_NEW_CONTACT_DAYS'])
+            ).scalar()
+        },
+        'cars': {
+            'in_stock': db.session.query(db.func.count(Car.id)).filter(Car.status == 'in_stock').scalar()
+        },
+        'generated_at': now.isoformat()
+    }
+
+
+def dashboard_summary():
+    # Кэш на пользователя: сводка, готовое JSON-тело и его ETag. ETag считается по счётчикам
+    # без generated_at: пересчёт после DASHBOARD_TTL без изменений данных даёт тот же ETag (304)
+    def compute():
+        summary = compute_dashboard()
+        counters = {key: value for key, value in summary.items() if key != 'generated_at'}
+        etag = hashlib.sha1(current_app.json.dumps(counters).encode()).hexdigest()
+        return summary, current_app.json.dumps(summary), etag
+
+    return cached(('dashboard', g.user['id']), current_app.config['DASHBOARD_TTL'], DASHBOARD_TABLES, compute)
+
+
+@bp.route('/')
+@login_required
+def index():
+    summary, _, _ = dashboard_summary()
+    return render_template('index.html', summary=summary)
+
+
+@bp.route('/api/dashboard')
+@login_required
+def api_dashboard():
+    _, body, etag = dashboard_summary()
+    if not_modified(etag):
+        return not_modified_response(etag)
+    return conditional(Response(body, mimetype='application/json'), etag)
+
+
+@bp.route('/car_catalog')
+def car_catalog():
+    return render_template('car_catalog.html')
@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta
+from flask_migrate import stamp, upgrade
+from sqlalchemy import inspect
+from crm.extensions import db
+from crm.models import User, Task, CalendarEvent, Contact, Car
+
+
+# Пароль демо-пользователя (336996) хранится готовым хэшем, чтобы не считать scrypt при заполнении
+DEMO_USER_PASSWORD_HASH = ('scrypt:32768:8:1$MEZRGov2xyc0sZ8P$499d32494f9fffff33bba5b0b1cca5ee0bebd752aaeefa546a5518379fb2b'
+                           '956ec1dc1221c61fbaf107508991ae7dd5f604deb91d5dfd1104d86dbd493088022')
+
+
+# Функция для создания демо-данных
+def create_demo_data():
+    # Добавляем пользователя для входа, если пользователей нет
+    if User.query.count() == 0:
+        db.session.add(User(username='Сергей', email='sergey@example.com', password_hash=DEMO_USER_PASSWORD_HASH))
+
+    # Добавляем демо-задачи если их нет
+    if Task.query.count() == 0:
+        demo_tasks = [
+            Task(
+                title='Подписать договор с ООО "Ромашка"',
+                description='Встреча в главном офисе для подписания договора о сотрудничестве',
+                priority='high',
+                status='pending',
+                due_date=datetime.utcnow() + timedelta(days=1)
+            ),
+            Task(
+                title='Отправить коммерческое предложение',
+                description='Подготовить и отправить КП по новому проекту',
+                priority='medium',
+                status='in_progress',
+                due_date=datetime.utcnow() + timedelta(hours=5)
+            ),
+            Task(
+                title='Составить отчет по продажам',
+                description='Еженедельный отчет по продажам за текущий период',
+                priority='low',
+                status='completed',
+                due_date=datetime.utcnow() - timedelta(days=1),
+                completed_at=datetime.utcnow() - timedelta(hours=3)
+            )
+        ]
+        db.session.add_all(demo_tasks)
+
+    # Добавляем демо-события если их нет
+    if CalendarEvent.query.count() == 0:
+        now = datetime.utcnow()
+        demo_events = [
+            CalendarEvent(
+                title='Встреча с клиентом',
+                description='Обсуждение нового проекта',
+                start_time=now.replace(hour=10, minute=0, second=0, microsecond=0),
+                end_time=now.replace(hour=11, minute=30, second=0, microsecond=0),
+                event_type='meeting',
+                location='Конференц-зал №1',
+                status='scheduled'
+            ),
+            CalendarEvent(
+                title='Звонок поставщику',
+                description='Обсуждение условий поставки',
+                start_time=now.replace(hour=14, minute=0, second=0, microsecond=0),
+                end_time=now.replace(hour=14, minute=30, second=0, microsecond=0),
+                event_type='call',
+                location='',
+                status='scheduled'
+            ),
+            CalendarEvent(
+                title='Планирование задач на неделю',
+                description='Еженедельное планирование',
+                start_time=now.replace(hour=16, minute=0, second=0, microsecond=0),
+                end_time=now.replace(hour=17, minute=0, second=0, microsecond=0),
+                event_type='task',
+                location='Рабочий кабинет',
+                status='scheduled'
+            )
+        ]
+        db.session.add_all(demo_events)
+
+    # Добавляем демо-контакты если их нет
+    if Contact.query.count() == 0:
+        now = datetime.utcnow()
+        demo_contacts = [
+            Contact(
+                first_name='Иван',
+                last_name='Иванов',
+                middle_name='Иванович',
+                phone='+79991234567',
+                email='ivanov@example.com',
+                company='ООО Ромашка',
+                position='Менеджер',
+                birth_date=now - timedelta(days=365 * 30),
+                category='client',
+                address_country='Россия',
+                address_city='Москва',
+                address_street='Ленинская',
+                address_house='10',
+                address_apartment='5'
+            ),
+            Contact(
+                first_name='Анна',
+                last_name='Петрова',
+                middle_name='Сергеевна',
+                phone='+79997654321',
+                email='petrova@example.com',
+                company='ООО Лютик',
+                position='Директор',
+                birth_date=now - timedelta(days=365 * 28),
+                category='partner',
+                address_country='Россия',
+                address_city='Санкт-Петербург',
+                address_street='Невский',
+                address_house='25'
+            )
+        ]
+        db.session.add_all(demo_contacts)
+
+    # Добавляем демо-автомобили если их нет
+    if Car.query.count() == 0:
+        demo_cars = [
+            Car(
+                vin='XW8AB12B3FG123456',
+                license_plate='А123АА777',
+                brand='Toyota',
+                model='Camry',
+                year=2022,
+                color='Черный',
+                engine_type='бензин',
+                engine_volume=2.5,
+                horsepower=249,
+                transmission='автомат',
+                mileage=15000,
+                purchase_price=2500000,
+                purchase_date=datetime(2022, 5, 15).date(),
+                current_value=2200000,
+                status='in_stock',
+                condition='used',
+                description='Отличное состояние, один владелец',
+                insurance_cost=30000,
+                maintenance_cost=15000,
+                fuel_cost=5000
+            ),
+            Car(
+                vin='Z94CB41BAER123789',
+                license_plate='В456ВВ777',
+                brand='BMW',
+                model='X5',
+                year=2021,
+                color='Белый',
+                engine_type='дизель',
+                engine_volume=3.0,
+                horsepower=265,
+                transmission='автомат',
+                mileage=45000,
+                purchase_price=3500000,
+                purchase_date=datetime(2021, 3, 10).date(),
+                sale_price=3200000,
+                sale_date=datetime(2023, 8, 20).date(),
+                status='sold',
+                condition='used',
+                description='Полная комплектация, сервисная история',
+                insurance_cost=45000,
+                maintenance_cost=20000,
+                fuel_cost=7000
+            )
+        ]
+        db.session.add_all(demo_cars)
+
+    db.session.commit()
+
+
+# Схема готовится один раз до запуска воркеров (`flask init-db`), в обработке запросов
+# проверок схемы нет. Демо-данные с известным паролем добавляются только по явному запросу
+def init_database(with_demo=False):
+    inspector = inspect(db.engine)
+    if inspector.has_table('task') and not inspector.has_table('alembic_version'):
+        # БД создана прежним db.create_all(): её схема соответствует первой миграции
+        stamp(revision='0001_initial')
+    upgrade()
+    if with_demo:
+        create_demo_data()
+
@@ -0,0 +1,12 @@
+from flask_migrate import Migrate
+from flask_sqlalchemy import SQLAlchemy
+
+db = SQLAlchemy()
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # Служебные таблицы FTS5 создаются миграцией вручную, autogenerate их не трогает
+    return not (type_ == 'table' and name.startswith('contact_fts'))
+
+
+migrate = Migrate(render_as_batch=True, include_object=include_object)
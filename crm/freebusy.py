@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+
+# Занятость календаря: интервалы [start, end) по возрастанию начала склеиваются одним
+# проходом в непересекающиеся блоки, свободное время — промежутки между блоками
+def merge_intervals(intervals):
+    blocks = []
+    for start, end in intervals:
+        if blocks and start <= blocks[-1][1]:
+            if end > blocks[-1][1]:
+                blocks[-1][1] = end
+        else:
+            blocks.append([start, end])
+    return blocks
+
+
+def parse_hours(value):
+    # '9-18' -> (9, 18): рабочие часы, внутри которых ищутся свободные промежутки
+    start, _, end = value.partition('-')
+    hours = int(start), int(end)
+    if not 0 <= hours[0] < hours[1] <= 24:
+        raise ValueError(f'Неверные часы: {value}')
+    return hours
+
+
+def working_windows(start, end, hours):
+    day = datetime.combine(start.date(), datetime.min.time())
+    while day < end:
+        window_start = max(start, day + timedelta(hours=hours[0]))
+        window_end = min(end, day + timedelta(hours=hours[1]))
+        if window_start < window_end:
+            yield window_start, window_end
+        day += timedelta(days=1)
+
+
+def free_slots(blocks, start, end, min_length=timedelta(0), hours=None):
+    # blocks — результат merge_intervals; указатель по блокам только движется вперёд,
+    # поэтому окно любой длины обходится за один проход
+    windows = working_windows(start, end, hours) if hours else ((start, end),)
+    slots = []
+    first = 0
+    for window_start, window_end in windows:
+        while first < len(blocks) and blocks[first][1] <= window_start:
+            first += 1
+        cursor = window_start
+        index = first
+        while index < len(blocks) and blocks[index][0] < window_end:
+            if blocks[index][0] > cursor:
+                slots.append((cursor, blocks[index][0]))
+            cursor = max(cursor, blocks[index][1])
+            index += 1
+        if cursor < window_end:
+            slots.append((cursor, window_end))
+    return [(slot_start, slot_end) for slot_start, slot_end in slots if slot_end - slot_start >= min_length]
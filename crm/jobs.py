@@ -0,0 +1,179 @@
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from crm.extensions import db
+from crm.models import Job
+from crm.sweeps import JOB_HANDLERS
+
+logger = logging.getLogger(__name__)
+
+
+# Фоновый планировщик. Задачи хранятся в таблице job и переживают перезапуск; исполнителей
+# может быть несколько (поток в каждом воркере и/или `flask run-scheduler`): задачу получает
+# тот, кто первым взял её в аренду одним UPDATE, остальные её пропускают.
+def ensure_periodic_jobs(intervals):
+    # Периодические задачи из SCHEDULER_JOBS: новые создаются, у существующих обновляется
+    # интервал, с интервалом 0 — удаляются
+    now = datetime.utcnow()
+    jobs = {job.name: job for job in Job.query.filter(Job.name.in_(intervals))}
+    for name, interval in intervals.items():
+        job = jobs.get(name)
+        if interval <= 0:
+            if job is not None:
+                db.session.delete(job)
+        elif job is None:
+            db.session.add(Job(name=name, handler=name, interval=interval, run_at=now, attempts=0))
+        elif job.interval != interval:
+            job.interval = interval
+            job.run_at = min(job.run_at, now + timedelta(seconds=interval))
+    db.session.commit()
+
+
+def enqueue(handler, payload=None, run_at=None, name=None):
+    # Разовая задача; добавляется в текущую транзакцию, COMMIT делает вызывающий код
+    if handler not in JOB_HANDLERS:
+        raise ValueError(f'Неизвестная задача: {handler}')
+    job = Job(name=name or f'{handler}:{uuid.uuid4().hex}', handler=handler, attempts=0,
+              payload=json.dumps(payload) if payload is not None else None, run_at=run_at or datetime.utcnow())
+    db.session.add(job)
+    return job
+
+
+class Scheduler:
+    def __init__(self, app):
+        self.app = app
+        self.poll = app.config['SCHEDULER_POLL']
+        self.lease = timedelta(seconds=app.config['SCHEDULER_LEASE'])
+        self.max_attempts = app.config['SCHEDULER_MAX_ATTEMPTS']
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def worker_id(self):
+        return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+    def ensure_started(self):
+        # Поток запускается с первым запросом воркера и заново после fork (gunicorn --preload)
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self.run_forever, name='scheduler', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        with self.app.app_context():
+            registered = False
+            while not self._stop.is_set():
+                try:
+                    if not registered:
+                        ensure_periodic_jobs(self.app.config['SCHEDULER_JOBS'])
+                        registered = True
+                    ran = self.run_due()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Ошибка планировщика')
+                    ran = False
+                finally:
+                    db.session.remove()
+                if not ran:
+                    self._stop.wait(self.poll)
+
+    def run_pending(self):
+        # Все задачи, срок которых наступил; для `flask run-scheduler --once` и cron
+        count = 0
+        while self.run_due():
+            count += 1
+        return count
+
+    def run_due(self):
+        job = self.claim()
+        if job is None:
+            return False
+        self.execute(job)
+        return True
+
+    def claim(self):
+        now = datetime.utcnow()
+        due = db.session.query(Job.id).filter(
+            Job.finished_at.is_(None), Job.run_at <= now,
+            db.or_(Job.locked_until.is_(None), Job.locked_until < now)
+        ).order_by(Job.run_at.asc()).limit(10).all()
+        table = Job.__table__
+        for job_id, in due:
+            # Аренда берётся условным UPDATE: из нескольких исполнителей строку обновит только один
+            claimed = db.session.execute(table.update().where(
+                table.c.id == job_id, table.c.finished_at.is_(None),
+                db.or_(table.c.locked_until.is_(None), table.c.locked_until < now)
+            ).values(locked_by=self.worker_id, locked_until=now + self.lease, attempts=table.c.attempts + 1))
+            db.session.commit()
+            if claimed.rowcount:
+                return db.session.get(Job, job_id)
+        return None
+
+    def execute(self, job):
+        handler = JOB_HANDLERS.get(job.handler)
+        state = json.loads(job.payload) if job.payload else {}
+        started = datetime.utcnow()
+        try:
+            if handler is None:
+                raise LookupError(f'Неизвестная задача: {job.handler}')
+            result = handler(state)
+        except Exception as e:
+            db.session.rollback()
+            logger.exception('Задача %s завершилась ошибкой', job.name)
+            self.finish(job.id, started, error=f'{type(e).__name__}: {e}')
+            return
+        logger.info('Задача %s: %s', job.name, result)
+        self.finish(job.id, started, state=state)
+
+    def finish(self, job_id, started, state=None, error=None):
+        job = db.session.get(Job, job_id)
+        now = datetime.utcnow()
+        job.locked_by = job.locked_until = None
+        job.last_run_at = started
+        job.last_error = error
+        if job.interval:
+            # Периодическая: следующий запуск через interval, ошибка не сбивает расписание
+            job.run_at = now + timedelta(seconds=job.interval)
+            if error is None:
+                job.attempts = 0
+                job.payload = json.dumps(state)
+        elif error is None:
+            job.finished_at = now
+        elif job.attempts >= self.max_attempts:
+            job.finished_at = now
+        else:
+            # Повтор разовой задачи с удвоением паузы
+            job.run_at = now + timedelta(seconds=self.poll * 2 ** job.attempts)
+        db.session.commit()
+
+
+def get_scheduler():
+    scheduler = current_app.extensions.get('scheduler')
+    if scheduler is None:
+        scheduler = current_app.extensions['scheduler'] = Scheduler(current_app._get_current_object())
+    return scheduler
+
+
+def init_scheduler(app):
+    # SCHEDULER: thread — поток в каждом процессе приложения, off — задачи выполняет только
+    # отдельный процесс `flask run-scheduler`
+    mode = app.config['SCHEDULER']
+    if mode == 'off':
+        return
+    if mode != 'thread':
+        raise ValueError(f'Неизвестный SCHEDULER: {mode}')
+    scheduler = app.extensions['scheduler'] = Scheduler(app)
+    app.before_request(scheduler.ensure_started)
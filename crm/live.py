@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time as time_module
+from flask import Blueprint, Response, current_app, jsonify, request
+from crm.auth import login_required
+from crm.sessions import redis_client
+from crm.sync import sync_versions
+
+bp = Blueprint('live', __name__)
+logger = logging.getLogger(__name__)
+
+
+# Изменения записей для открытых страниц (Server-Sent Events). Обработчики API публикуют
+# сообщение после COMMIT, брокер раздаёт его подпискам воркера; с Redis сообщение
+# проходит через канал и доходит до подписок всех воркеров.
+class Subscription:
+    def __init__(self, size, entities):
+        self.queue = queue.Queue(size)
+        self.entities = entities
+        self.overflowed = False
+
+
+class LocalBroker:
+    def __init__(self, queue_size):
+        self.queue_size = queue_size
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, entities=None):
+        subscription = Subscription(self.queue_size, entities)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+    def publish(self, entity, text):
+        self.fanout(entity, text)
+
+    def fanout(self, entity, text):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.entities and entity not in subscription.entities:
+                continue
+            try:
+                subscription.queue.put_nowait(text)
+            except queue.Full:
+                # Клиент не успевает читать: поток закрывается, страница обновится целиком
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+
+
+class RedisBroker(LocalBroker):
+    def __init__(self, client, queue_size, channel='crm:live'):
+        super().__init__(queue_size)
+        self.client = client
+        self.channel = channel
+        self._thread = None
+        self._pid = None
+
+    def subscribe(self, entities=None):
+        self._ensure_listening()
+        return super().subscribe(entities)
+
+    def publish(self, entity, text):
+        self.client.publish(self.channel, json.dumps([entity, text]))
+
+    def _ensure_listening(self):
+        # Слушатель канала запускается при первой подписке и заново после fork
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._listen, name='live-listener', daemon=True)
+                self._thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self.fanout(*json.loads(message['data']))
+            except Exception:
+                logger.exception('Канал обновлений Redis недоступен, переподключение')
+                time_module.sleep(1)
+
+
+def publish_change(entity, action, obj_id=None, version=None, item=None, **extra):
+    broker = current_app.extensions.get('live')
+    if broker is None:
+        return
+    data = current_app.json.dumps({'entity': entity, 'action': action, 'id': obj_id, 'item': item, **extra})
+    # id события — номер изменения из /api/sync: по Last-Event-ID видно, пропустил ли клиент изменения
+    text = (f'id: {version}\n' if version else '') + f'event: change\ndata: {data}\n\n'
+    broker.publish(entity, text)
+
+
+def event_stream(broker, subscription, keepalive, resync):
+    try:
+        yield 'retry: 5000\n\n'
+        if resync:
+            yield 'event: resync\ndata: {}\n\n'
+        while True:
+            if subscription.overflowed:
+                yield 'event: resync\ndata: {}\n\n'
+                return
+            try:
+                yield subscription.queue.get(timeout=keepalive)
+            except queue.Empty:
+                # Комментарий не даёт прокси закрыть простаивающее соединение
+                yield ': keepalive\n\n'
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@bp.route('/api/live')
+@login_required
+def live_stream():
+    broker = current_app.extensions['live']
+    if broker.count() >= current_app.config['LIVE_MAX_STREAMS']:
+        response = jsonify({'error': 'Слишком много подключений'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+
+    entities = {name for name in request.args.get('entities', '').split(',') if name}
+    # После переподключения браузер присылает id последнего события; если с тех пор были
+    # изменения, клиент обновляет страницу, а не ждёт только новые сообщения
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    resync = last_event_id is not None and last_event_id < sync_versions()[0]
+    subscription = broker.subscribe(entities)
+    response = Response(event_stream(broker, subscription, current_app.config['LIVE_KEEPALIVE'], resync),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def init_live(app):
+    # LIVE_BACKEND: local — подписки одного воркера, redis — общий канал (LIVE_REDIS_URL), off — выключено
+    backend = app.config['LIVE_BACKEND']
+    if backend == 'off':
+        return
+    if backend == 'local' or (backend == 'redis' and not app.config['LIVE_REDIS_URL']):
+        broker = LocalBroker(app.config['LIVE_QUEUE_SIZE'])
+    elif backend == 'redis':
+        broker = RedisBroker(redis_client(app.config['LIVE_REDIS_URL']), app.config['LIVE_QUEUE_SIZE'])
+    else:
+        raise ValueError(f'Неизвестный LIVE_BACKEND: {backend}')
+    app.extensions['live'] = broker
+    app.register_blueprint(bp)
@@ -0,0 +1,238 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time as time_module
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, abort, current_app, send_file
+from crm.auth import login_required
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+bp = Blueprint('media', __name__)
+logger = logging.getLogger(__name__)
+
+# Фото контактов хранятся по содержимому: ключ — sha256 файла (ab/abcdef....jpg), поэтому
+# одинаковые файлы лежат на диске один раз, а адрес файла никогда не меняет содержимое
+# и кэшируется браузером без перепроверки.
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+PHOTO_KEY = re.compile(r'^[0-9a-f]{2}/([0-9a-f]{64})\.(jpg|png|gif|webp)$')
+CHUNK_SIZE = 64 * 1024
+
+
+class PhotoRejected(ValueError):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def image_extension(head):
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def media_path(*parts):
+    return os.path.join(current_app.config['MEDIA_ROOT'], *parts)
+
+
+def photo_path(key):
+    return media_path('photos', key)
+
+
+def thumbnail_path(key, size):
+    return media_path('thumbs', str(size), os.path.splitext(key)[0] + '.jpg')
+
+
+def store_photo(stream, max_size):
+    # Файл читается кусками во временный файл рядом с хранилищем, хэш считается по ходу;
+    # в хранилище он переносится атомарно, а если такой уже есть — удаляется
+    tmp_dir = media_path('tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    head = b''
+    with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+        try:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise PhotoRejected(f'Файл больше {max_size // (1024 * 1024)} МБ', 413)
+                if len(head) < 12:
+                    head += chunk[:12]
+                digest.update(chunk)
+                tmp.write(chunk)
+            extension = image_extension(head)
+            if extension is None:
+                raise PhotoRejected('Поддерживаются JPEG, PNG, GIF и WebP', 415)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+
+    key = f'{digest.hexdigest()[:2]}/{digest.hexdigest()}.{extension}'
+    path = photo_path(key)
+    if os.path.exists(path):
+        os.unlink(tmp.name)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp.name, path)
+    return key
+
+
+def make_thumbnail(source, target, size):
+    # Квадрат size x size по центру. draft() просит у JPEG-декодера уменьшенное изображение,
+    # поэтому большой снимок не раскодируется целиком
+    with Image.open(source) as image:
+        image.draft('RGB', (size * 2, size * 2))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+    thumbnail.save(tmp, 'JPEG', quality=85, optimize=True, progressive=True)
+    os.replace(tmp, target)
+    return target
+
+
+# Миниатюры строятся в пуле потоков воркера: Pillow отпускает GIL при декодировании
+# и масштабировании, поэтому потоки не тормозят обработку запросов
+class ThumbnailPool:
+    def __init__(self, app):
+        self.workers = app.config['PHOTO_WORKERS']
+        self.sizes = app.config['PHOTO_THUMB_SIZES']
+        self._executor = None
+        self._pid = None
+        self._pending = {}
+        # RLock: колбэк уже завершённой задачи вызывается сразу, внутри submit
+        self._lock = threading.RLock()
+
+    def _ensure_started(self):
+        # Пул создаётся при первой задаче и заново после fork (gunicorn --preload)
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='thumbnails')
+            self._pending = {}
+            self._pid = os.getpid()
+
+    def submit(self, key, size):
+        # Одна задача на миниатюру: одновременные запросы ждут ту же самую
+        source, target = photo_path(key), thumbnail_path(key, size)
+        with self._lock:
+            self._ensure_started()
+            future = self._pending.get(target)
+            if future is None:
+                future = self._pending[target] = self._executor.submit(make_thumbnail, source, target, size)
+                future.add_done_callback(lambda _: self._forget(target))
+        return future
+
+    def _forget(self, target):
+        with self._lock:
+            self._pending.pop(target, None)
+
+    def submit_all(self, key):
+        for size in self.sizes:
+            self.submit(key, size).add_done_callback(self._log_error)
+
+    @staticmethod
+    def _log_error(future):
+        if future.exception() is not None:
+            logger.error('Не удалось построить миниатюру', exc_info=future.exception())
+
+
+def generate_thumbnails(key):
+    pool = current_app.extensions.get('thumbnails')
+    if pool is not None:
+        pool.submit_all(key)
+
+
+def send_media(path, etag):
+    # Адрес определяет содержимое: год в кэше без перепроверки (immutable); ETag и Range
+    # обрабатывает send_file (conditional=True)
+    response = send_file(path, conditional=True, etag=etag, max_age=current_app.config['MEDIA_MAX_AGE'])
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.immutable = True
+    return response
+
+
+@bp.route('/media/photos/<path:key>')
+@login_required
+def photo(key):
+    match = PHOTO_KEY.match(key)
+    if match is None or not os.path.isfile(photo_path(key)):
+        abort(404)
+    return send_media(photo_path(key), match.group(1))
+
+
+@bp.route('/media/thumbs/<int:size>/<path:key>')
+@login_required
+def thumbnail(size, key):
+    match = PHOTO_KEY.match(key)
+    if match is None or size not in current_app.config['PHOTO_THUMB_SIZES'] or not os.path.isfile(photo_path(key)):
+        abort(404)
+    pool = current_app.extensions.get('thumbnails')
+    if pool is None:
+        # Без Pillow миниатюр нет, отдаётся исходный файл
+        return send_media(photo_path(key), match.group(1))
+    path = thumbnail_path(key, size)
+    if not os.path.isfile(path):
+        # Миниатюра ещё строится или потерялась (перезапуск до конца задачи): ждём её
+        try:
+            pool.submit(key, size).result(timeout=current_app.config['PHOTO_THUMB_TIMEOUT'])
+        except Exception:
+            logger.exception('Миниатюра %s недоступна, отдаётся исходное фото', key)
+            return send_media(photo_path(key), match.group(1))
+    return send_media(path, f'{match.group(1)}-{size}')
+
+
+def purge_unreferenced(referenced, min_age):
+    # Одно фото может принадлежать нескольким контактам, поэтому файлы не удаляются вместе
+    # с контактом; сборщик удаляет фото без ссылок (и их миниатюры) старше min_age секунд,
+    # чтобы не задеть только что загруженные, а также брошенные временные файлы
+    root = media_path('photos')
+    cutoff = time_module.time() - min_age
+    removed = 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            key = os.path.relpath(path, root).replace(os.sep, '/')
+            if key in referenced or os.path.getmtime(path) > cutoff:
+                continue
+            os.unlink(path)
+            removed += 1
+            for size in current_app.config['PHOTO_THUMB_SIZES']:
+                if os.path.exists(thumbnail_path(key, size)):
+                    os.unlink(thumbnail_path(key, size))
+    tmp_dir = media_path('tmp')
+    if os.path.isdir(tmp_dir):
+        for name in os.listdir(tmp_dir):
+            path = os.path.join(tmp_dir, name)
+            if os.path.getmtime(path) <= cutoff:
+                os.unlink(path)
+    return removed
+
+
+def init_media(app):
+    # Миниатюры строятся, если установлен Pillow (requirements.txt); без него списки
+    # показывают исходные фото, и об этом предупреждает журнал при запуске
+    if Image is not None:
+        app.extensions['thumbnails'] = ThumbnailPool(app)
+    else:
+        logger.warning('Pillow не установлен: миниатюры фото контактов не строятся, '
+                       'списки загружают исходные файлы (pip install Pillow)')
+    app.register_blueprint(bp)
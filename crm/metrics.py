@@ -0,0 +1,280 @@
+import os
+import sys
+import threading
+import time as time_module
+from collections import Counter, defaultdict
+from datetime import datetime
+from flask import Blueprint, Response, abort, current_app, g, has_request_context, request, template_rendered, \
+    before_render_template
+from flask.json.provider import JSONProvider
+from sqlalchemy import event
+from crm.extensions import db
+
+bp = Blueprint('metrics', __name__)
+
+# Границы гистограммы длительности запросов, секунды
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+# Метрики воркера в формате Prometheus. Счётчики живут в памяти процесса,
+# поэтому при нескольких воркерах каждый отдаёт свои значения.
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter()
+        self.duration_buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self.duration_sum = Counter()
+        self.duration_count = Counter()
+        self.sql_statements = Counter()
+        self.sql_seconds = Counter()
+        self.template_seconds = Counter()
+        self.serialize_seconds = Counter()
+
+    def observe(self, endpoint, method, status, timing):
+        with self._lock:
+            self.requests[(endpoint, method, status)] += 1
+            buckets = self.duration_buckets[endpoint]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if timing['total'] <= bound:
+                    buckets[i] += 1
+            self.duration_sum[endpoint] += timing['total']
+            self.duration_count[endpoint] += 1
+            self.sql_statements[endpoint] += timing['sql_count']
+            self.sql_seconds[endpoint] += timing['sql']
+            self.template_seconds[endpoint] += timing['template']
+            self.serialize_seconds[endpoint] += timing['serialize']
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines += ['# HELP crm_http_requests_total Обработанные запросы.',
+                      '# TYPE crm_http_requests_total counter']
+            for (endpoint, method, status), value in sorted(self.requests.items()):
+                lines.append(f'crm_http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} '
+                             f'{value}')
+
+            lines += ['# HELP crm_http_request_duration_seconds Время обработки запроса.',
+                      '# TYPE crm_http_request_duration_seconds histogram']
+            for endpoint in sorted(self.duration_count):
+                for bound, value in zip(DURATION_BUCKETS, self.duration_buckets[endpoint]):
+                    lines.append(f'crm_http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} '
+                                 f'{value}')
+                lines.append(f'crm_http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} '
+                             f'{self.duration_count[endpoint]}')
+                lines.append(f'crm_http_request_duration_seconds_sum{{endpoint="{endpoint}"}} '
+                             f'{self.duration_sum[endpoint]:.6f}')
+                lines.append(f'crm_http_request_duration_seconds_count{{endpoint="{endpoint}"}} '
+                             f'{self.duration_count[endpoint]}')
+
+            for name, help_text, values in (
+                ('crm_sql_statements_total', 'SQL-запросы, выполненные при обработке.', self.sql_statements),
+                ('crm_sql_seconds_total', 'Время выполнения SQL.', self.sql_seconds),
+                ('crm_template_render_seconds_total', 'Время рендеринга шаблонов.', self.template_seconds),
+                ('crm_serialization_seconds_total', 'Время сериализации JSON.', self.serialize_seconds),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for endpoint, value in sorted(values.items()):
+                    lines.append(f'{name}{{endpoint="{endpoint}"}} {value:.6f}'
+                                 if isinstance(value, float) else f'{name}{{endpoint="{endpoint}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def request_timing():
+    if has_request_context():
+        return g.get('timing')
+    return None
+
+
+# SQL считается по событиям движка: время между before и after cursor_execute
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if request_timing() is not None:
+        conn.info['query_started'] = time_module.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timing = request_timing()
+    started = conn.info.pop('query_started', None)
+    if timing is not None and started is not None:
+        timing['sql_count'] += 1
+        timing['sql'] += time_module.perf_counter() - started
+
+
+def on_before_render_template(sender, template, context, **extra):
+    timing = request_timing()
+    if timing is not None:
+        timing['template_started'] = time_module.perf_counter()
+
+
+def on_template_rendered(sender, template, context, **extra):
+    timing = request_timing()
+    if timing is not None and 'template_started' in timing:
+        timing['template'] += time_module.perf_counter() - timing.pop('template_started')
+
+
+# Оборачивает провайдер JSON приложения (стандартный или orjson) и засекает время сериализации
+class TimedJSONProvider(JSONProvider):
+    def __init__(self, app, inner):
+        super().__init__(app)
+        self.inner = inner
+
+    def _timed(self, func, *args, **kwargs):
+        timing = request_timing()
+        if timing is None:
+            return func(*args, **kwargs)
+        started = time_module.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timing['serialize'] += time_module.perf_counter() - started
+
+    def dumps(self, obj, **kwargs):
+        return self._timed(self.inner.dumps, obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return self.inner.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        return self._timed(self.inner.response, *args, **kwargs)
+
+
+# Сэмплирующий профилировщик: один фоновый поток раз в PROFILE_INTERVAL снимает стек
+# каждого потока, обрабатывающего запрос. Для медленных запросов стеки сохраняются
+# в формате folded (flamegraph.pl, speedscope) в PROFILE_DIR.
+class SamplingProfiler:
+    def __init__(self, interval):
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._active = {}
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+                self._thread.start()
+            samples = Counter()
+            self._active[threading.get_ident()] = samples
+        return samples
+
+    def stop(self):
+        with self._lock:
+            return self._active.pop(threading.get_ident(), Counter())
+
+    def _run(self):
+        while True:
+            time_module.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            stacks = [(thread_id, samples, folded_stack(frames[thread_id]))
+                      for thread_id, samples in active if thread_id in frames]
+            # Стек снимается без блокировки, а счётчик меняется под ней и только пока запрос
+            # активен: после stop() его читает поток запроса (dump_profile) без гонки
+            with self._lock:
+                for thread_id, samples, stack in stacks:
+                    if self._active.get(thread_id) is samples:
+                        samples[stack] += 1
+
+
+def folded_stack(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+def dump_profile(app, endpoint, duration, samples):
+    directory = app.config['PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    name = f"{datetime.utcnow():%Y%m%d-%H%M%S-%f}-{endpoint}-{duration * 1000:.0f}ms.folded"
+    with open(os.path.join(directory, name), 'w') as f:
+        for stack, count in samples.most_common():
+            f.write(f'{stack} {count}\n')
+
+
+def start_request_timing():
+    g.timing = {'started': time_module.perf_counter(), 'sql_count': 0, 'sql': 0.0, 'template': 0.0,
+                'serialize': 0.0}
+    profiler = current_app.extensions.get('profiler')
+    if profiler is not None:
+        g.timing['samples'] = profiler.start()
+
+
+def finish_request_timing(response):
+    timing = g.get('timing')
+    if timing is None:
+        return response
+    app = current_app._get_current_object()
+    endpoint = request.endpoint or 'unknown'
+    method = request.method
+    if response.is_streamed:
+        # Тело потоковой выгрузки (stream_with_context) формируется уже после after_request:
+        # запрос учитывается, когда поток закрыт, вместе с сериализацией строк. Заголовки к
+        # этому времени отправлены, поэтому Server-Timing у таких ответов нет
+        response.call_on_close(lambda: record_request_timing(app, endpoint, method, response.status_code, timing))
+        return response
+
+    g.pop('timing')
+    profiler = app.extensions.get('profiler')
+    if profiler is not None:
+        profiler.stop()
+    record_request_timing(app, endpoint, method, response.status_code, timing)
+    response.headers['Server-Timing'] = ', '.join((
+        f'db;dur={timing["sql"] * 1000:.2f};desc="{timing["sql_count"]} SQL"',
+        f'tpl;dur={timing["template"] * 1000:.2f}',
+        f'json;dur={timing["serialize"] * 1000:.2f}',
+        f'total;dur={timing["total"] * 1000:.2f}',
+    ))
+    return response
+
+
+def record_request_timing(app, endpoint, method, status, timing):
+    timing['total'] = time_module.perf_counter() - timing['started']
+    app.extensions['metrics'].observe(endpoint, method, status, timing)
+    # Сэмплы передаются сюда после profiler.stop(): поток профилировщика их больше не меняет
+    samples = timing.get('samples')
+    if samples and timing['total'] * 1000 >= app.config['PROFILE_SLOW_REQUESTS_MS']:
+        dump_profile(app, endpoint, timing['total'], samples)
+
+
+def stop_profiler_sampling(exc):
+    profiler = current_app.extensions.get('profiler')
+    if profiler is not None:
+        profiler.stop()
+
+
+@bp.route('/metrics')
+def metrics():
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        abort(403)
+    return Response(current_app.extensions['metrics'].render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_metrics(app):
+    # Инструментирование включается METRICS_ENABLED; без него обработка запросов не меняется
+    if not app.config['METRICS_ENABLED']:
+        return
+    if app.config['METRICS_REQUIRE_TOKEN'] and not app.config['METRICS_TOKEN']:
+        raise ValueError('METRICS_ENABLED=1 в этом профиле требует METRICS_TOKEN')
+    app.extensions['metrics'] = MetricsRegistry()
+    if app.config['PROFILE_SLOW_REQUESTS_MS']:
+        app.extensions['profiler'] = SamplingProfiler(app.config['PROFILE_INTERVAL'])
+
+    app.json = TimedJSONProvider(app, app.json)
+    app.before_request(start_request_timing)
+    app.after_request(finish_request_timing)
+    app.teardown_request(stop_profiler_sampling)
+    before_render_template.connect(on_before_render_template, app)
+    template_rendered.connect(on_template_rendered, app)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', after_cursor_execute)
+    app.register_blueprint(bp)
@@ -0,0 +1,649 @@
+from datetime import datetime
+from functools import lru_cache
+from flask import current_app
+from sqlalchemy import DDL, column, event, table
+from werkzeug.security import generate_password_hash
+from crm.extensions import db
+from crm.recurrence import iter_recurrence, parse_rrule, validate_rrule
+
+
+# Производные поля контактов кэшируются: у многих контактов совпадают город, улица и ФИО,
+# а строка собирается для каждой строки списка и выгрузки
+@lru_cache(maxsize=65536)
+def format_address(index, country, region, city, street, house, apartment):
+    address_parts = []
+    if index:
+        address_parts.append(index)
+    if country:
+        address_parts.append(country)
+    if region:
+        address_parts.append(region)
+    if city:
+        address_parts.append(f"г. {city}")
+    if street:
+        address_parts.append(f"ул. {street}")
+    if house:
+        address_parts.append(f"д. {house}")
+    if apartment:
+        address_parts.append(f"кв. {apartment}")
+    return ", ".join(address_parts) if address_parts else "Адрес не указан"
+
+
+@lru_cache(maxsize=65536)
+def format_full_name(last_name, first_name, middle_name):
+    return " ".join(part for part in (last_name, first_name, middle_name) if part)
+
+
+# Модели БД
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def set_password(self, password):
+        self.password_hash = generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
+
+
+class SessionRecord(db.Model):
+    # Серверная сессия: user_id хранится отдельно, чтобы отзывать все входы пользователя
+    sid = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, index=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class TableVersion(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class SyncTombstone(db.Model):
+    # Удалённая строка для /api/sync: номер изменения берётся из той же последовательности, что row_version
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    entity = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class Job(db.Model):
+    # Задача фонового планировщика (crm/jobs.py). Периодические задачи имеют interval и после
+    # выполнения переносят run_at; разовые отмечаются finished_at. Исполнитель берёт задачу
+    # в аренду до locked_until: если процесс упал, после аренды задачу возьмёт другой.
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    handler = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text)  # JSON: аргументы разовой задачи или состояние периодической
+    interval = db.Column(db.Integer)
+    run_at = db.Column(db.DateTime, nullable=False, index=True)
+    locked_by = db.Column(db.String(100))
+    locked_until = db.Column(db.DateTime)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_run_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    finished_at = db.Column(db.DateTime)
+
+
+class Notification(db.Model):
+    # Уведомление о записи (просроченная задача, скорое событие). Источник с моментом due_at
+    # уникален, поэтому повторный проход планировщика не создаёт дубликатов
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'entity', 'row_id', 'due_at', name='uq_notification_source'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)  # task_overdue, event_reminder
+    entity = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    due_at = db.Column(db.DateTime, nullable=False)
+    message = db.Column(db.String(300), nullable=False)
+    user_id = db.Column(db.Integer, index=True)  # NULL — для всех пользователей
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    read_at = db.Column(db.DateTime, index=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'entity': self.entity,
+            'row_id': self.row_id,
+            'due_at': self.due_at.isoformat(),
+            'message': self.message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'read_at': self.read_at.isoformat() if self.read_at else None
+        }
+
+
+class Task(db.Model):
+    # Индексы под фильтры и сортировку страницы задач
+    __table_args__ = (
+        db.Index('ix_task_status_due_date', 'status', 'due_date'),
+        db.Index('ix_task_priority_due_date', 'priority', 'due_date'),
+        db.Index('ix_task_status_priority_due_date', 'status', 'priority', 'due_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    priority = db.Column(db.String(20), default='medium')  # low, medium, high, urgent
+    status = db.Column(db.String(20), default='pending')  # pending, in_progress, completed, cancelled
+    due_date = db.Column(db.DateTime, index=True)
+    completed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Номер последнего изменения строки для /api/sync (общий для всех таблиц, см. crm/sync.py)
+    row_version = db.Column(db.Integer, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    user = db.relationship('User', backref=db.backref('tasks', lazy=True))
+
+    # Поля, которые можно запросить через ?fields=
+    api_fields = ('id', 'title', 'description', 'priority', 'status', 'due_date', 'completed_at', 'created_at',
+                  'updated_at')
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            title=data['title'],
+            description=data.get('description', ''),
+            priority=data.get('priority', 'medium'),
+            due_date=datetime.fromisoformat(data['due_date']) if data.get('due_date') else None
+        )
+
+    def update_from_dict(self, data):
+        self.title = data.get('title', self.title)
+        self.description = data.get('description', self.description)
+        self.priority = data.get('priority', self.priority)
+        self.status = data.get('status', self.status)
+
+        if data.get('due_date'):
+            self.due_date = datetime.fromisoformat(data['due_date'])
+
+        if data.get('status') == 'completed' and self.status != 'completed':
+            self.completed_at = datetime.utcnow()
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'priority': self.priority,
+            'status': self.status,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class CalendarEvent(db.Model):
+    # Пересечение с окном календаря: диапазон по start_time, end_time проверяется по тому же индексу
+    __table_args__ = (
+        db.Index('ix_calendar_event_start_end', 'start_time', 'end_time'),
+        # Переходы статусов и напоминания планировщика выбирают события по статусу и началу
+        db.Index('ix_calendar_event_status_start', 'status', 'start_time'),
+        # Серий немного, частичный индекс позволяет выбрать их, не сканируя все события
+        db.Index('ix_calendar_event_series', 'start_time',
+                 sqlite_where=db.text('recurrence_rule IS NOT NULL'),
+                 postgresql_where=db.text('recurrence_rule IS NOT NULL')),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    event_type = db.Column(db.String(20), default='meeting')  # meeting, call, task, reminder
+    location = db.Column(db.String(200))
+    status = db.Column(db.String(20), default='scheduled')  # scheduled, in_progress, completed, cancelled
+    # Повторение: правило RRULE, конец последнего повторения (NULL — без конца)
+    # и исключённые повторения (даты начала в ISO через запятую)
+    recurrence_rule = db.Column(db.String(200))
+    recurrence_until = db.Column(db.DateTime)
+    recurrence_exdates = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    row_version = db.Column(db.Integer, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    user = db.relationship('User', backref=db.backref('events', lazy=True))
+
+    api_fields = ('id', 'title', 'description', 'start', 'end', 'type', 'location', 'status', 'rrule', 'exdates',
+                  'updated_at')
+    # Поля API, названия которых отличаются от колонок
+    api_columns = {'start': 'start_time', 'end': 'end_time', 'type': 'event_type', 'rrule': 'recurrence_rule'}
+    api_computed = {
+        'exdates': (('recurrence_exdates',), lambda value: value.split(',') if value else [])
+    }
+
+    @classmethod
+    def from_dict(cls, data):
+        event = cls(
+            title=data['title'],
+            description=data.get('description', ''),
+            start_time=datetime.fromisoformat(data['start']),
+            end_time=datetime.fromisoformat(data['end']),
+            event_type=data.get('type', 'meeting'),
+            location=data.get('location', '')
+        )
+        event.set_recurrence(data.get('rrule'), data.get('exdates'))
+        return event
+
+    def update_from_dict(self, data):
+        self.title = data.get('title', self.title)
+        self.description = data.get('description', self.description)
+        self.start_time = datetime.fromisoformat(data['start'])
+        self.end_time = datetime.fromisoformat(data['end'])
+        self.event_type = data.get('type', self.event_type)
+        self.location = data.get('location', self.location)
+        self.status = data.get('status', self.status)
+        self.set_recurrence(data.get('rrule', self.recurrence_rule),
+                            data.get('exdates', self.get_exdates()))
+
+    def set_recurrence(self, rule, exdates=None):
+        self.recurrence_rule = rule or None
+        exdates = sorted({datetime.fromisoformat(value) if isinstance(value, str) else value
+                          for value in exdates or []})
+        self.recurrence_exdates = ','.join(value.isoformat() for value in exdates) or None
+        self.recurrence_until = None
+        if self.recurrence_rule:
+            parsed = validate_rrule(self.recurrence_rule)
+            if parsed['until'] is not None:
+                self.recurrence_until = parsed['until'] + (self.end_time - self.start_time)
+            elif parsed['count'] is not None:
+                last = None
+                for last in iter_recurrence(self.start_time, parsed):
+                    pass
+                self.recurrence_until = (last or self.start_time) + (self.end_time - self.start_time)
+
+    def get_exdates(self):
+        return [datetime.fromisoformat(value) for value in self.recurrence_exdates.split(',')] \
+            if self.recurrence_exdates else []
+
+    def occurrences(self, window_start, window_end):
+        # Ленивая развёртка серии только внутри окна [window_start, window_end)
+        duration = self.end_time - self.start_time
+        excluded = set(self.get_exdates())
+        for start in iter_recurrence(self.start_time, parse_rrule(self.recurrence_rule), window_start - duration):
+            if start >= window_end:
+                break
+            if start + duration > window_start and start not in excluded:
+                yield EventOccurrence(self, start)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'start': self.start_time.isoformat(),
+            'end': self.end_time.isoformat(),
+            'type': self.event_type,
+            'location': self.location,
+            'status': self.status,
+            'rrule': self.recurrence_rule,
+            'exdates': self.recurrence_exdates.split(',') if self.recurrence_exdates else [],
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class EventOccurrence:
+    # Одно повторение серии: время своё, остальные атрибуты берутся из серии
+    def __init__(self, series, start_time):
+        self.series = series
+        self.start_time = start_time
+        self.end_time = start_time + (series.end_time - series.start_time)
+
+    def __getattr__(self, name):
+        return getattr(self.series, name)
+
+    def to_dict(self):
+        data = self.series.to_dict()
+        data['start'] = self.start_time.isoformat()
+        data['end'] = self.end_time.isoformat()
+        data['occurrence'] = True
+        return data
+
+
+class Contact(db.Model):
+    __table_args__ = (
+        db.Index('ix_contact_category_last_name', 'category', 'last_name'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Основная информация
+    first_name = db.Column(db.String(50), nullable=False)
+    last_name = db.Column(db.String(50), nullable=False, index=True)
+    middle_name = db.Column(db.String(50))
+    phone = db.Column(db.String(20))
+    email = db.Column(db.String(120))
+    photo = db.Column(db.String(200))  # путь к фото
+
+    # Паспортные данные
+    passport_series = db.Column(db.String(4))
+    passport_number = db.Column(db.String(6))
+    passport_issued_by = db.Column(db.String(200))
+    passport_issue_date = db.Column(db.Date)
+    passport_department_code = db.Column(db.String(7))
+
+    # Адрес
+    address_index = db.Column(db.String(10))
+    address_country = db.Column(db.String(50))
+    address_region = db.Column(db.String(50))
+    address_city = db.Column(db.String(50))
+    address_street = db.Column(db.String(100))
+    address_house = db.Column(db.String(10))
+    address_apartment = db.Column(db.String(10))
+
+    # Дополнительная информация
+    company = db.Column(db.String(100))
+    position = db.Column(db.String(100))
+    birth_date = db.Column(db.Date)
+    category = db.Column(db.String(20), default='client')  # client, partner, supplier, etc.
+
+    # Социальные сети
+    social_telegram = db.Column(db.String(100))
+    social_whatsapp = db.Column(db.String(100))
+    social_vk = db.Column(db.String(100))
+
+    # Заметки
+    notes = db.Column(db.Text)
+
+    # Системные поля
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    row_version = db.Column(db.Integer, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    user = db.relationship('User', backref=db.backref('contacts', lazy=True))
+
+    api_fields = ('id', 'first_name', 'last_name', 'middle_name', 'phone', 'email', 'photo',
+                  'passport_series', 'passport_number', 'passport_issued_by', 'passport_issue_date',
+                  'passport_department_code', 'full_name', 'full_address', 'company', 'position', 'birth_date',
+                  'category', 'social_telegram', 'social_whatsapp', 'social_vk', 'notes',
+                  'created_at', 'updated_at')
+    # Вычисляемые поля: колонки, из которых они собираются, и функция сборки
+    api_computed = {
+        'full_name': (('last_name', 'first_name', 'middle_name'), format_full_name),
+        'full_address': (('address_index', 'address_country', 'address_region', 'address_city',
+                          'address_street', 'address_house', 'address_apartment'),
+                         format_address)
+    }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            first_name=data['first_name'],
+            last_name=data['last_name'],
+            middle_name=data.get('middle_name', ''),
+            phone=data.get('phone', ''),
+            email=data.get('email', ''),
+            passport_series=data.get('passport_series', ''),
+            passport_number=data.get('passport_number', ''),
+            passport_issued_by=data.get('passport_issued_by', ''),
+            passport_issue_date=datetime.fromisoformat(data['passport_issue_date']) if data.get(
+                'passport_issue_date') else None,
+            passport_department_code=data.get('passport_department_code', ''),
+            address_index=data.get('address_index', ''),
+            address_country=data.get('address_country', ''),
+            address_region=data.get('address_region', ''),
+            address_city=data.get('address_city', ''),
+            address_street=data.get('address_street', ''),
+            address_house=data.get('address_house', ''),
+            address_apartment=data.get('address_apartment', ''),
+            company=data.get('company', ''),
+            position=data.get('position', ''),
+            birth_date=datetime.fromisoformat(data['birth_date']) if data.get('birth_date') else None,
+            category=data.get('category', 'client'),
+            social_telegram=data.get('social_telegram', ''),
+            social_whatsapp=data.get('social_whatsapp', ''),
+            social_vk=data.get('social_vk', ''),
+            notes=data.get('notes', '')
+        )
+
+    def update_from_dict(self, data):
+        self.first_name = data.get('first_name', self.first_name)
+        self.last_name = data.get('last_name', self.last_name)
+        self.middle_name = data.get('middle_name', self.middle_name)
+        self.phone = data.get('phone', self.phone)
+        self.email = data.get('email', self.email)
+        self.passport_series = data.get('passport_series', self.passport_series)
+        self.passport_number = data.get('passport_number', self.passport_number)
+        self.passport_issued_by = data.get('passport_issued_by', self.passport_issued_by)
+        self.passport_issue_date = datetime.fromisoformat(data['passport_issue_date']) if data.get(
+            'passport_issue_date') else self.passport_issue_date
+        self.passport_department_code = data.get('passport_department_code', self.passport_department_code)
+        self.address_index = data.get('address_index', self.address_index)
+        self.address_country = data.get('address_country', self.address_country)
+        self.address_region = data.get('address_region', self.address_region)
+        self.address_city = data.get('address_city', self.address_city)
+        self.address_street = data.get('address_street', self.address_street)
+        self.address_house = data.get('address_house', self.address_house)
+        self.address_apartment = data.get('address_apartment', self.address_apartment)
+        self.company = data.get('company', self.company)
+        self.position = data.get('position', self.position)
+        self.birth_date = datetime.fromisoformat(data['birth_date']) if data.get(
+            'birth_date') else self.birth_date
+        self.category = data.get('category', self.category)
+        self.social_telegram = data.get('social_telegram', self.social_telegram)
+        self.social_whatsapp = data.get('social_whatsapp', self.social_whatsapp)
+        self.social_vk = data.get('social_vk', self.social_vk)
+        self.notes = data.get('notes', self.notes)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'first_name': self.first_name,
+            'last_name': self.last_name,
+            'middle_name': self.middle_name,
+            'phone': self.phone,
+            'email': self.email,
+            'photo': self.photo,
+            'passport_series': self.passport_series,
+            'passport_number': self.passport_number,
+            'passport_issued_by': self.passport_issued_by,
+            'passport_issue_date': self.passport_issue_date.isoformat() if self.passport_issue_date else None,
+            'passport_department_code': self.passport_department_code,
+            'full_name': self.get_full_name(),
+            'full_address': self.get_full_address(),
+            'company': self.company,
+            'position': self.position,
+            'birth_date': self.birth_date.isoformat() if self.birth_date else None,
+            'category': self.category,
+            'social_telegram': self.social_telegram,
+            'social_whatsapp': self.social_whatsapp,
+            'social_vk': self.social_vk,
+            'notes': self.notes,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+    def get_full_address(self):
+        return format_address(self.address_index, self.address_country, self.address_region,
+                              self.address_city, self.address_street, self.address_house,
+                              self.address_apartment)
+
+    def get_full_name(self):
+        return format_full_name(self.last_name, self.first_name, self.middle_name)
+
+
+class Car(db.Model):
+    __table_args__ = (
+        db.Index('ix_car_brand_model', 'brand', 'model'),
+        db.Index('ix_car_status_brand_model', 'status', 'brand', 'model'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Основная информация
+    vin = db.Column(db.String(17), unique=True, nullable=False)
+    license_plate = db.Column(db.String(15), nullable=False)
+    brand = db.Column(db.String(50), nullable=False)
+    model = db.Column(db.String(50), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    color = db.Column(db.String(30))
+
+    # Технические характеристики
+    engine_type = db.Column(db.String(20))  # бензин, дизель, электро
+    engine_volume = db.Column(db.Float)  # литры
+    horsepower = db.Column(db.Integer)
+    transmission = db.Column(db.String(20))  # автомат, механика
+    mileage = db.Column(db.Integer)  # пробег в км
+
+    # Финансовая информация
+    purchase_price = db.Column(db.Float)
+    purchase_date = db.Column(db.Date)
+    sale_price = db.Column(db.Float)
+    sale_date = db.Column(db.Date)
+    current_value = db.Column(db.Float)
+
+    # Состояние и статус
+    status = db.Column(db.String(20), default='in_stock')  # in_stock, sold, in_service
+    condition = db.Column(db.String(20))  # новый, б/у, аварийный
+    description = db.Column(db.Text)
+
+    # Затраты на содержание
+    insurance_cost = db.Column(db.Float)
+    maintenance_cost = db.Column(db.Float)
+    fuel_cost = db.Column(db.Float)
+
+    # Системные поля
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    row_version = db.Column(db.Integer, index=True)
+
+    api_fields = ('id', 'vin', 'license_plate', 'brand', 'model', 'year', 'color', 'engine_type',
+                  'engine_volume', 'horsepower', 'transmission', 'mileage', 'purchase_price',
+                  'purchase_date', 'sale_price', 'sale_date', 'current_value', 'status', 'condition',
+                  'description', 'insurance_cost', 'maintenance_cost', 'fuel_cost',
+                  'created_at', 'updated_at')
+    # Массовая загрузка (/api/cars/bulk) сопоставляет автомобили по VIN
+    bulk_key = 'vin'
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            vin=data['vin'],
+            license_plate=data['license_plate'],
+            brand=data['brand'],
+            model=data['model'],
+            year=data['year'],
+            color=data.get('color'),
+            engine_type=data.get('engine_type'),
+            engine_volume=data.get('engine_volume'),
+            horsepower=data.get('horsepower'),
+            transmission=data.get('transmission'),
+            mileage=data.get('mileage', 0),
+            purchase_price=data.get('purchase_price'),
+            purchase_date=datetime.fromisoformat(data['purchase_date']) if data.get('purchase_date') else None,
+            sale_price=data.get('sale_price'),
+            sale_date=datetime.fromisoformat(data['sale_date']) if data.get('sale_date') else None,
+            current_value=data.get('current_value'),
+            status=data.get('status', 'in_stock'),
+            condition=data.get('condition'),
+            description=data.get('description'),
+            insurance_cost=data.get('insurance_cost'),
+            maintenance_cost=data.get('maintenance_cost'),
+            fuel_cost=data.get('fuel_cost')
+        )
+
+    def update_from_dict(self, data):
+        self.vin = data.get('vin', self.vin)
+        self.license_plate = data.get('license_plate', self.license_plate)
+        self.brand = data.get('brand', self.brand)
+        self.model = data.get('model', self.model)
+        self.year = data.get('year', self.year)
+        self.color = data.get('color', self.color)
+        self.engine_type = data.get('engine_type', self.engine_type)
+        self.engine_volume = data.get('engine_volume', self.engine_volume)
+        self.horsepower = data.get('horsepower', self.horsepower)
+        self.transmission = data.get('transmission', self.transmission)
+        self.mileage = data.get('mileage', self.mileage)
+        self.purchase_price = data.get('purchase_price', self.purchase_price)
+        self.purchase_date = datetime.fromisoformat(data['purchase_date']) if data.get(
+            'purchase_date') else self.purchase_date
+        self.sale_price = data.get('sale_price', self.sale_price)
+        self.sale_date = datetime.fromisoformat(data['sale_date']) if data.get('sale_date') else self.sale_date
+        self.current_value = data.get('current_value', self.current_value)
+        self.status = data.get('status', self.status)
+        self.condition = data.get('condition', self.condition)
+        self.description = data.get('description', self.description)
+        self.insurance_cost = data.get('insurance_cost', self.insurance_cost)
+        self.maintenance_cost = data.get('maintenance_cost', self.maintenance_cost)
+        self.fuel_cost = data.get('fuel_cost', self.fuel_cost)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'vin': self.vin,
+            'license_plate': self.license_plate,
+            'brand': self.brand,
+            'model': self.model,
+            'year': self.year,
+            'color': self.color,
+            'engine_type': self.engine_type,
+            'engine_volume': self.engine_volume,
+            'horsepower': self.horsepower,
+            'transmission': self.transmission,
+            'mileage': self.mileage,
+            'purchase_price': self.purchase_price,
+            'purchase_date': self.purchase_date.isoformat() if self.purchase_date else None,
+            'sale_price': self.sale_price,
+            'sale_date': self.sale_date.isoformat() if self.sale_date else None,
+            'current_value': self.current_value,
+            'status': self.status,
+            'condition': self.condition,
+            'description': self.description,
+            'insurance_cost': self.insurance_cost,
+            'maintenance_cost': self.maintenance_cost,
+            'fuel_cost': self.fuel_cost,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+
+# Полнотекстовый поиск контактов (SQLite FTS5).
+# Индекс contact_fts (rowid = contact.id) поддерживается триггерами, поэтому синхронен
+# при любых изменениях, включая массовые. «ё» приводится к «е», регистр складывает unicode61.
+# Телефон хранится цифрами и без кода страны, чтобы искать по префиксу номера.
+def _fts_fold(expr):
+    return f"replace(replace(coalesce({expr}, ''), 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _fts_phone(expr):
+    digits = f"coalesce({expr}, '')"
+    for char in (' ', '-', '(', ')', '+', '.'):
+        digits = f"replace({digits}, '{char}', '')"
+    return f"CASE WHEN substr({digits}, 1, 1) IN ('7', '8') THEN {digits} || ' ' || substr({digits}, 2) ELSE {digits} END"
+
+
+def _fts_values(row):
+    name = f"{row}.last_name || ' ' || {row}.first_name || ' ' || coalesce({row}.middle_name, '')"
+    return (f"{row}.id, {_fts_fold(name)}, {_fts_phone(f'{row}.phone')}, {row}.email, "
+            f"{_fts_fold(f'{row}.company')}, {_fts_fold(f'{row}.notes')}")
+
+
+CONTACT_FTS_COLUMNS = 'rowid, name, phone, email, company, notes'
+CONTACT_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS contact_fts USING fts5("
+    "name, phone, email, company, notes, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS contact_fts_ai AFTER INSERT ON contact BEGIN "
+    f"INSERT INTO contact_fts({CONTACT_FTS_COLUMNS}) VALUES ({_fts_values('new')}); END",
+    f"CREATE TRIGGER IF NOT EXISTS contact_fts_au AFTER UPDATE OF "
+    f"last_name, first_name, middle_name, phone, email, company, notes ON contact BEGIN "
+    f"DELETE FROM contact_fts WHERE rowid = old.id; "
+    f"INSERT INTO contact_fts({CONTACT_FTS_COLUMNS}) VALUES ({_fts_values('new')}); END",
+    "CREATE TRIGGER IF NOT EXISTS contact_fts_ad AFTER DELETE ON contact BEGIN "
+    "DELETE FROM contact_fts WHERE rowid = old.id; END",
+]
+CONTACT_FTS_REBUILD = [
+    "DELETE FROM contact_fts",
+    f"INSERT INTO contact_fts({CONTACT_FTS_COLUMNS}) SELECT {_fts_values('contact')} FROM contact",
+]
+
+for statement in CONTACT_FTS_DDL:
+    event.listen(Contact.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+contact_fts = table('contact_fts', column('rowid'), column('rank'))
+
+# Индекс по длительности события: самое длинное событие находится без прохода по таблице
+EVENT_DURATION_SQL = 'julianday(end_time) - julianday(start_time)'
+EVENT_DURATION_DDL = (f'CREATE INDEX IF NOT EXISTS ix_calendar_event_duration '
+                      f'ON calendar_event ({EVENT_DURATION_SQL})')
+event.listen(CalendarEvent.__table__, 'after_create', DDL(EVENT_DURATION_DDL).execute_if(dialect='sqlite'))
@@ -0,0 +1,55 @@
+from datetime import datetime
+from flask import Blueprint, g, jsonify, request
+from crm.auth import login_required
+from crm.extensions import db
+from crm.models import Notification
+
+bp = Blueprint('notifications', __name__)
+
+
+def queue_notifications(kind, entity, items):
+    # items — (row_id, due_at, user_id, message). Уже созданные для того же источника и
+    # момента пропускаются; COMMIT делает вызывающий код
+    items = list(items)
+    if not items:
+        return 0
+    existing = set(db.session.query(Notification.row_id, Notification.due_at).filter(
+        Notification.kind == kind, Notification.entity == entity,
+        Notification.row_id.in_({row_id for row_id, _, _, _ in items})
+    ))
+    now = datetime.utcnow()
+    rows = [{'kind': kind, 'entity': entity, 'row_id': row_id, 'due_at': due_at, 'user_id': user_id,
+             'message': message[:300], 'created_at': now}
+            for row_id, due_at, user_id, message in items if (row_id, due_at) not in existing]
+    if rows:
+        db.session.execute(db.insert(Notification), rows)
+    return len(rows)
+
+
+def visible_notifications():
+    return Notification.query.filter(db.or_(Notification.user_id.is_(None), Notification.user_id == g.user['id']))
+
+
+@bp.route('/api/notifications')
+@login_required
+def api_notifications():
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    query = visible_notifications()
+    unread = query.filter(Notification.read_at.is_(None))
+    if request.args.get('unread') == '1':
+        query = unread
+    items = query.order_by(Notification.id.desc()).limit(limit)
+    return jsonify({'unread': unread.count(), 'items': [item.to_dict() for item in items]})
+
+
+@bp.route('/api/notifications/read', methods=['POST'])
+@login_required
+def api_notifications_read():
+    # {"ids": [...]} отмечает указанные уведомления, пустое тело — все непрочитанные
+    ids = (request.get_json(silent=True) or {}).get('ids')
+    query = visible_notifications().filter(Notification.read_at.is_(None))
+    if ids is not None:
+        query = query.filter(Notification.id.in_(ids))
+    updated = query.update({Notification.read_at: datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    return jsonify({'read': updated})
@@ -0,0 +1,92 @@
+import base64
+import json
+from datetime import date, datetime
+from flask import abort, current_app, request, url_for
+from crm.extensions import db
+
+
+# Постраничный вывод HTML-списков. Курсор — ключи сортировки последней показанной строки,
+# поэтому следующая страница читается по индексу с того же места, а не через OFFSET.
+# Для клиента курсор непрозрачен: base64 от JSON.
+def encode_cursor(values):
+    data = json.dumps([value.isoformat() if isinstance(value, (date, datetime)) else value for value in values])
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, keys):
+    values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    if not isinstance(values, list) or len(values) != len(keys) or \
+            any(isinstance(value, (list, dict)) for value in values):
+        raise ValueError('Некорректный курсор')
+    parsed = []
+    for key, value in zip(keys, values):
+        column_type = getattr(key, 'type', None)
+        if value is not None and isinstance(column_type, db.DateTime):
+            value = datetime.fromisoformat(value)
+        elif value is not None and isinstance(column_type, db.Date):
+            value = date.fromisoformat(value)
+        parsed.append(value)
+    return parsed
+
+
+def after_condition(keys, values):
+    # Строки после (values) в порядке ORDER BY keys; NULL идёт первым, как в SQLite
+    key, value = keys[0], values[0]
+    if len(keys) == 1:
+        return key > value if value is not None else key.isnot(None)
+    rest = after_condition(keys[1:], values[1:])
+    if value is None:
+        return db.or_(key.isnot(None), db.and_(key.is_(None), rest))
+    return db.or_(key > value, db.and_(key == value, rest))
+
+
+def keyset_query(query, keys, values, limit):
+    # Страница после курсора values (None — первая страница); проверяется в `flask check-query-plans`
+    query = query.order_by(None).order_by(*keys)
+    if values:
+        # Первый ключ дополнительно ограничен снизу, чтобы чтение индекса начиналось с курсора
+        bound = keys[0] >= values[0] if values[0] is not None else db.true()
+        query = query.filter(bound, after_condition(keys, values))
+    return query.limit(limit)
+
+
+def paginate(query, keys, cursor=None, per_page=None):
+    # keys — колонки сортировки с уникальным последним ключом (id). Без keys (поиск,
+    # упорядоченный по релевантности) курсор хранит смещение.
+    per_page = per_page or current_app.config['LIST_PAGE_SIZE']
+    # Курсор приходит от клиента: любая ошибка разбора (не тот тип значения, не число
+    # в смещении) — 400, а не 500
+    try:
+        values = decode_cursor(cursor, keys or (None,)) if cursor else None
+        offset = 0 if keys or not values else int(values[0])
+        if offset < 0:
+            raise ValueError('Отрицательное смещение')
+    except (ValueError, TypeError, KeyError):
+        abort(400)
+
+    if keys:
+        rows = keyset_query(query, keys, values, per_page + 1).all()
+    else:
+        rows = query.offset(offset).limit(per_page + 1).all()
+
+    items = rows[:per_page]
+    if len(rows) <= per_page:
+        return items, None
+    if keys:
+        return items, encode_cursor([getattr(items[-1], key.key) for key in keys])
+    return items, encode_cursor([offset + per_page])
+
+
+def next_page_links(page_endpoint, fragment_endpoint, cursor):
+    # Ссылка на следующую страницу целиком (без JavaScript) и на фрагмент с карточками для подгрузки
+    if cursor is None:
+        return None
+    args = request.args.to_dict()
+    args['cursor'] = cursor
+    return {'page': url_for(page_endpoint, **args), 'fragment': url_for(fragment_endpoint, **args)}
+
+
+def only_requested(query, model):
+    # ?id= — одна карточка с учётом текущих фильтров: так страница обновляет изменённую запись
+    obj_id = request.args.get('id', type=int)
+    return query.filter(model.id == obj_id) if obj_id is not None else query
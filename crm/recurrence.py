@@ -0,0 +1,109 @@
+from datetime import MAXYEAR, MINYEAR, datetime, time, timedelta
+
+
+# Повторяющиеся события: поддерживается подмножество RRULE
+# (FREQ=DAILY|WEEKLY|MONTHLY|YEARLY, INTERVAL, COUNT, UNTIL, BYDAY для WEEKLY)
+RRULE_WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+# Конец серии с COUNT находится перебором повторений, поэтому COUNT ограничен
+RRULE_MAX_COUNT = 1000
+# Наибольший INTERVAL: шаг серии не длиннее ста лет
+RRULE_MAX_INTERVAL = {'DAILY': 36500, 'WEEKLY': 5200, 'MONTHLY': 1200, 'YEARLY': 100}
+
+
+def parse_rrule(rule):
+    # Любая ошибка в правиле — ValueError: обработчики API отвечают на неё 400
+    if not isinstance(rule, str):
+        raise ValueError('Правило повторения должно быть строкой')
+    parts = dict(part.split('=', 1) for part in rule.upper().strip().split(';') if '=' in part)
+    freq = parts.get('FREQ')
+    if freq not in ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY'):
+        raise ValueError(f'Неподдерживаемое правило повторения: {rule}')
+    try:
+        interval = int(parts.get('INTERVAL', 1))
+        count = int(parts['COUNT']) if 'COUNT' in parts else None
+    except ValueError:
+        raise ValueError(f'INTERVAL и COUNT должны быть числами: {rule}')
+    if interval < 1:
+        raise ValueError('INTERVAL должен быть положительным')
+    until = None
+    if 'UNTIL' in parts:
+        value = parts['UNTIL'].rstrip('Z')
+        try:
+            until = datetime.strptime(value, '%Y%m%dT%H%M%S') if 'T' in value else \
+                datetime.combine(datetime.strptime(value, '%Y%m%d').date(), time.max)
+        except ValueError:
+            raise ValueError(f"Неверный UNTIL: {parts['UNTIL']}")
+    byday = None
+    if 'BYDAY' in parts:
+        try:
+            byday = sorted({RRULE_WEEKDAYS.index(day) for day in parts['BYDAY'].split(',')})
+        except ValueError:
+            raise ValueError(f"Неверный BYDAY: {parts['BYDAY']}")
+    return {'freq': freq, 'interval': interval, 'count': count, 'until': until, 'byday': byday}
+
+
+def validate_rrule(rule):
+    # Пределы проверяются при сохранении; правила, сохранённые раньше, читаются parse_rrule как есть
+    parsed = parse_rrule(rule)
+    if parsed['interval'] > RRULE_MAX_INTERVAL[parsed['freq']]:
+        raise ValueError(f"INTERVAL для {parsed['freq']} должен быть от 1 до {RRULE_MAX_INTERVAL[parsed['freq']]}")
+    if parsed['count'] is not None and not 1 <= parsed['count'] <= RRULE_MAX_COUNT:
+        raise ValueError(f'COUNT должен быть от 1 до {RRULE_MAX_COUNT}')
+    return parsed
+
+
+def _add_months(value, months):
+    month = value.month - 1 + months
+    year = value.year + month // 12
+    month = month % 12 + 1
+    if not MINYEAR <= year <= MAXYEAR:
+        raise OverflowError('date value out of range')
+    try:
+        return value.replace(year=year, month=month)
+    except ValueError:  # 31-е число или 29 февраля: такого повторения нет
+        return None
+
+
+def iter_recurrence(start, rule, not_before=None):
+    # Начала повторений по порядку. Без COUNT перебор сразу перескакивает к not_before,
+    # поэтому стоимость зависит от размера окна, а не от возраста серии.
+    skip = rule['count'] is None and not_before is not None and not_before > start
+    freq, interval = rule['freq'], rule['interval']
+    if freq == 'DAILY':
+        step = timedelta(days=interval)
+        k = (not_before - start) // step if skip else 0
+        candidates = (start + step * n for n in _count_from(k))
+    elif freq == 'WEEKLY':
+        week_start = start - timedelta(days=start.weekday())
+        days = rule['byday'] or [start.weekday()]
+        k = max(0, (not_before - week_start).days // (7 * interval) - 1) if skip else 0
+        candidates = (week_start + timedelta(weeks=n * interval, days=day)
+                      for n in _count_from(k) for day in days)
+    else:
+        months = interval if freq == 'MONTHLY' else interval * 12
+        if skip:
+            elapsed = (not_before.year - start.year) * 12 + not_before.month - start.month
+            k = max(0, elapsed // months - 1)
+        else:
+            k = 0
+        candidates = (_add_months(start, n * months) for n in _count_from(k))
+
+    emitted = 0
+    try:
+        for occurrence in candidates:
+            if occurrence is None or occurrence < start:
+                continue
+            if rule['until'] is not None and occurrence > rule['until']:
+                return
+            if rule['count'] is not None and emitted >= rule['count']:
+                return
+            emitted += 1
+            yield occurrence
+    except OverflowError:  # следующее повторение позже 9999 года: серия на этом кончается
+        return
+
+
+def _count_from(k):
+    while True:
+        yield k
+        k += 1
@@ -0,0 +1,34 @@
+import re
+from sqlalchemy import literal_column, or_
+from crm.extensions import db
+from crm.models import Contact, contact_fts
+
+
+def contact_search_match(text):
+    # Строка запроса FTS5: префиксный поиск по всем словам или по цифрам телефона
+    text = text.replace('ё', 'е').replace('Ё', 'Е').strip()
+    digits = re.sub(r'\D', '', text)
+    if len(digits) >= 3 and re.fullmatch(r'[\d\s+()\-.]+', text):
+        variants = [digits]
+        if digits[0] in '78' and len(digits) > 1:
+            variants.append(digits[1:])
+        return 'phone : (' + ' OR '.join(f'"{variant}"*' for variant in variants) + ')'
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words) or None
+
+
+def search_contacts(query, text, ranked=True):
+    if db.engine.dialect.name != 'sqlite':
+        pattern = f'%{text.strip()}%'
+        return query.filter(or_(Contact.last_name.ilike(pattern), Contact.first_name.ilike(pattern),
+                                Contact.phone.ilike(pattern), Contact.email.ilike(pattern),
+                                Contact.company.ilike(pattern), Contact.notes.ilike(pattern))
+                            ).order_by(Contact.last_name.asc())
+    match = contact_search_match(text)
+    if match is None:
+        return query.filter(db.false())
+    query = query.join(contact_fts, contact_fts.c.rowid == Contact.id).filter(
+        literal_column('contact_fts').op('MATCH')(match)
+    )
+    # bm25 считается для всех совпадений; автодополнению достаточно первых найденных
+    return query.order_by(contact_fts.c.rank) if ranked else query
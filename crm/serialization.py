@@ -0,0 +1,82 @@
+from functools import lru_cache
+from flask.json.provider import DefaultJSONProvider
+from crm.extensions import db
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Кодировщики строк API: для модели и набора полей один раз собирается функция, которая
+# превращает кортеж колонок из with_entities в словарь без ORM-объектов и циклов по полям.
+# fields — кортеж в порядке api_fields (parse_fields), поэтому набор полей даёт один ключ кэша
+ENCODER_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=ENCODER_CACHE_SIZE)
+def compile_encoder(model, fields):
+    columns = [model.id]
+    computed = getattr(model, 'api_computed', {})
+    aliases = getattr(model, 'api_columns', {})
+    namespace = {}
+    items = []
+    for name in fields:
+        if name in computed:
+            sources, func = computed[name]
+            start = len(columns)
+            columns.extend(getattr(model, source) for source in sources)
+            namespace[f'f_{name}'] = func
+            items.append(f'{name!r}: f_{name}(*row[{start}:{len(columns)}])')
+            continue
+        column = getattr(model, aliases.get(name, name))
+        index = 0 if name == 'id' else len(columns)
+        if index:
+            columns.append(column)
+        if isinstance(column.type, (db.Date, db.DateTime)):
+            items.append(f'{name!r}: row[{index}].isoformat() if row[{index}] is not None else None')
+        else:
+            items.append(f'{name!r}: row[{index}]')
+
+    source = 'def encode(row):\n    return {' + ', '.join(items) + '}\n'
+    exec(compile(source, f'<encoder {model.__name__}>', 'exec'), namespace)
+    return columns, namespace['encode']
+
+
+# JSON через orjson: в несколько раз быстрее json из стандартной библиотеки. Даты и
+# dataclass передаются в default Flask, поэтому ответы совпадают со стандартным провайдером.
+class OrjsonProvider(DefaultJSONProvider):
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS \
+        if orjson else 0
+
+    def _options(self, kwargs):
+        options = self.options
+        if kwargs.get('sort_keys', self.sort_keys):
+            options |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options(kwargs)).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=self.default, option=self._options({'indent': pretty}))
+        return self._app.response_class(body + b'\n' if pretty else body, mimetype=self.mimetype)
+
+
+def init_json(app):
+    # JSON_BACKEND: auto — orjson, если пакет установлен; orjson — обязательно; json — стандартный
+    backend = app.config['JSON_BACKEND']
+    if backend == 'json' or (backend == 'auto' and orjson is None):
+        return
+    if backend not in ('auto', 'orjson'):
+        raise ValueError(f'Неизвестный JSON_BACKEND: {backend}')
+    if orjson is None:
+        raise RuntimeError('Для JSON_BACKEND=orjson нужен пакет orjson (pip install orjson)')
+    app.json = OrjsonProvider(app)
@@ -0,0 +1,320 @@
+import secrets
+import threading
+import time as time_module
+from collections import OrderedDict
+from datetime import datetime
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+from crm.extensions import db
+from crm.models import SessionRecord, TableVersion
+
+
+# Серверные сессии: в cookie хранится только случайный идентификатор, данные — в хранилище
+# (таблица session_record или Redis). Перед хранилищем стоит LRU-кэш воркера, поэтому
+# повторные запросы той же сессии не читают и не разбирают запись. Выход и отзыв сессий
+# увеличивают счётчик отзывов в хранилище; воркер сверяет его на каждом запросе и при
+# изменении сбрасывает кэш, так что отозванная сессия не действует ни в одном воркере.
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, saved_at=None):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.saved_at = saved_at
+        self.stale_sid = None
+        self.stale_user = False
+        self.modified = False
+
+    def clear(self):
+        # Очистка (вход, выход) выдаёт новый идентификатор, старая запись удаляется.
+        # Отзыв сессии с пользователем объявляется всем воркерам, сессии до входа — нет
+        if self.sid:
+            self.stale_sid = self.sid
+            self.stale_user = self.stale_user or self.get('user_id') is not None
+            self.sid = None
+        super().clear()
+
+
+class LRUCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time_module.monotonic()
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (time_module.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+# Хранилища: load возвращает сериализованную запись или None, save/delete её меняют;
+# revocations — счётчик отзывов, announce_revocation его увеличивает
+class SqlSessionStore:
+    revocation_key = 'session_revocations'
+
+    def load(self, sid):
+        with db.engine.connect() as connection:
+            return connection.execute(
+                db.select(SessionRecord.data).where(SessionRecord.sid == sid,
+                                                   SessionRecord.expires_at > datetime.utcnow())
+            ).scalar()
+
+    def save(self, sid, payload, ttl, user_id=None):
+        table = SessionRecord.__table__
+        values = {'data': payload, 'user_id': user_id, 'expires_at': datetime.utcnow() + ttl}
+        with db.engine.begin() as connection:
+            if connection.execute(table.update().where(table.c.sid == sid).values(**values)).rowcount == 0:
+                connection.execute(table.insert().values(sid=sid, **values))
+
+    def delete(self, sid):
+        with db.engine.begin() as connection:
+            connection.execute(SessionRecord.__table__.delete().where(SessionRecord.sid == sid))
+
+    def delete_user(self, user_id):
+        table = SessionRecord.__table__
+        with db.engine.begin() as connection:
+            sids = connection.execute(db.select(table.c.sid).where(table.c.user_id == user_id)).scalars().all()
+            connection.execute(table.delete().where(table.c.user_id == user_id))
+        return sids
+
+    def purge_expired(self):
+        table = SessionRecord.__table__
+        with db.engine.begin() as connection:
+            return connection.execute(table.delete().where(table.c.expires_at <= datetime.utcnow())).rowcount
+
+    def revocations(self):
+        with db.engine.connect() as connection:
+            return connection.execute(
+                db.select(TableVersion.version).where(TableVersion.name == self.revocation_key)
+            ).scalar() or 0
+
+    def announce_revocation(self):
+        table = TableVersion.__table__
+        with db.engine.begin() as connection:
+            updated = connection.execute(table.update().where(table.c.name == self.revocation_key)
+                                         .values(version=table.c.version + 1))
+            if updated.rowcount == 0:
+                connection.execute(table.insert().values(name=self.revocation_key, version=1))
+
+
+class LocalRedis:
+    # Заменитель Redis в одном процессе: те же команды, что использует RedisSessionStore
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time_module.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._alive(key)
+            return entry[0] if entry else None
+
+    def setex(self, key, seconds, value):
+        with self._lock:
+            self._data[key] = (value.encode() if isinstance(value, str) else value,
+                               time_module.monotonic() + seconds)
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def incr(self, key):
+        with self._lock:
+            entry = self._alive(key)
+            value = int(entry[0]) + 1 if entry else 1
+            self._data[key] = (str(value).encode(), entry[1] if entry else None)
+            return value
+
+    def sadd(self, key, *members):
+        with self._lock:
+            entry = self._alive(key)
+            values = entry[0] if entry else set()
+            values.update(member.encode() for member in members)
+            self._data[key] = (values, entry[1] if entry else None)
+
+    def smembers(self, key):
+        with self._lock:
+            entry = self._alive(key)
+            return set(entry[0]) if entry else set()
+
+    def expire(self, key, seconds):
+        with self._lock:
+            entry = self._alive(key)
+            if entry:
+                self._data[key] = (entry[0], time_module.monotonic() + seconds)
+
+
+class RedisSessionStore:
+    def __init__(self, client, prefix='session:'):
+        self.client = client
+        self.prefix = prefix
+
+    def load(self, sid):
+        value = self.client.get(self.prefix + sid)
+        return value.decode() if isinstance(value, bytes) else value
+
+    def save(self, sid, payload, ttl, user_id=None):
+        seconds = int(ttl.total_seconds())
+        self.client.setex(self.prefix + sid, seconds, payload)
+        if user_id is not None:
+            # Набор сессий пользователя нужен для отзыва всех его входов
+            user_key = f'{self.prefix}user:{user_id}'
+            self.client.sadd(user_key, sid)
+            self.client.expire(user_key, seconds)
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+    def delete_user(self, user_id):
+        user_key = f'{self.prefix}user:{user_id}'
+        sids = [sid.decode() if isinstance(sid, bytes) else sid for sid in self.client.smembers(user_key)]
+        if sids:
+            self.client.delete(*(self.prefix + sid for sid in sids))
+        self.client.delete(user_key)
+        return sids
+
+    def purge_expired(self):
+        # Redis удаляет просроченные ключи сам
+        return 0
+
+    def revocations(self):
+        return int(self.client.get(self.prefix + 'revocations') or 0)
+
+    def announce_revocation(self):
+        self.client.incr(self.prefix + 'revocations')
+
+
+def redis_client(url):
+    if not url:
+        return LocalRedis()
+    try:
+        import redis
+    except ImportError:
+        raise RuntimeError('Для SESSION_REDIS_URL нужен пакет redis (pip install redis)')
+    return redis.Redis.from_url(url)
+
+
+class ServerSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store, cache_size, cache_ttl):
+        self.store = store
+        self.cache = LRUCache(cache_size, cache_ttl)
+        self.revocations = None
+
+    def _load(self, sid):
+        # Сессию могли отозвать в другом воркере: кэш действует, пока не изменился счётчик отзывов
+        revocations = self.store.revocations()
+        if revocations != self.revocations:
+            self.cache.clear()
+            self.revocations = revocations
+        payload = self.cache.get(sid)
+        if payload is None:
+            payload = self.store.load(sid)
+            if payload is None:
+                return None
+            self.cache.set(sid, payload)
+        return self.serializer.loads(payload)
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        record = self._load(sid) if sid and len(sid) <= 64 else None
+        # Запись из кэша могла пережить срок жизни, поэтому он проверяется и здесь
+        if record is None or time_module.time() - record['saved_at'] > app.permanent_session_lifetime.total_seconds():
+            return ServerSession()
+        return ServerSession(record['data'], sid=sid, saved_at=record['saved_at'])
+
+    def revoke(self, sid, announce=True):
+        self.store.delete(sid)
+        self.cache.pop(sid)
+        if announce:
+            self.store.announce_revocation()
+
+    def revoke_user(self, user_id):
+        for sid in self.store.delete_user(user_id):
+            self.cache.pop(sid)
+        self.store.announce_revocation()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.stale_sid:
+            self.revoke(session.stale_sid, announce=session.stale_user)
+
+        if not session:
+            if session.sid and session.modified:
+                self.revoke(session.sid)
+            if session.stale_sid or session.modified:
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app))
+            return
+
+        ttl = app.permanent_session_lifetime
+        now = time_module.time()
+        # Запись продлевается не на каждом запросе, а когда прошла половина срока жизни
+        expiring = session.saved_at is None or now - session.saved_at > ttl.total_seconds() / 2
+        if session.sid is None or session.modified or (session.permanent and expiring):
+            session.sid = session.sid or secrets.token_urlsafe(32)
+            payload = self.serializer.dumps({'data': dict(session), 'saved_at': now})
+            self.store.save(session.sid, payload, ttl, user_id=session.get('user_id'))
+            self.cache.set(session.sid, payload)
+
+        if not self.should_set_cookie(app, session):
+            return
+        response.set_cookie(
+            name, session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def init_sessions(app):
+    backend = app.config['SESSION_BACKEND']
+    if backend == 'cookie':
+        return
+    if backend == 'sql':
+        store = SqlSessionStore()
+    elif backend == 'redis':
+        store = RedisSessionStore(redis_client(app.config['SESSION_REDIS_URL']))
+    else:
+        raise ValueError(f'Неизвестный SESSION_BACKEND: {backend}')
+    app.session_interface = ServerSessionInterface(store, app.config['SESSION_CACHE_SIZE'],
+                                                   app.config['SESSION_CACHE_TTL'])
+
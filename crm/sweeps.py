@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from crm.calendar import recurring_series_between
+from crm.extensions import db
+from crm.live import publish_change
+from crm.models import Task, CalendarEvent
+from crm.notifications import queue_notifications
+from crm.pagination import paginate
+from crm.sync import purge_tombstones
+
+# Периодические задачи планировщика. Каждая получает своё состояние (словарь из job.payload),
+# может его изменить и возвращает число обработанных строк. Записи читаются пачками по
+# индексу, каждая пачка фиксируется отдельно, чтобы не держать блокировку записи.
+
+# Насколько назад смотреть при первом запуске, когда в состоянии ещё нет границы
+FIRST_RUN_LOOKBACK = timedelta(days=1)
+
+
+def load_horizon(state, default):
+    return datetime.fromisoformat(state['horizon']) if state.get('horizon') else default
+
+
+def keyset_batches(query, keys):
+    cursor = None
+    while True:
+        rows, cursor = paginate(query, keys, cursor, current_app.config['SCHEDULER_BATCH_SIZE'])
+        if rows:
+            yield rows
+        if cursor is None:
+            return
+
+
+# Ключи пачек для keyset_batches; запросы и ключи проверяет `flask check-query-plans`
+OVERDUE_KEYS = (Task.due_date, Task.id)
+REMINDER_KEYS = (CalendarEvent.start_time, CalendarEvent.id)
+
+
+# Незавершённые задачи, которые становятся просроченными
+OVERDUE_STATUSES = ('pending', 'in_progress')
+
+
+def newly_overdue_tasks(status, horizon, now):
+    # Задачи, у которых срок прошёл с прошлого запуска: окно (horizon, now] по ix_task_status_due_date.
+    # Один статус на запрос: с IN по двум статусам порядок (due_date, id) уже не берётся из индекса
+    return db.session.query(Task.id, Task.title, Task.due_date, Task.user_id).filter(
+        Task.status == status, Task.due_date > horizon, Task.due_date <= now
+    )
+
+
+def upcoming_events(horizon, until):
+    return db.session.query(CalendarEvent.id, CalendarEvent.title, CalendarEvent.start_time,
+                            CalendarEvent.user_id).filter(
+        CalendarEvent.status == 'scheduled', CalendarEvent.start_time > horizon, CalendarEvent.start_time <= until,
+        CalendarEvent.recurrence_rule.is_(None)
+    )
+
+
+def sweep_overdue_tasks(state):
+    now = datetime.utcnow()
+    horizon = load_horizon(state, now - FIRST_RUN_LOOKBACK)
+    queued = 0
+    for status in OVERDUE_STATUSES:
+        for rows in keyset_batches(newly_overdue_tasks(status, horizon, now), OVERDUE_KEYS):
+            queued += queue_notifications('task_overdue', 'tasks', [
+                (row.id, row.due_date, row.user_id, f'Просрочена задача «{row.title}»') for row in rows
+            ])
+            db.session.commit()
+    state['horizon'] = now.isoformat()
+    return queued
+
+
+def advance_event_statuses(state):
+    # scheduled -> in_progress после начала, scheduled/in_progress -> completed после конца.
+    # Обновлённые строки выходят из условия, поэтому следующая пачка читается тем же запросом.
+    # Статус серии общий для всех повторений, серии не переводятся.
+    now = datetime.utcnow()
+    batch_size = current_app.config['SCHEDULER_BATCH_SIZE']
+    single = CalendarEvent.recurrence_rule.is_(None)
+    transitions = (
+        CalendarEvent.query.filter(CalendarEvent.status == 'scheduled', CalendarEvent.start_time <= now, single),
+        CalendarEvent.query.filter(CalendarEvent.status == 'in_progress', CalendarEvent.start_time <= now,
+                                   CalendarEvent.end_time <= now, single),
+    )
+    changed = 0
+    for query in transitions:
+        while True:
+            events = query.order_by(CalendarEvent.start_time.asc()).limit(batch_size).all()
+            for event in events:
+                event.status = 'completed' if event.end_time <= now else 'in_progress'
+            db.session.commit()
+            changed += len(events)
+            if len(events) < batch_size:
+                break
+    if changed:
+        publish_change('events', 'bulk', updated=changed)
+    return changed
+
+
+def queue_event_reminders(state):
+    # События, которые начнутся в ближайшие EVENT_REMINDER_MINUTES; граница окна сохраняется,
+    # и следующий запуск продолжает с неё
+    now = datetime.utcnow()
+    minutes = current_app.config['EVENT_REMINDER_MINUTES']
+    until = now + timedelta(minutes=minutes)
+    horizon = max(load_horizon(state, now), now)
+    if until <= horizon:
+        return 0
+
+    queued = 0
+    for rows in keyset_batches(upcoming_events(horizon, until), REMINDER_KEYS):
+        queued += queue_notifications('event_reminder', 'events', [
+            (row.id, row.start_time, row.user_id, f'{row.start_time:%H:%M} — «{row.title}»') for row in rows
+        ])
+        db.session.commit()
+
+    # Повторения серий: уведомление на каждое повторение, due_at — его начало
+    occurrences = []
+    for series in recurring_series_between(horizon, until).filter(CalendarEvent.status != 'cancelled'):
+        occurrences += [(series.id, occurrence.start_time, series.user_id,
+                         f'{occurrence.start_time:%H:%M} — «{series.title}»')
+                        for occurrence in series.occurrences(horizon, until) if occurrence.start_time > horizon]
+    queued += queue_notifications('event_reminder', 'events', occurrences)
+    db.session.commit()
+    state['horizon'] = until.isoformat()
+    return queued
+
+
+def purge_expired_sessions(state):
+    store = getattr(current_app.session_interface, 'store', None)
+    return store.purge_expired() if store else 0
+
+
+def purge_old_tombstones(state):
+    return purge_tombstones(current_app.config['SYNC_TOMBSTONE_DAYS'])
+
+
+# Имя задачи -> обработчик; интервалы периодических задач задаёт SCHEDULER_JOBS
+JOB_HANDLERS = {
+    'sweep-overdue-tasks': sweep_overdue_tasks,
+    'advance-event-statuses': advance_event_statuses,
+    'queue-event-reminders': queue_event_reminders,
+    'purge-sessions': purge_expired_sessions,
+    'purge-tombstones': purge_old_tombstones,
+}
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from crm.extensions import db
+from crm.models import Task, CalendarEvent, Contact, Car, SyncTombstone, TableVersion
+
+# Журнал изменений для /api/sync. Каждое изменение строки получает номер из общей
+# последовательности (строка 'sync' в table_version) и записывает его в row_version;
+# удаление оставляет SyncTombstone с таким же номером. Клиент передаёт последний
+# полученный номер и получает только то, что изменилось после него.
+SYNC_MODELS = (Task, CalendarEvent, Contact, Car)
+
+
+def allocate_row_versions(session, count):
+    # Счётчик увеличивается в транзакции изменения: блокировка строки держится до COMMIT,
+    # поэтому номера становятся видны клиентам строго по возрастанию
+    table = TableVersion.__table__
+    connection = session.connection()
+    updated = connection.execute(
+        table.update().where(table.c.name == 'sync').values(version=table.c.version + count)
+    )
+    if updated.rowcount == 0:
+        connection.execute(table.insert().values(name='sync', version=count))
+    last = connection.execute(db.select(table.c.version).where(table.c.name == 'sync')).scalar()
+    return last - count + 1
+
+
+@event.listens_for(Session, 'before_flush')
+def assign_row_versions(session, flush_context, instances):
+    changed = [obj for obj in session.new if isinstance(obj, SYNC_MODELS)]
+    changed += [obj for obj in session.dirty if isinstance(obj, SYNC_MODELS) and session.is_modified(obj)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, SYNC_MODELS)]
+    if not changed and not deleted:
+        return
+    version = allocate_row_versions(session, len(changed) + len(deleted))
+    for obj in changed:
+        obj.row_version = version
+        version += 1
+    now = datetime.utcnow()
+    for obj in deleted:
+        session.add(SyncTombstone(version=version, entity=obj.__tablename__, row_id=obj.id, deleted_at=now))
+        # Номер удаления остаётся и на объекте: по нему обработчик публикует событие
+        obj.row_version = version
+        version += 1
+
+
+def record_tombstones(session, model, ids):
+    # Для массового удаления запросом, минуя объекты сессии
+    ids = sorted(ids)
+    if not ids:
+        return
+    version = allocate_row_versions(session, len(ids))
+    now = datetime.utcnow()
+    session.execute(db.insert(SyncTombstone), [
+        {'version': version + i, 'entity': model.__tablename__, 'row_id': row_id, 'deleted_at': now}
+        for i, row_id in enumerate(ids)
+    ])
+
+
+def sync_versions():
+    # Последний выданный номер и граница удалённых надгробий: клиент с более старым номером
+    # не узнает о части удалений и должен синхронизироваться заново
+    rows = dict(db.session.query(TableVersion.name, TableVersion.version)
+                .filter(TableVersion.name.in_(('sync', 'sync_purged'))))
+    return rows.get('sync', 0), rows.get('sync_purged', 0)
+
+
+def purge_tombstones(days):
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    horizon = db.session.query(db.func.max(SyncTombstone.version)).filter(SyncTombstone.deleted_at < cutoff).scalar()
+    if horizon is None:
+        return 0
+    deleted = SyncTombstone.query.filter(SyncTombstone.version <= horizon).delete(synchronize_session=False)
+    table = TableVersion.__table__
+    if db.session.execute(table.update().where(table.c.name == 'sync_purged').values(version=horizon)).rowcount == 0:
+        db.session.execute(table.insert().values(name='sync_purged', version=horizon))
+    db.session.commit()
+    return deleted
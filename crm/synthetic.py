@@ -0,0 +1,193 @@
+import random
+from datetime import date, datetime, timedelta
+from sqlalchemy import insert
+from crm.extensions import db
+from crm.models import Task, CalendarEvent, Contact, Car
+from crm.sync import allocate_row_versions
+
+# Синтетические данные для нагрузочных тестов: объёмы задаются параметрами, значения
+# детерминированы seed, строки вставляются пачками через executemany
+FIRST_NAMES = ('Александр', 'Алексей', 'Андрей', 'Анна', 'Дмитрий', 'Евгения', 'Екатерина', 'Елена', 'Иван',
+               'Ирина', 'Мария', 'Михаил', 'Наталья', 'Николай', 'Ольга', 'Павел', 'Сергей', 'Светлана',
+               'Татьяна', 'Юлия')
+LAST_NAMES = ('Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов', 'Новиков',
+              'Фёдоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семёнов', 'Егоров', 'Павлов', 'Козлов',
+              'Степанов', 'Николаев')
+MIDDLE_NAMES = ('Александрович', 'Алексеевич', 'Андреевич', 'Дмитриевич', 'Иванович', 'Михайлович',
+                'Николаевич', 'Сергеевич', None)
+COMPANIES = ('ООО Ромашка', 'ООО Лютик', 'АО Вектор', 'ИП Сидоров', 'ООО Техносервис', 'ПАО Автоимпорт',
+             'ООО Северный ветер', 'ООО Гранит', None)
+POSITIONS = ('Менеджер', 'Директор', 'Бухгалтер', 'Инженер', 'Логист', 'Юрист', None)
+CITIES = (('Москва', 'Московская область'), ('Санкт-Петербург', 'Ленинградская область'),
+          ('Казань', 'Республика Татарстан'), ('Екатеринбург', 'Свердловская область'),
+          ('Новосибирск', 'Новосибирская область'))
+STREETS = ('Ленина', 'Невский', 'Садовая', 'Мира', 'Гагарина', 'Советская', 'Лесная', 'Школьная')
+CONTACT_CATEGORIES = ('client', 'client', 'client', 'partner', 'supplier', 'employee', 'other')
+
+TASK_VERBS = ('Подписать', 'Отправить', 'Подготовить', 'Проверить', 'Согласовать', 'Позвонить по поводу')
+TASK_OBJECTS = ('договор', 'коммерческое предложение', 'отчёт по продажам', 'счёт', 'акт сверки',
+                'заявку на поставку', 'план работ')
+TASK_PRIORITIES = ('low', 'medium', 'medium', 'high', 'urgent')
+TASK_STATUSES = ('pending', 'pending', 'in_progress', 'completed', 'completed', 'cancelled')
+
+EVENT_TITLES = ('Встреча с клиентом', 'Звонок поставщику', 'Планирование задач', 'Показ автомобиля',
+                'Совещание отдела', 'Тест-драйв', 'Напоминание об оплате')
+EVENT_TYPES = ('meeting', 'call', 'task', 'reminder')
+EVENT_LOCATIONS = ('Конференц-зал №1', 'Конференц-зал №2', 'Рабочий кабинет', 'Автосалон', '', None)
+
+CAR_MODELS = (('Toyota', ('Camry', 'RAV4', 'Corolla', 'Land Cruiser')), ('BMW', ('X5', '3 Series', '5 Series')),
+              ('Kia', ('Rio', 'Sportage', 'K5')), ('Hyundai', ('Solaris', 'Tucson', 'Creta')),
+              ('Lada', ('Vesta', 'Granta', 'Niva')), ('Skoda', ('Octavia', 'Kodiaq', 'Rapid')))
+CAR_COLORS = ('Черный', 'Белый', 'Серый', 'Серебристый', 'Синий', 'Красный')
+PLATE_LETTERS = 'АВЕКМНОРСТУХ'
+VIN_CHARS = '0123456789ABCDEFGHJKLMNPRSTUVWXYZ'
+
+
+def random_moment(rng, around, days):
+    return around + timedelta(seconds=rng.randint(-days * 86400, days * 86400))
+
+
+def task_rows(rng, count, now):
+    for _ in range(count):
+        status = rng.choice(TASK_STATUSES)
+        due_date = random_moment(rng, now, 180).replace(second=0, microsecond=0)
+        yield {
+            'title': f'{rng.choice(TASK_VERBS)} {rng.choice(TASK_OBJECTS)}',
+            'description': rng.choice(('', 'Подробности в переписке', 'Срочно, по согласованию с руководителем')),
+            'priority': rng.choice(TASK_PRIORITIES),
+            'status': status,
+            'due_date': due_date,
+            'completed_at': due_date - timedelta(hours=rng.randint(0, 72)) if status == 'completed' else None,
+            'created_at': due_date - timedelta(days=rng.randint(1, 60)),
+            'updated_at': due_date - timedelta(days=rng.randint(0, 1)),
+        }
+
+
+def event_rows(rng, count, now):
+    for _ in range(count):
+        start = random_moment(rng, now, 365).replace(minute=rng.choice((0, 15, 30, 45)), second=0, microsecond=0)
+        # Около 1% событий длятся несколько дней (командировки, выставки)
+        duration = timedelta(days=rng.randint(1, 5)) if rng.random() < 0.01 else \
+            timedelta(minutes=rng.choice((15, 30, 45, 60, 90, 120, 180)))
+        yield {
+            'title': rng.choice(EVENT_TITLES),
+            'description': rng.choice(('', 'Обсуждение условий', 'Подготовить документы')),
+            'start_time': start,
+            'end_time': start + duration,
+            'event_type': rng.choice(EVENT_TYPES),
+            'location': rng.choice(EVENT_LOCATIONS),
+            'status': 'completed' if start < now else 'scheduled',
+            'created_at': start - timedelta(days=rng.randint(1, 30)),
+            'updated_at': start - timedelta(days=rng.randint(0, 1)),
+        }
+
+
+def contact_rows(rng, count, now):
+    for i in range(count):
+        last_name = rng.choice(LAST_NAMES)
+        first_name = rng.choice(FIRST_NAMES)
+        if first_name in ('Анна', 'Евгения', 'Екатерина', 'Елена', 'Ирина', 'Мария', 'Наталья', 'Ольга',
+                          'Светлана', 'Татьяна', 'Юлия'):
+            last_name += 'а'
+        city, region = rng.choice(CITIES)
+        created_at = random_moment(rng, now - timedelta(days=365), 365)
+        yield {
+            'first_name': first_name,
+            'last_name': last_name,
+            'middle_name': rng.choice(MIDDLE_NAMES),
+            'phone': f'+79{rng.randint(0, 999999999):09d}',
+            'email': f'contact{i}.{rng.randint(0, 99999)}@example.com',
+            'company': rng.choice(COMPANIES),
+            'position': rng.choice(POSITIONS),
+            'birth_date': date(rng.randint(1950, 2004), rng.randint(1, 12), rng.randint(1, 28)),
+            'category': rng.choice(CONTACT_CATEGORIES),
+            'address_index': f'{rng.randint(100000, 699999)}',
+            'address_country': 'Россия',
+            'address_region': region,
+            'address_city': city,
+            'address_street': rng.choice(STREETS),
+            'address_house': str(rng.randint(1, 150)),
+            'address_apartment': str(rng.randint(1, 300)) if rng.random() < 0.7 else None,
+            'notes': rng.choice(('', 'Постоянный клиент', 'Интересуется кроссоверами', None)),
+            'created_at': created_at,
+            'updated_at': created_at,
+        }
+
+
+def car_rows(rng, count, now, vin_prefix, offset):
+    for i in range(offset, offset + count):
+        brand, models = rng.choice(CAR_MODELS)
+        year = rng.randint(2010, now.year)
+        purchase_price = round(rng.uniform(600_000, 9_000_000), -3)
+        purchase_date = (now - timedelta(days=rng.randint(1, 1500))).date()
+        status = rng.choice(('in_stock', 'in_stock', 'sold', 'in_service'))
+        sold = status == 'sold'
+        letters = rng.sample(PLATE_LETTERS, 3)
+        created_at = datetime.combine(purchase_date, datetime.min.time())
+        yield {
+            # Номер строки в VIN продолжает уже загруженные автомобили, поэтому VIN уникален
+            # и при повторном запуске с тем же seed
+            'vin': f'{vin_prefix}{i:011d}',
+            'license_plate': f'{letters[0]}{rng.randint(1, 999):03d}{letters[1]}{letters[2]}{rng.randint(1, 199)}',
+            'brand': brand,
+            'model': rng.choice(models),
+            'year': year,
+            'color': rng.choice(CAR_COLORS),
+            'engine_type': rng.choice(('бензин', 'бензин', 'дизель', 'гибрид', 'электро')),
+            'engine_volume': rng.choice((1.4, 1.6, 2.0, 2.5, 3.0)),
+            'horsepower': rng.randint(90, 400),
+            'transmission': rng.choice(('автомат', 'механика')),
+            'mileage': (now.year - year) * rng.randint(5_000, 25_000),
+            'purchase_price': purchase_price,
+            'purchase_date': purchase_date,
+            'sale_price': round(purchase_price * rng.uniform(0.9, 1.25), -3) if sold else None,
+            'sale_date': purchase_date + timedelta(days=rng.randint(5, 200)) if sold else None,
+            'current_value': round(purchase_price * rng.uniform(0.7, 1.05), -3),
+            'status': status,
+            'condition': rng.choice(('new', 'used', 'used')),
+            'insurance_cost': round(rng.uniform(10_000, 80_000), -2),
+            'maintenance_cost': round(rng.uniform(5_000, 60_000), -2),
+            'fuel_cost': round(rng.uniform(2_000, 15_000), -2),
+            'created_at': created_at,
+            'updated_at': created_at,
+        }
+
+
+def insert_batch(model, batch):
+    # Массовая вставка минует события flush, поэтому номера для /api/sync выдаются здесь
+    version = allocate_row_versions(db.session, len(batch))
+    for i, row in enumerate(batch):
+        row['row_version'] = version + i
+    db.session.execute(insert(model), batch)
+    db.session.commit()
+
+
+def bulk_insert(model, rows, batch_size, progress=None):
+    inserted = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            insert_batch(model, batch)
+            inserted += len(batch)
+            batch = []
+            if progress:
+                progress(model, inserted)
+    if batch:
+        insert_batch(model, batch)
+        inserted += len(batch)
+        if progress:
+            progress(model, inserted)
+    return inserted
+
+
+def generate_data(tasks=0, events=0, contacts=0, cars=0, seed=42, batch_size=10000, progress=None):
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    vin_prefix = ''.join(rng.choice(VIN_CHARS) for _ in range(6))
+    return {
+        'tasks': bulk_insert(Task, task_rows(rng, tasks, now), batch_size, progress),
+        'events': bulk_insert(CalendarEvent, event_rows(rng, events, now), batch_size, progress),
+        'contacts': bulk_insert(Contact, contact_rows(rng, contacts, now), batch_size, progress),
+        'cars': bulk_insert(Car, car_rows(rng, cars, now, vin_prefix, Car.query.count()), batch_size, progress),
+    }
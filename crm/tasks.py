@@ -0,0 +1,66 @@
+from flask import Blueprint, render_template, request
+from crm.api import api_list_response, create_response, delete_response, detail_response, update_response
+from crm.auth import login_required
+from crm.models import Task
+from crm.pagination import next_page_links, only_requested, paginate
+
+bp = Blueprint('tasks', __name__)
+
+# Ключи сортировки страниц списка (курсор ?cursor=)
+TASK_PAGE_KEYS = (Task.due_date, Task.id)
+
+
+def filtered_tasks_query(status_filter='all', priority_filter='all'):
+    tasks_query = Task.query
+
+    if status_filter != 'all':
+        tasks_query = tasks_query.filter_by(status=status_filter)
+    if priority_filter != 'all':
+        tasks_query = tasks_query.filter_by(priority=priority_filter)
+
+    return tasks_query.order_by(Task.due_date.asc())
+
+
+def tasks_page():
+    status_filter = request.args.get('status', 'all')
+    priority_filter = request.args.get('priority', 'all')
+
+    query = only_requested(filtered_tasks_query(status_filter, priority_filter), Task)
+    tasks, cursor = paginate(query, TASK_PAGE_KEYS, request.args.get('cursor'))
+    return {'tasks': tasks, 'status_filter': status_filter, 'priority_filter': priority_filter,
+            'next_page': next_page_links('tasks.tasks', 'tasks.task_cards', cursor)}
+
+
+@bp.route('/tasks')
+@login_required
+def tasks():
+    return render_template('modules/tasks.html', **tasks_page())
+
+
+# Фрагмент со следующей страницей карточек для подгрузки при прокрутке
+@bp.route('/tasks/cards')
+@login_required
+def task_cards():
+    return render_template('partials/task_cards.html', **tasks_page())
+
+
+@bp.route('/api/tasks', methods=['GET', 'POST'])
+@login_required
+def api_tasks():
+    if request.method == 'POST':
+        return create_response(Task)
+
+    return api_list_response(Task, Task.query)
+
+
+@bp.route('/api/tasks/<int:task_id>', methods=['GET', 'PUT', 'DELETE'])
+@login_required
+def api_task(task_id):
+    if request.method == 'GET':
+        return detail_response(Task, task_id)
+
+    if request.method == 'PUT':
+        return update_response(Task, task_id)
+
+    elif request.method == 'DELETE':
+        return delete_response(Task, task_id)
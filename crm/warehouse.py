@@ -0,0 +1,124 @@
+from datetime import date, datetime
+from flask import Blueprint, current_app, render_template, request, jsonify
+from crm.api import api_list_response, create_response, delete_response, detail_response, update_response
+from crm.auth import login_required
+from crm.cache import cached
+from crm.extensions import db
+from crm.models import Car
+from crm.pagination import next_page_links, only_requested, paginate
+
+bp = Blueprint('warehouse', __name__)
+
+# Ключи сортировки страниц списка (курсор ?cursor=)
+CAR_PAGE_KEYS = (Car.brand, Car.model, Car.id)
+
+
+def filtered_cars_query(status_filter='all'):
+    cars_query = Car.query
+
+    if status_filter != 'all':
+        cars_query = cars_query.filter_by(status=status_filter)
+
+    return cars_query.order_by(Car.brand.asc(), Car.model.asc())
+
+
+def warehouse_page():
+    status_filter = request.args.get('status', 'all')
+    query = only_requested(filtered_cars_query(status_filter), Car)
+    cars, cursor = paginate(query, CAR_PAGE_KEYS, request.args.get('cursor'))
+    return {'cars': cars, 'status_filter': status_filter,
+            'next_page': next_page_links('warehouse.warehouse', 'warehouse.car_cards', cursor)}
+
+
+@bp.route('/warehouse')
+@login_required
+def warehouse():
+    return render_template('warehouse.html', **warehouse_page())
+
+
+@bp.route('/warehouse/cards')
+@login_required
+def car_cards():
+    return render_template('partials/car_cards.html', **warehouse_page())
+
+
+@bp.route('/api/cars', methods=['GET', 'POST'])
+@login_required
+def api_cars():
+    if request.method == 'POST':
+        return create_response(Car)
+
+    return api_list_response(Car, Car.query)
+
+
+def days_between(start, end):
+    if db.engine.dialect.name == 'sqlite':
+        return db.func.julianday(end) - db.func.julianday(start)
+    return end - start
+
+
+def compute_car_stats():
+    today = date.today()
+    costs = (db.func.coalesce(Car.insurance_cost, 0) + db.func.coalesce(Car.maintenance_cost, 0)
+             + db.func.coalesce(Car.fuel_cost, 0))
+    margin = Car.sale_price - Car.purchase_price
+    days_in_stock = days_between(Car.purchase_date, db.func.coalesce(Car.sale_date, today))
+
+    by_status = db.session.query(
+        Car.status, db.func.count(Car.id), db.func.sum(Car.purchase_price), db.func.sum(Car.current_value),
+        db.func.sum(Car.sale_price), db.func.avg(days_in_stock)
+    ).group_by(Car.status).all()
+
+    by_brand = db.session.query(
+        Car.brand, db.func.count(Car.id), db.func.sum(costs), db.func.sum(margin), db.func.avg(margin)
+    ).group_by(Car.brand).order_by(Car.brand.asc()).all()
+
+    totals = db.session.query(
+        db.func.count(Car.id), db.func.sum(Car.current_value), db.func.sum(costs),
+        db.func.sum(margin), db.func.avg(days_in_stock)
+    ).one()
+
+    return {
+        'total': {
+            'count': totals[0],
+            'current_value': totals[1] or 0,
+            'costs': totals[2] or 0,
+            'margin': totals[3] or 0,
+            'avg_days_in_stock': round(totals[4], 1) if totals[4] is not None else None
+        },
+        'by_status': [{
+            'status': status,
+            'count': count,
+            'purchase_value': purchase or 0,
+            'current_value': current or 0,
+            'sale_value': sale or 0,
+            'avg_days_in_stock': round(days, 1) if days is not None else None
+        } for status, count, purchase, current, sale, days in by_status],
+        'by_brand': [{
+            'brand': brand,
+            'count': count,
+            'costs': brand_costs or 0,
+            'margin': brand_margin or 0,
+            'avg_margin': round(avg_margin, 2) if avg_margin is not None else None
+        } for brand, count, brand_costs, brand_margin, avg_margin in by_brand],
+        'generated_at': datetime.utcnow().isoformat()
+    }
+
+
+@bp.route('/api/cars/stats')
+@login_required
+def api_cars_stats():
+    return jsonify(cached('car_stats', current_app.config['CAR_STATS_TTL'], ('car',), compute_car_stats))
+
+
+@bp.route('/api/cars/<int:car_id>', methods=['GET', 'PUT', 'DELETE'])
+@login_required
+def api_car(car_id):
+    if request.method == 'GET':
+        return detail_response(Car, car_id)
+
+    if request.method == 'PUT':
+        return update_response(Car, car_id)
+
+    elif request.method == 'DELETE':
+        return delete_response(Car, car_id)
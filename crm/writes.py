@@ -0,0 +1,88 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from flask import current_app
+from crm.extensions import db
+
+
+# Очередь записи: небольшие изменения из обработчиков API выполняет один поток воркера
+# и фиксирует пачкой — один COMMIT (и один fsync) на все накопившиеся запросы.
+# Каждое изменение выполняется в своей точке сохранения, ошибка откатывает только его.
+class WriteQueue:
+    def __init__(self, app):
+        self.app = app
+        self.max_batch = app.config['WRITE_QUEUE_MAX_BATCH']
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, func):
+        self._ensure_started()
+        future = Future()
+        self._queue.put((future, func))
+        return future.result()
+
+    def _ensure_started(self):
+        # Поток запускается при первой записи и заново после fork (gunicorn --preload)
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='write-queue', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                batch = [self._queue.get()]
+                # Пока шёл предыдущий COMMIT, в очереди накопились следующие запросы
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                self._commit(batch)
+
+    def _commit(self, batch):
+        results = []
+        for future, func in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                with db.session.begin_nested():
+                    results.append((future, func(), None))
+            except Exception as e:
+                results.append((future, None, e))
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for future, _, _ in results:
+                future.set_exception(e)
+            return
+        finally:
+            db.session.expunge_all()
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+def init_write_queue(app):
+    if app.config['WRITE_QUEUE']:
+        app.extensions['write_queue'] = WriteQueue(app)
+
+
+def run_write(func):
+    # func меняет db.session и возвращает результат для ответа; COMMIT делает вызывающий код
+    write_queue = current_app.extensions.get('write_queue')
+    if write_queue is not None:
+        return write_queue.submit(func)
+    result = func()
+    db.session.commit()
+    return result
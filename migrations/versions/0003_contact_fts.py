@@ -0,0 +1,44 @@
+"""contact full-text search index
+
+Revision ID: 0003_contact_fts
+Revises: 0002_list_indexes
+Create Date: 2026-10-18 13:05:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_contact_fts'
+down_revision = '0002_list_indexes'
+branch_labels = None
+depends_on = None
+
+
+# Снимок CONTACT_FTS_DDL / CONTACT_FTS_REBUILD из app.py на момент миграции
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS contact_fts USING fts5(name, phone, email, company, notes, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    "CREATE TRIGGER IF NOT EXISTS contact_fts_ai AFTER INSERT ON contact BEGIN INSERT INTO contact_fts(rowid, name, phone, email, company, notes) VALUES (new.id, replace(replace(coalesce(new.last_name || ' ' || new.first_name || ' ' || coalesce(new.middle_name, ''), ''), 'ё', 'е'), 'Ё', 'Е'), CASE WHEN substr(replace(replace(replace(replace(replace(replace(coalesce(new.phone, ''), ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', ''), 1, 1) IN ('7', '8') THEN replace(replace(replace(replace(replace(replace(coalesce(new.phone, ''), ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', '') || ' ' || substr(replace(replace(replace(replace(replace(replace(coalesce(new.phone, ''), ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', ''), 2) ELSE replace(replace(replace(replace(replace(replace(coalesce(new.phone, ''), ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', '') END, new.email, replace(replace(coalesce(new.company, ''), 'ё', 'е'), 'Ё', 'Е'), replace(replace(coalesce(new.notes, ''), 'ё', 'е'), 'Ё', 'Е')); END",
+    "CREATE TRIGGER IF NOT EXISTS contact_fts_au AFTER UPDATE OF last_name, first_name, middle_name, phone, email, company, notes ON contact BEGIN DELETE FROM contact_fts WHERE rowid = old.id; INSERT INTO contact_fts(rowid, name, phone, email, company, notes) VALUES (new.id, replace(replace(coalesce(new.last_name || ' ' || new.first_name || ' ' || coalesce(new.middle_name, ''), ''), 'ё', 'е'), 'Ё', 'Е'), CASE WHEN substr(replace(replace(replace(replace(replace(replace(coalesce(new.phone, ''), ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', ''), 1, 1) IN ('7', '8') THEN replace(replace(replace(replace(replace(replace(coalesce(new.phone, ''), ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', '') || ' ' || substr(replace(replace(replace(replace(replace(replace(coalesce(new.phone, ''), ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', ''), 2) ELSE replace(replace(replace(replace(replace(replace(coalesce(new.phone, ''), ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', '') END, new.email, replace(replace(coalesce(new.company, ''), 'ё', 'е'), 'Ё', 'Е'), replace(replace(coalesce(new.notes, ''), 'ё', 'е'), 'Ё', 'Е')); END",
+    'CREATE TRIGGER IF NOT EXISTS contact_fts_ad AFTER DELETE ON contact BEGIN DELETE FROM contact_fts WHERE rowid = old.id; END'
+]
+
+FTS_FILL = [
+    "INSERT INTO contact_fts(rowid, name, phone, email, company, notes) SELECT contact.id, replace(replace(coalesce(contact.last_name || ' ' || contact.first_name || ' ' || coalesce(contact.middle_name, ''), ''), 'ё', 'е'), 'Ё', 'Е'), CASE WHEN substr(replace(replace(replace(replace(replace(replace(coalesce(contact.phone, ''), ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', ''), 1, 1) IN ('7', '8') THEN replace(replace(replace(replace(replace(replace(coalesce(contact.phone, ''), ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', '') || ' ' || substr(replace(replace(replace(replace(replace(replace(coalesce(contact.phone, ''), ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', ''), 2) ELSE replace(replace(replace(replace(replace(replace(coalesce(contact.phone, ''), ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', '') END, contact.email, replace(replace(coalesce(contact.company, ''), 'ё', 'е'), 'Ё', 'Е'), replace(replace(coalesce(contact.notes, ''), 'ё', 'е'), 'Ё', 'Е') FROM contact"
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in FTS_DDL + FTS_FILL:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute('DROP TRIGGER IF EXISTS contact_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS contact_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS contact_fts_ai')
+    op.execute('DROP TABLE IF EXISTS contact_fts')
@@ -0,0 +1,34 @@
+"""calendar event overlap indexes
+
+Revision ID: 0004_event_overlap_index
+Revises: 0003_contact_fts
+Create Date: 2026-10-18 13:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_event_overlap_index'
+down_revision = '0003_contact_fts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('calendar_event', schema=None) as batch_op:
+        batch_op.drop_index('ix_calendar_event_start_time')
+        batch_op.create_index('ix_calendar_event_start_end', ['start_time', 'end_time'], unique=False)
+
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('CREATE INDEX IF NOT EXISTS ix_calendar_event_duration '
+                   'ON calendar_event (julianday(end_time) - julianday(start_time))')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('DROP INDEX IF EXISTS ix_calendar_event_duration')
+
+    with op.batch_alter_table('calendar_event', schema=None) as batch_op:
+        batch_op.drop_index('ix_calendar_event_start_end')
+        batch_op.create_index('ix_calendar_event_start_time', ['start_time'], unique=False)
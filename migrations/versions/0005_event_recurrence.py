@@ -0,0 +1,36 @@
+"""calendar event recurrence
+
+Revision ID: 0005_event_recurrence
+Revises: 0004_event_overlap_index
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_event_recurrence'
+down_revision = '0004_event_overlap_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('calendar_event', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recurrence_rule', sa.String(length=200), nullable=True))
+        batch_op.add_column(sa.Column('recurrence_until', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('recurrence_exdates', sa.Text(), nullable=True))
+        batch_op.create_index('ix_calendar_event_series', ['start_time'], unique=False,
+                              sqlite_where=sa.text('recurrence_rule IS NOT NULL'),
+                              postgresql_where=sa.text('recurrence_rule IS NOT NULL'))
+
+
+def downgrade():
+    with op.batch_alter_table('calendar_event', schema=None) as batch_op:
+        batch_op.drop_index('ix_calendar_event_series',
+                            sqlite_where=sa.text('recurrence_rule IS NOT NULL'),
+                            postgresql_where=sa.text('recurrence_rule IS NOT NULL'))
+        batch_op.drop_column('recurrence_exdates')
+        batch_op.drop_column('recurrence_until')
+        batch_op.drop_column('recurrence_rule')
@@ -0,0 +1,25 @@
+"""contact created_at index
+
+Revision ID: 0006_contact_created_at_index
+Revises: 0005_event_recurrence
+Create Date: 2026-10-18 14:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_contact_created_at_index'
+down_revision = '0005_event_recurrence'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('contact', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_contact_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('contact', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_contact_created_at'))
@@ -0,0 +1,37 @@
+"""server-side sessions
+
+Revision ID: 0009_session_record
+Revises: 0008_user_password_hash_length
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_session_record'
+down_revision = '0008_user_password_hash_length'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('session_record',
+    sa.Column('sid', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('sid')
+    )
+    with op.batch_alter_table('session_record', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_session_record_expires_at'), ['expires_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_session_record_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('session_record', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_session_record_user_id'))
+        batch_op.drop_index(batch_op.f('ix_session_record_expires_at'))
+
+    op.drop_table('session_record')
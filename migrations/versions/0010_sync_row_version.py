@@ -0,0 +1,64 @@
+"""row versions and tombstones for /api/sync
+
+Revision ID: 0010_sync_row_version
+Revises: 0009_session_record
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_sync_row_version'
+down_revision = '0009_session_record'
+branch_labels = None
+depends_on = None
+
+SYNC_TABLES = ('task', 'calendar_event', 'contact', 'car')
+
+
+def upgrade():
+    for table in ('task', 'calendar_event'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(f'UPDATE {table} SET updated_at = created_at')
+    for table in SYNC_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('row_version', sa.Integer(), nullable=True))
+            batch_op.create_index(batch_op.f(f'ix_{table}_row_version'), ['row_version'], unique=False)
+
+    op.create_table('sync_tombstone',
+    sa.Column('version', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('entity', sa.String(length=50), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('version')
+    )
+    with op.batch_alter_table('sync_tombstone', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_sync_tombstone_deleted_at'), ['deleted_at'], unique=False)
+
+    # Существующие строки получают номера подряд по таблицам, счётчик продолжает с последнего
+    connection = op.get_bind()
+    offset = 0
+    for table in SYNC_TABLES:
+        connection.execute(sa.text(f'UPDATE {table} SET row_version = id + :offset'), {'offset': offset})
+        offset += connection.execute(sa.text(f'SELECT coalesce(max(id), 0) FROM {table}')).scalar()
+    connection.execute(sa.text("DELETE FROM table_version WHERE name IN ('sync', 'sync_purged')"))
+    connection.execute(sa.text("INSERT INTO table_version (name, version) VALUES ('sync', :version)"),
+                       {'version': offset})
+
+
+def downgrade():
+    op.execute("DELETE FROM table_version WHERE name IN ('sync', 'sync_purged')")
+    with op.batch_alter_table('sync_tombstone', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sync_tombstone_deleted_at'))
+
+    op.drop_table('sync_tombstone')
+    # Без batch: пересоздание таблиц потеряло бы триггеры contact_fts и индекс по выражению
+    # у calendar_event; SQLite удаляет колонки сам начиная с 3.35
+    for table in reversed(SYNC_TABLES):
+        op.drop_index(op.f(f'ix_{table}_row_version'), table_name=table)
+        op.drop_column(table, 'row_version')
+    for table in ('calendar_event', 'task'):
+        op.drop_column(table, 'updated_at')
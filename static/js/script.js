@@ -9,21 +9,19 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
-    // Уведомления
-    const notificationBtn = document.querySelector('.header-btn:nth-child(1)');
+    // Уведомления (просроченные задачи, скорые события) создаёт фоновый планировщик
+    const notificationBtn = document.querySelector('.notifications-btn');
     if (notificationBtn) {
-        notificationBtn.addEventListener('click', function() {
-            alert('Уведомления будут реализованы позже');
-        });
+        loadNotificationCount();
+        notificationBtn.addEventListener('click', showNotifications);
     }
 
     // Поиск
     const searchInput = document.querySelector('.search-box input');
     if (searchInput) {
         searchInput.addEventListener('keypress', function(e) {
-            if (e.key === 'Enter') {
-                alert('Поиск: ' + this.value);
-                this.value = '';
+            if (e.key === 'Enter' && this.value.trim()) {
+                window.location.href = '/contacts?search=' + encodeURIComponent(this.value.trim());
             }
         });
     }
@@ -151,9 +149,191 @@ function handleCarSubmit(event) {
     .then(response => {
         if (response.ok) {
             closeCarModal();
-            window.location.reload();
+            refreshAfterChange();
         } else {
             alert('Ошибка при сохранении');
         }
     });
 }
+
+function setNotificationCount(count) {
+    const badge = document.querySelector('.notifications-count');
+    if (badge) {
+        badge.textContent = count;
+        badge.style.display = count ? '' : 'none';
+    }
+}
+
+function loadNotificationCount() {
+    fetch('/api/notifications?unread=1&limit=1', {credentials: 'same-origin'})
+        .then(response => response.ok ? response.json() : null)
+        .then(data => {
+            if (data) {
+                setNotificationCount(data.unread);
+            }
+        });
+}
+
+function showNotifications() {
+    fetch('/api/notifications?unread=1', {credentials: 'same-origin'})
+        .then(response => response.json())
+        .then(data => {
+            if (!data.items.length) {
+                alert('Новых уведомлений нет');
+                return;
+            }
+            alert(data.items.map(item => item.message).join('\n'));
+            // Прочитанными отмечаются только показанные уведомления
+            return fetch('/api/notifications/read', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({ids: data.items.map(item => item.id)})
+            }).then(() => setNotificationCount(Math.max(0, data.unread - data.items.length)));
+        });
+}
+
+// Подгрузка списков (задачи, контакты, склад): ссылка «Показать ещё» в конце списка
+// заменяется фрагментом со следующей страницей карточек, когда доходит до экрана
+function initLoadMore() {
+    const observer = 'IntersectionObserver' in window
+        ? new IntersectionObserver(entries => {
+            entries.forEach(entry => {
+                if (entry.isIntersecting) {
+                    loadMore(entry.target, observer);
+                }
+            });
+        }, {rootMargin: '600px'})
+        : null;
+
+    document.addEventListener('click', function(e) {
+        const link = e.target.closest('.load-more');
+        if (link) {
+            e.preventDefault();
+            loadMore(link, observer);
+        }
+    });
+    if (observer) {
+        document.querySelectorAll('.load-more').forEach(link => observer.observe(link));
+    }
+}
+
+function loadMore(link, observer) {
+    if (link.dataset.loading) {
+        return;
+    }
+    link.dataset.loading = '1';
+    fetch(link.dataset.fragment, {credentials: 'same-origin'})
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(response.status);
+            }
+            return response.text();
+        })
+        .then(html => {
+            const template = document.createElement('template');
+            template.innerHTML = html;
+            const next = template.content.querySelector('.load-more');
+            if (observer) {
+                observer.unobserve(link);
+            }
+            link.replaceWith(template.content);
+            if (next && observer) {
+                observer.observe(next);
+            }
+        })
+        .catch(() => {
+            delete link.dataset.loading;
+        });
+}
+
+document.addEventListener('DOMContentLoaded', initLoadMore);
+
+// Изменения, сделанные в других вкладках и другими пользователями (/api/live).
+// Списки с data-live-fragment обновляют одну карточку, остальные страницы
+// перезагружаются, когда не открыто модальное окно.
+let liveReloadTimer = null;
+
+function initLiveUpdates() {
+    const containers = document.querySelectorAll('[data-live]');
+    // Без LIVE_BACKEND (off) сервер не отдаёт /api/live, подключение не открывается
+    if (!containers.length || !('EventSource' in window) || !('liveEnabled' in document.body.dataset)) {
+        return;
+    }
+    const entities = [...new Set([...containers].map(el => el.dataset.live))];
+    const source = new EventSource('/api/live?entities=' + entities.join(','));
+    source.addEventListener('open', () => { window.liveConnected = true; });
+    source.addEventListener('error', () => { window.liveConnected = false; });
+    source.addEventListener('resync', () => scheduleLiveReload());
+    source.addEventListener('change', event => {
+        const change = JSON.parse(event.data);
+        document.querySelectorAll(`[data-live="${change.entity}"]`).forEach(container => {
+            applyChange(container, change);
+        });
+    });
+}
+
+function applyChange(container, change) {
+    const fragment = container.dataset.liveFragment;
+    if (!fragment || change.action === 'bulk') {
+        scheduleLiveReload();
+        return;
+    }
+    const card = container.querySelector(`[data-live-id="${change.id}"]`);
+    if (change.action === 'deleted') {
+        if (card) {
+            card.remove();
+        }
+        return;
+    }
+
+    // Карточка запрашивается с фильтрами страницы: если запись им больше не подходит, ответ пустой
+    const params = new URLSearchParams(window.location.search);
+    params.delete('cursor');
+    params.set('id', change.id);
+    fetch(fragment + '?' + params, {credentials: 'same-origin'})
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(response.status);
+            }
+            return response.text();
+        })
+        .then(html => {
+            const template = document.createElement('template');
+            template.innerHTML = html;
+            const fresh = template.content.querySelector('[data-live-id]');
+            const current = container.querySelector(`[data-live-id="${change.id}"]`);
+            if (current && fresh) {
+                current.replaceWith(fresh);
+            } else if (current) {
+                current.remove();
+            } else if (fresh) {
+                const empty = container.querySelector('.empty-state');
+                if (empty) {
+                    empty.remove();
+                }
+                container.prepend(fresh);
+            }
+        })
+        .catch(() => scheduleLiveReload());
+}
+
+function scheduleLiveReload() {
+    clearTimeout(liveReloadTimer);
+    liveReloadTimer = setTimeout(() => {
+        const modalOpen = [...document.querySelectorAll('.modal')].some(modal => getComputedStyle(modal).display !== 'none');
+        if (modalOpen) {
+            scheduleLiveReload();
+        } else {
+            window.location.reload();
+        }
+    }, 1000);
+}
+
+// После собственного сохранения: при открытом потоке изменение придёт событием
+function refreshAfterChange() {
+    if (!window.liveConnected) {
+        window.location.reload();
+    }
+}
+
+document.addEventListener('DOMContentLoaded', initLiveUpdates);
@@ -0,0 +1,39 @@
+import pytest
+from crm import create_app
+from crm.demo import init_database
+
+
+def pytest_addoption(parser):
+    parser.addoption('--bench', action='store_true', help='Сравнить задержки маршрутов с базовой линией BENCH_BASELINE')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'config(**overrides): настройки приложения для теста')
+    config.addinivalue_line('markers', 'bench: нагрузочный прогон, только с --bench')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--bench'):
+        return
+    skip = pytest.mark.skip(reason='нагрузочный прогон: запустите с --bench')
+    for item in items:
+        if 'bench' in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def app(tmp_path, request):
+    marker = request.node.get_closest_marker('config')
+    app = create_app('testing', SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "crm.db"}',
+                     MEDIA_ROOT=str(tmp_path / 'media'), PROFILE_DIR=str(tmp_path / 'profiles'),
+                     **(marker.kwargs if marker else {}))
+    with app.app_context():
+        init_database(with_demo=True)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    client.post('/login', data={'username': 'Сергей', 'password': '336996'})
+    return client
@@ -0,0 +1,29 @@
+# Списки API: страницы по ?after= и ?limit=, выборка полей и общее число строк
+def test_list_pages_with_after_and_limit(client):
+    for n in range(5):
+        client.post('/api/tasks', json={'title': f'Задача {n}'})
+
+    response = client.get('/api/tasks?limit=3')
+    assert response.status_code == 200
+    assert response.headers['X-Total-Count'] == '8'  # 3 демо-задачи и 5 новых
+    first = [item['id'] for item in response.get_json()]
+    assert len(first) == 3
+    assert response.headers['X-Next-Cursor'] == str(first[-1])
+    assert 'rel="next"' in response.headers['Link']
+
+    seen = first
+    while 'X-Next-Cursor' in response.headers:
+        response = client.get(f"/api/tasks?limit=3&after={response.headers['X-Next-Cursor']}")
+        seen += [item['id'] for item in response.get_json()]
+    assert seen == sorted(seen) and len(set(seen)) == 8
+
+
+def test_list_fields(client):
+    items = client.get('/api/tasks?fields=id,title').get_json()
+    assert items and all(set(item) == {'id', 'title'} for item in items)
+    assert client.get('/api/tasks?fields=id,password').status_code == 400
+    assert client.get('/api/tasks?limit=abc').status_code == 400
+
+
+def test_total_count_can_be_skipped(client):
+    assert 'X-Total-Count' not in client.get('/api/contacts?count=0').headers
@@ -0,0 +1,75 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from crm import auth, create_app
+from crm.commands import init_db_command
+from crm.extensions import db
+from crm.models import User
+
+
+@pytest.fixture(autouse=True)
+def clear_login_failures():
+    # Счётчик неудачных входов общий для процесса: каждый тест начинает с чистого
+    auth._login_failures.clear()
+
+
+def login(client, username, password):
+    return client.post('/login', data={'username': username, 'password': password})
+
+
+# После LOGIN_RATE_LIMIT неудач подряд пара (адрес, логин) блокируется, другие логины — нет
+def test_login_rate_limit(app):
+    client = app.test_client()
+    for _ in range(app.config['LOGIN_RATE_LIMIT']):
+        assert login(client, 'Мошенник', 'неверно').status_code == 200
+    assert login(client, 'мошенник', 'неверно').status_code == 429
+    assert login(client, 'Сергей', '336996').status_code == 302
+
+
+def test_success_resets_failures(app):
+    client = app.test_client()
+    for _ in range(app.config['LOGIN_RATE_LIMIT'] - 1):
+        login(client, 'Сергей', 'неверно')
+    assert login(client, 'Сергей', '336996').status_code == 302
+    client.get('/logout')
+    assert login(client, 'Сергей', 'неверно').status_code == 200
+
+
+# Хэш со старыми параметрами пересчитывается текущим алгоритмом при входе
+def test_login_upgrades_password_hash(app):
+    with app.app_context():
+        user = User.query.filter_by(username='Сергей').one()
+        user.password_hash = generate_password_hash('336996', method='pbkdf2:sha256:600')
+        db.session.commit()
+    assert login(app.test_client(), 'Сергей', '336996').status_code == 302
+    with app.app_context():
+        password_hash = User.query.filter_by(username='Сергей').one().password_hash
+    assert password_hash.startswith(app.config['PASSWORD_HASH_METHOD'] + '$')
+
+
+# Неудачи с новым логином каждый раз не копят пары без предела: истёкшие и лишние удаляются
+@pytest.mark.config(LOGIN_RATE_MAX_KEYS=3)
+def test_login_failures_bounded(app, monkeypatch):
+    client = app.test_client()
+    for n in range(10):
+        login(client, f'бот{n}', 'неверно')
+    assert len(auth._login_failures) == 3
+    assert ('127.0.0.1', 'бот9') in auth._login_failures
+
+    now = auth.time_module.monotonic()
+    monkeypatch.setattr(auth.time_module, 'monotonic', lambda: now + app.config['LOGIN_RATE_WINDOW'] + 1)
+    login(client, 'бот10', 'неверно')
+    assert list(auth._login_failures) == [('127.0.0.1', 'бот10')]
+
+
+# init-db без --demo не создаёт пользователя с известным паролем
+def test_init_db_seeds_demo_only_on_request(tmp_path):
+    app = create_app('testing', SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "crm.db"}',
+                     MEDIA_ROOT=str(tmp_path / 'media'))
+    runner = app.test_cli_runner()
+    assert runner.invoke(init_db_command).exit_code == 0
+    with app.app_context():
+        assert User.query.count() == 0
+
+    assert runner.invoke(init_db_command, ['--demo']).exit_code == 0
+    with app.app_context():
+        assert [user.username for user in User.query.all()] == ['Сергей']
@@ -0,0 +1,29 @@
+import pytest
+from crm.api import API_MODELS
+from crm.benchmarks import benchmark_routes, load_baseline, measure_route, regressions
+from crm.models import User
+from crm.synthetic import generate_data
+
+
+def test_regressions_compare_p95():
+    baseline = {'routes': {'tasks': {'p95_ms': 10.0}, 'contacts': {'p95_ms': 10.0}}}
+    results = {'tasks': {'p95_ms': 11.9}, 'contacts': {'p95_ms': 12.5}, 'cars': {'p95_ms': 99.0}}
+    assert regressions(results, baseline, 0.2) == {'contacts': (10.0, 12.5)}
+    assert regressions(results, baseline, 0.2, min_delta_ms=1.0) == {}
+
+
+# Маршруты на тех же объёмах данных, что и базовая линия: таблицы дополняются генератором
+# (зерно по умолчанию) до числа строк из её meta; p95 хуже на 20% и больше чем на 5 мс — регрессия
+@pytest.mark.bench
+def test_routes_within_baseline(app):
+    baseline = load_baseline(app.config['BENCH_BASELINE'])
+    assert baseline, f"нет базовой линии {app.config['BENCH_BASELINE']}"
+    meta = baseline['meta']
+    with app.app_context():
+        generate_data(**{entity: meta['rows'][model.__tablename__] - model.query.count()
+                         for entity, model in API_MODELS.items()})
+        user_id = User.query.order_by(User.id).first().id
+    results = {name: measure_route(app, user_id, url, meta['requests'], meta['concurrency'], meta['warmup'])
+               for name, url in benchmark_routes().items() if name in baseline['routes']}
+    assert {name: result['errors'] for name, result in results.items() if result['errors']} == {}
+    assert regressions(results, baseline, 0.2, min_delta_ms=5.0) == {}
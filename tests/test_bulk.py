@@ -0,0 +1,18 @@
+# Неверный ключ отклоняет только свой элемент, остальные элементы пачки сохраняются
+def test_upsert_bad_key_is_per_item_error(client):
+    items = [
+        {'vin': [], 'brand': 'Lada', 'model': 'Vesta', 'year': 2020},
+        {'vin': 'XTA000000000000001', 'license_plate': 'Е001ЕЕ77', 'brand': 'Lada', 'model': 'Vesta', 'year': 2020},
+    ]
+    response = client.post('/api/cars/bulk', json=items)
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result['created'] == 1
+    assert [error['index'] for error in result['errors']] == [0]
+
+
+def test_delete_ignores_booleans(client):
+    response = client.delete('/api/tasks/bulk', json=[True, False, 1])
+    result = response.get_json()
+    assert result['deleted'] == 1
+    assert [error['index'] for error in result['errors']] == [0, 1]
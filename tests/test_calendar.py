@@ -0,0 +1,114 @@
+from datetime import datetime
+import pytest
+from crm.calendar import calendar_grid, calendar_window, events_in_window, month_grid
+from crm.extensions import db
+from crm.models import CalendarEvent
+
+EVENT = {'title': 'Планёрка', 'start': '2026-03-02T10:00:00', 'end': '2026-03-02T11:00:00'}
+
+
+@pytest.mark.parametrize('rrule', ['FREQ=HOURLY', 'FREQ=DAILY;COUNT=abc', 'FREQ=DAILY;COUNT=100000000',
+                                   'FREQ=WEEKLY;BYDAY=XX', 'FREQ=DAILY;UNTIL=2026', 5,
+                                   'FREQ=DAILY;INTERVAL=10000000', 'FREQ=YEARLY;INTERVAL=8000'])
+def test_invalid_rrule_rejected(client, rrule):
+    response = client.post('/api/events', json={**EVENT, 'rrule': rrule})
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+# Правило, сохранённое до проверки INTERVAL: повторения за 9999 годом не строятся, календарь открывается
+def test_stored_huge_interval_ends_series(app, client):
+    event_id = client.post('/api/events', json={**EVENT, 'rrule': 'FREQ=YEARLY;INTERVAL=100'}).get_json()['id']
+    with app.app_context():
+        event = db.session.get(CalendarEvent, event_id)
+        event.recurrence_rule = 'FREQ=DAILY;INTERVAL=10000000'
+        db.session.commit()
+    assert client.get('/calendar/month?date=2026-03-01').status_code == 200
+    response = client.get('/api/events?start=2026-03-01T00:00:00&end=2026-04-01T00:00:00')
+    assert [event['start'] for event in response.get_json()] == [EVENT['start']]
+
+
+def test_count_walk_stops_at_max_year(client):
+    response = client.post('/api/events', json={**EVENT, 'rrule': 'FREQ=YEARLY;INTERVAL=100;COUNT=1000'})
+    assert response.status_code == 201
+
+
+def test_count_sets_series_end(client):
+    response = client.post('/api/events', json={**EVENT, 'rrule': 'FREQ=DAILY;COUNT=1000'})
+    assert response.status_code == 201
+    event_id = response.get_json()['id']
+    response = client.put(f'/api/events/{event_id}', json={**EVENT, 'start': 'завтра'})
+    assert response.status_code == 400
+
+
+def test_delete_occurrence_requires_iso_date(client):
+    event_id = client.post('/api/events', json={**EVENT, 'rrule': 'FREQ=DAILY'}).get_json()['id']
+    assert client.delete(f'/api/events/{event_id}?occurrence=вчера').status_code == 400
+    assert client.delete(f'/api/events/{event_id}?occurrence=2026-03-03T10:00:00').status_code == 204
+    assert client.get(f'/api/events/{event_id}').get_json()['exdates'] == ['2026-03-03T10:00:00']
+
+
+# Время с поясом переводится в UTC; дата вне серии или не начало события — 404
+def test_delete_occurrence_matches_event(client):
+    series_id = client.post('/api/events', json={**EVENT, 'rrule': 'FREQ=DAILY'}).get_json()['id']
+    assert client.delete(f'/api/events/{series_id}?occurrence=2026-03-04T13:00:00%2B03:00').status_code == 204
+    assert client.get(f'/api/events/{series_id}').get_json()['exdates'] == ['2026-03-04T10:00:00']
+    for occurrence in ('2026-03-04T10:00:00', '2026-03-05T10:30:00', '2026-03-01T10:00:00'):
+        assert client.delete(f'/api/events/{series_id}?occurrence={occurrence}').status_code == 404
+
+    event_id = client.post('/api/events', json=EVENT).get_json()['id']
+    assert client.delete(f'/api/events/{event_id}?occurrence=2026-03-03T10:00:00').status_code == 404
+    assert client.get(f'/api/events/{event_id}').status_code == 200
+    assert client.delete(f"/api/events/{event_id}?occurrence={EVENT['start']}").status_code == 204
+    assert client.get(f'/api/events/{event_id}').status_code == 404
+
+
+@pytest.mark.parametrize('query', ['start=завтра&end=2026-03-03', 'start=2026-03-02',
+                                   'start=2026-03-03&end=2026-03-02'])
+def test_freebusy_invalid_window(client, query):
+    assert client.get(f'/api/events/freebusy?{query}').status_code == 400
+
+
+def test_freebusy_by_author(client):
+    client.post('/api/events', json=EVENT)
+    user_id = 1  # демо-пользователь, от имени которого работает client
+    window = 'start=2026-03-02T00:00:00%2B00:00&end=2026-03-03T00:00:00'
+    busy = client.get(f'/api/events/freebusy?{window}&user={user_id}').get_json()['busy']
+    assert busy == [{'start': EVENT['start'], 'end': EVENT['end']}]
+    assert client.get(f'/api/events/freebusy?{window}&user={user_id + 1}').get_json()['busy'] == []
+
+
+# Клетка месяца показывает первые события дня, остальные считаются в «+N ещё»
+def test_month_cells_capped(app, client):
+    day = {'start': '2026-03-10T09:00:00', 'end': '2026-03-10T09:30:00'}
+    for hour in range(9, 15):
+        client.post('/api/events', json={'title': f'Звонок {hour}', 'start': f'2026-03-10T{hour:02}:00:00',
+                                         'end': f'2026-03-10T{hour:02}:30:00'})
+    client.post('/api/events', json={'title': 'Выставка', 'start': '2026-03-09T20:00:00', 'end': '2026-03-11T00:00:00'})
+    client.post('/api/events', json={'title': 'Планёрка', **day, 'rrule': 'FREQ=DAILY;COUNT=3'})
+
+    with app.app_context():
+        current = datetime(2026, 3, 1)
+        start, end = calendar_window('month', current)
+        full = calendar_grid('month', current, start, end, events_in_window(start, end))
+        capped = month_grid(current, start, end, 4)
+    for full_week, capped_week in zip(full, capped):
+        for full_cell, cell in zip(full_week, capped_week):
+            assert [event.title for event in cell['events']] == [event.title for event in full_cell['events'][:4]]
+            assert len(cell['events']) + cell['more'] == len(full_cell['events'])
+    assert capped[2][1]['more'] == 4  # 10 марта: выставка, планёрка и 6 звонков
+
+    response = client.get('/calendar/month?date=2026-03-01')
+    assert '+4 ещё' in response.get_data(as_text=True)
+
+
+# Не в SQLite даты приходят datetime, а не строками ISO: сетка месяца та же
+def test_month_grid_with_datetime_columns(app, client, monkeypatch):
+    client.post('/api/events', json=EVENT)
+    client.post('/api/events', json={'title': 'Выставка', 'start': '2026-03-09T20:00:00', 'end': '2026-03-11T00:00:00'})
+    with app.app_context():
+        current = datetime(2026, 3, 1)
+        start, end = calendar_window('month', current)
+        expected = month_grid(current, start, end, 4)
+        monkeypatch.setattr(db.engine.dialect, 'name', 'postgresql')
+        assert month_grid(current, start, end, 4) == expected
@@ -0,0 +1,35 @@
+# Повторный запрос с ETag отвечает 304 без тела; изменение строки или таблицы меняет ETag
+def test_detail_not_modified(client):
+    car_id = client.get('/api/cars').get_json()[0]['id']
+    response = client.get(f'/api/cars/{car_id}')
+    etag, last_modified = response.headers['ETag'], response.headers['Last-Modified']
+    assert 'no-cache' in response.headers['Cache-Control']
+
+    response = client.get(f'/api/cars/{car_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    response = client.get(f'/api/cars/{car_id}', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+
+    car = client.get(f'/api/cars/{car_id}').get_json()
+    client.put(f'/api/cars/{car_id}', json={**car, 'color': 'Синий'})
+    response = client.get(f'/api/cars/{car_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['color'] == 'Синий'
+
+
+def test_list_etag_follows_table_version(client):
+    etag = client.get('/api/contacts').headers['ETag']
+    assert client.get('/api/contacts', headers={'If-None-Match': etag}).status_code == 304
+    # Другие параметры — другой ETag
+    assert client.get('/api/contacts?limit=1', headers={'If-None-Match': etag}).status_code == 200
+
+    client.post('/api/contacts', json={'first_name': 'Олег', 'last_name': 'Котов'})
+    response = client.get('/api/contacts', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert len(response.get_json()) == 3
+
+
+def test_static_cached_for_a_year(client):
+    response = client.get('/static/js/script.js')
+    assert response.cache_control.max_age == 365 * 24 * 3600
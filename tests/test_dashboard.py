@@ -0,0 +1,11 @@
+import time
+
+
+# Пересчёт сводки после DASHBOARD_TTL без изменений данных не меняет ETag
+def test_etag_stable_after_ttl(app, client):
+    app.config['DASHBOARD_TTL'] = 0
+    response = client.get('/api/dashboard')
+    etag = response.headers['ETag']
+    time.sleep(0.01)
+    response = client.get('/api/dashboard', headers={'If-None-Match': etag})
+    assert response.status_code == 304
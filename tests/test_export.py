@@ -0,0 +1,28 @@
+import csv
+import io
+import json
+
+
+# Выгрузка отдаётся потоком пачками по EXPORT_BATCH_SIZE строк; содержимое совпадает с API
+def test_export_ndjson(app, client):
+    app.config['EXPORT_BATCH_SIZE'] = 2
+    response = client.get('/api/tasks/export')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines == client.get('/api/tasks').get_json()
+
+
+def test_export_csv_with_fields(client):
+    response = client.get('/api/contacts/export?format=csv&fields=id,last_name')
+    assert response.mimetype == 'text/csv'
+    assert 'filename=contacts.csv' in response.headers['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['id'] for row in rows] == [str(item['id']) for item in client.get('/api/contacts').get_json()]
+    assert set(rows[0]) == {'id', 'last_name'}
+
+
+def test_export_rejects_unknown_format(client):
+    assert client.get('/api/tasks/export?format=xml').status_code == 400
+    assert client.get('/api/users/export').status_code == 404
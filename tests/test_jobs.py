@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+from crm.extensions import db
+from crm.jobs import Scheduler, enqueue, ensure_periodic_jobs
+from crm.models import Job, Notification, Task
+from crm.sweeps import queue_event_reminders, sweep_overdue_tasks
+
+
+# Задачу в аренде не берёт второй исполнитель, пока аренда не истекла
+def test_lease_is_exclusive(app):
+    with app.app_context():
+        ensure_periodic_jobs({'purge-sessions': 3600})
+        first, second = Scheduler(app), Scheduler(app)
+        job = first.claim()
+        assert job is not None and job.name == 'purge-sessions'
+        assert second.claim() is None
+
+        Job.query.filter_by(id=job.id).update({Job.locked_until: datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+        assert second.claim().id == job.id
+        assert db.session.get(Job, job.id).attempts == 2
+
+
+def test_periodic_job_rescheduled(app):
+    with app.app_context():
+        ensure_periodic_jobs({'purge-sessions': 3600})
+        scheduler = Scheduler(app)
+        assert scheduler.run_pending() == 1
+        job = Job.query.filter_by(name='purge-sessions').one()
+        assert job.locked_by is None and job.finished_at is None and job.last_error is None
+        assert job.run_at > datetime.utcnow() + timedelta(minutes=59)
+        assert scheduler.run_pending() == 0
+
+
+def test_failed_one_off_job_retried_then_finished(app):
+    app.config['SCHEDULER_MAX_ATTEMPTS'] = 2
+    with app.app_context():
+        job = enqueue('purge-tombstones', name='once')
+        db.session.commit()
+        job_id = job.id
+        app.config['SYNC_TOMBSTONE_DAYS'] = 'не число'
+        scheduler = Scheduler(app)
+        for attempt in (1, 2):
+            Job.query.filter_by(id=job_id).update({Job.run_at: datetime.utcnow()})
+            db.session.commit()
+            assert scheduler.run_due()
+            job = db.session.get(Job, job_id)
+            assert job.attempts == attempt and job.last_error.startswith('TypeError')
+        assert job.finished_at is not None
+
+
+# Повторный проход с тем же состоянием не создаёт второй копии уведомлений
+def test_sweeps_are_idempotent(app, client):
+    now = datetime.utcnow()
+    client.post('/api/tasks', json={'title': 'Сдать отчёт', 'due_date': (now - timedelta(minutes=5)).isoformat()})
+    start = now + timedelta(minutes=5)
+    client.post('/api/events', json={'title': 'Встреча', 'start': start.isoformat(),
+                                     'end': (start + timedelta(hours=1)).isoformat()})
+    with app.app_context():
+        horizon = {'horizon': (now - timedelta(hours=1)).isoformat()}
+        assert sweep_overdue_tasks(dict(horizon)) == 1
+        assert sweep_overdue_tasks(dict(horizon)) == 0
+        assert queue_event_reminders(dict(horizon)) == 1
+        assert queue_event_reminders(dict(horizon)) == 0
+        assert Notification.query.count() == 2
+        task = Task.query.filter_by(title='Сдать отчёт').one()
+        assert Notification.query.filter_by(kind='task_overdue').one().row_id == task.id
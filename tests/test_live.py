@@ -0,0 +1,51 @@
+import json
+import pytest
+
+pytestmark = pytest.mark.config(LIVE_BACKEND='local', LIVE_KEEPALIVE=1)
+
+
+def open_stream(client, last_event_id=None):
+    headers = {'Last-Event-ID': str(last_event_id)} if last_event_id is not None else {}
+    response = client.get('/api/live?entities=tasks', headers=headers, buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    stream = (chunk.decode() for chunk in response.response)
+    assert next(stream) == 'retry: 5000\n\n'
+    return response, stream
+
+
+def test_change_event_carries_sync_version(client):
+    token = int(client.get('/api/sync?since=0').get_json()['token'])
+    response, stream = open_stream(client, token)
+    task_id = client.post('/api/tasks', json={'title': 'Звонок'}).get_json()['id']
+    client.post('/api/contacts', json={'first_name': 'Олег', 'last_name': 'Котов'})  # не подписаны
+
+    lines = next(stream).splitlines()
+    assert lines[0] == f'id: {token + 1}'
+    assert lines[1] == 'event: change'
+    change = json.loads(lines[2][len('data: '):])
+    assert (change['entity'], change['action'], change['id']) == ('tasks', 'created', task_id)
+    assert next(stream) == ': keepalive\n\n'
+    response.close()
+
+
+# Переподключение с Last-Event-ID старше последнего изменения — сразу resync
+def test_resync_on_stale_last_event_id(client):
+    token = int(client.get('/api/sync?since=0').get_json()['token'])
+    client.post('/api/tasks', json={'title': 'Пропущенная'})
+    response, stream = open_stream(client, token)
+    assert next(stream).startswith('event: resync')
+    response.close()
+
+    response, stream = open_stream(client, token + 1)
+    assert next(stream) == ': keepalive\n\n'
+    response.close()
+
+
+@pytest.mark.config(LIVE_BACKEND='local', LIVE_QUEUE_SIZE=1)
+def test_overflow_closes_stream_with_resync(client):
+    response, stream = open_stream(client)
+    for n in range(3):
+        client.post('/api/tasks', json={'title': f'Задача {n}'})
+    assert next(stream).startswith('event: resync')
+    with pytest.raises(StopIteration):
+        next(stream)
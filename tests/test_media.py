@@ -0,0 +1,48 @@
+import base64
+import os
+
+# PNG 1x1
+PNG = base64.b64decode('iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg==')
+
+
+def upload(client, contact_id, data=PNG):
+    return client.put(f'/api/contacts/{contact_id}/photo', data=data, content_type='image/png')
+
+
+def contact_ids(client):
+    return [contact['id'] for contact in client.get('/api/contacts').get_json()]
+
+
+# Одинаковые файлы хранятся один раз: ключ — SHA-256 содержимого
+def test_upload_deduplicated(app, client):
+    first, second = contact_ids(client)
+    key = upload(client, first).get_json()['photo']
+    assert upload(client, second).get_json()['photo'] == key
+    assert client.get(f'/api/contacts/{second}').get_json()['photo'] == key
+    photos = [name for _, _, names in os.walk(os.path.join(app.config['MEDIA_ROOT'], 'photos')) for name in names]
+    assert photos == [key.split('/')[1]]
+    assert os.listdir(os.path.join(app.config['MEDIA_ROOT'], 'tmp')) == []
+
+
+def test_photo_served_with_range_and_etag(client):
+    url = upload(client, contact_ids(client)[0]).get_json()['url']
+    response = client.get(url)
+    assert response.data == PNG
+    assert 'immutable' in response.headers['Cache-Control']
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    response = client.get(url, headers={'Range': 'bytes=0-7'})
+    assert response.status_code == 206
+    assert response.data == PNG[:8]
+
+
+def test_rejected_uploads(client):
+    contact_id = contact_ids(client)[0]
+    assert upload(client, contact_id, b'not an image').status_code == 415
+    assert upload(client, 10 ** 6).status_code == 404
+
+
+def test_bad_key_not_found(client):
+    assert client.get('/media/photos/../../config.py').status_code == 404
+    assert client.get('/media/photos/00/' + '0' * 64 + '.png').status_code == 404
+    assert client.get('/media/thumbs/999/00/' + '0' * 64 + '.png').status_code == 404
@@ -0,0 +1,34 @@
+import re
+import pytest
+from crm import create_app
+
+
+def metric(text, name, endpoint):
+    match = re.search(rf'^{name}{{endpoint="{endpoint}"}} (\S+)$', text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+# Потоковая выгрузка учитывается после закрытия потока, вместе с сериализацией строк
+@pytest.mark.config(METRICS_ENABLED=True)
+def test_streamed_export_counted(client):
+    response = client.get('/api/tasks/export')
+    assert 'Server-Timing' not in response.headers
+    assert len(response.get_data(as_text=True).splitlines()) == 3
+    response.close()
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'crm_http_requests_total{endpoint="api.api_export",method="GET",status="200"} 1' in text
+    assert metric(text, 'crm_serialization_seconds_total', 'api.api_export') > 0
+    assert metric(text, 'crm_sql_statements_total', 'api.api_export') >= 1
+
+
+# В продакшене /metrics без токена не включается, с токеном отвечает только с заголовком
+def test_production_metrics_require_token(tmp_path):
+    options = dict(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "crm.db"}', MEDIA_ROOT=str(tmp_path / 'media'),
+                   METRICS_ENABLED=True, METRICS_TOKEN='')
+    with pytest.raises(ValueError):
+        create_app('production', **options)
+
+    client = create_app('production', **{**options, 'METRICS_TOKEN': 'secret'}).test_client()
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
@@ -0,0 +1,19 @@
+import pytest
+from crm.pagination import encode_cursor
+
+
+# Курсор приходит от клиента: значения не того типа дают 400, а не 500
+@pytest.mark.parametrize('url, values', [
+    ('/tasks', [{'due': 1}, 1]),
+    ('/tasks', [5, 1]),
+    ('/tasks', ['2026-01-01T00:00:00', [1]]),
+    ('/contacts?search=Иван&', ['x']),
+    ('/contacts?search=Иван&', [-50]),
+])
+def test_malformed_cursor_rejected(client, url, values):
+    url = url if url.endswith('&') else url + '?'
+    assert client.get(f'{url}cursor={encode_cursor(values)}').status_code == 400
+
+
+def test_garbage_cursor_rejected(client):
+    assert client.get('/tasks?cursor=%%%').status_code == 400
@@ -0,0 +1,20 @@
+from datetime import datetime
+from crm.commands import explain_query_plan, full_scan_steps, hot_queries
+
+
+def test_unbounded_index_scan_flagged():
+    plan = ['SCAN task USING INDEX ix_task_due_date']
+    assert full_scan_steps(plan) == plan
+    assert full_scan_steps(plan, limited=True) == []
+    assert full_scan_steps(['SEARCH task USING INDEX ix_task_status_due_date (status=?)']) == []
+
+
+# Каждый запрос страниц читает по индексу: полное сканирование или сортировка во временном B-дереве — ошибка
+def test_hot_queries_use_indexes(app):
+    with app.app_context():
+        failures = {}
+        for name, query in hot_queries(datetime.utcnow()).items():
+            plan, limited = explain_query_plan(query)
+            if full_scan_steps(plan, limited):
+                failures[name] = plan
+    assert failures == {}
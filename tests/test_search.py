@@ -0,0 +1,34 @@
+import pytest
+
+CONTACTS = [
+    {'first_name': 'Пётр', 'last_name': 'Семёнов', 'phone': '+7 (916) 555-12-34', 'company': 'Автодом'},
+    {'first_name': 'Анна', 'last_name': 'Ершова', 'phone': '8 903 111-22-33', 'email': 'anna@example.com'},
+]
+
+
+# Поиск по индексу FTS5: префиксы слов без учёта регистра и «ё», телефон — по цифрам без кода страны
+@pytest.mark.parametrize('query, expected', [
+    ('семенов', ['Семёнов']),
+    ('СЕМЁ', ['Семёнов']),
+    ('пётр сем', ['Семёнов']),
+    ('автод', ['Семёнов']),
+    ('anna@', ['Ершова']),
+    ('+7 916 555', ['Семёнов']),
+    ('8916555', ['Семёнов']),
+    ('903-111', ['Ершова']),
+    ('жуков', []),
+])
+def test_contact_search(client, query, expected):
+    for contact in CONTACTS:
+        assert client.post('/api/contacts', json=contact).status_code == 201
+    found = client.get('/api/contacts/search', query_string={'q': query}).get_json()
+    assert [contact['full_name'].split()[0] for contact in found] == expected
+
+
+def test_search_follows_updates(client):
+    contact_id = client.post('/api/contacts', json=CONTACTS[0]).get_json()['id']
+    client.put(f'/api/contacts/{contact_id}', json={**CONTACTS[0], 'last_name': 'Крылов'})
+    assert client.get('/api/contacts/search?q=семенов').get_json() == []
+    assert [contact['id'] for contact in client.get('/api/contacts/search?q=крыл').get_json()] == [contact_id]
+    page = client.get('/contacts?search=крылов').get_data(as_text=True)
+    assert 'Крылов' in page
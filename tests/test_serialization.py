@@ -0,0 +1,39 @@
+import pytest
+from crm.api import API_MODELS
+from crm.serialization import OrjsonProvider, compile_encoder, orjson
+
+
+# Собранный кодировщик отдаёт те же значения, что и to_dict() модели
+@pytest.mark.parametrize('entity', API_MODELS)
+def test_encoder_matches_to_dict(app, client, entity):
+    model = API_MODELS[entity]
+    with app.app_context():
+        objects = model.query.order_by(model.id).all()
+        columns, encode = compile_encoder(model, model.api_fields)
+        rows = model.query.order_by(model.id).with_entities(*columns).all()
+        assert objects
+        for obj, row in zip(objects, rows):
+            expected = obj.to_dict()
+            assert encode(row) == {name: expected[name] for name in model.api_fields}
+
+
+# Список (кодировщик) и карточка (to_dict) отдают одинаковый JSON при обоих JSON_BACKEND
+@pytest.mark.parametrize('backend', [
+    pytest.param('json', marks=pytest.mark.config(JSON_BACKEND='json')),
+    pytest.param('orjson', marks=[pytest.mark.config(JSON_BACKEND='orjson'),
+                                  pytest.mark.skipif(orjson is None, reason='orjson не установлен')]),
+])
+def test_api_body_same_for_json_backends(app, client, backend):
+    assert isinstance(app.json, OrjsonProvider) == (backend == 'orjson')
+    contact = client.get('/api/contacts').get_json()[0]
+    assert contact == client.get(f"/api/contacts/{contact['id']}").get_json()
+
+
+# Порядок и повторы в ?fields= не порождают новых кодировщиков
+def test_fields_share_one_encoder(client):
+    client.get('/api/tasks?fields=id,title')
+    misses = compile_encoder.cache_info().misses
+    for fields in ('title,id', 'title,id,title', ' id , title '):
+        items = client.get(f'/api/tasks?fields={fields}').get_json()
+        assert all(list(item) == ['id', 'title'] for item in items)
+    assert compile_encoder.cache_info().misses == misses
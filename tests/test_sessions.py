@@ -0,0 +1,62 @@
+import pytest
+from crm import create_app
+from crm.commands import revoke_sessions_command
+
+
+def session_id(client):
+    return client.get_cookie('session').value
+
+
+def logged_in(client):
+    return client.get('/api/dashboard').status_code == 200
+
+
+# Вход выдаёт новый идентификатор сессии: идентификатор, полученный до входа, недействителен
+def test_login_rotates_session_id(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['next'] = '/'
+    before = session_id(client)
+    client.post('/login', data={'username': 'Сергей', 'password': '336996'})
+    assert session_id(client) != before
+    assert logged_in(client)
+
+    attacker = app.test_client()
+    attacker.set_cookie('session', before)
+    assert not logged_in(attacker)
+
+
+def test_logout_revokes_server_session(app, client):
+    sid = session_id(client)
+    client.get('/logout')
+    copy = app.test_client()
+    copy.set_cookie('session', sid)
+    assert not logged_in(copy)
+
+
+@pytest.mark.parametrize('backend', ['sql', pytest.param('redis', marks=pytest.mark.config(SESSION_BACKEND='redis'))])
+def test_revoke_all_user_sessions(app, backend):
+    assert app.config['SESSION_BACKEND'] == backend
+    clients = [app.test_client() for _ in range(2)]
+    for client in clients:
+        client.post('/login', data={'username': 'Сергей', 'password': '336996'})
+        assert logged_in(client)
+    result = app.test_cli_runner().invoke(revoke_sessions_command, ['Сергей'])
+    assert result.exit_code == 0, result.output
+    assert not any(logged_in(client) for client in clients)
+
+
+# Второй воркер со своим LRU-кэшем: выход в первом воркере сразу действует и во втором,
+# не дожидаясь SESSION_CACHE_TTL
+@pytest.mark.parametrize('backend', ['sql', pytest.param('redis', marks=pytest.mark.config(SESSION_BACKEND='redis'))])
+def test_logout_reaches_other_workers(app, client, backend):
+    worker = create_app('testing', SQLALCHEMY_DATABASE_URI=app.config['SQLALCHEMY_DATABASE_URI'],
+                        MEDIA_ROOT=app.config['MEDIA_ROOT'], SESSION_BACKEND=backend)
+    worker.session_interface.store = app.session_interface.store
+    other = worker.test_client()
+    other.set_cookie('session', session_id(client))
+    assert logged_in(other)
+
+    client.get('/logout')
+    assert app.config['SESSION_CACHE_TTL'] > 0
+    assert not logged_in(other)
@@ -0,0 +1,48 @@
+from crm.sync import purge_tombstones
+
+
+# Новый клиент получает демо-данные первой же синхронизацией с нуля
+def test_seeded_rows_in_initial_sync(client):
+    response = client.get('/api/sync?since=0')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert int(data['token']) > 0
+    counts = {entity: len(changes['changed']) for entity, changes in data['changes'].items()}
+    assert counts == {'tasks': 3, 'events': 3, 'contacts': 2, 'cars': 2}
+
+
+def test_changes_and_deletes_after_token(client):
+    token = client.get('/api/sync?since=0').get_json()['token']
+    task_id = client.post('/api/tasks', json={'title': 'Новая'}).get_json()['id']
+    contact_ids = [contact['id'] for contact in client.get('/api/contacts').get_json()]
+    client.delete(f'/api/tasks/{task_id}')
+    client.delete('/api/contacts/bulk', json=contact_ids)
+
+    data = client.get(f'/api/sync?since={token}').get_json()
+    assert data['changes']['tasks'] == {'changed': [], 'deleted': [task_id]}
+    assert sorted(data['changes']['contacts']['deleted']) == sorted(contact_ids)
+    assert client.get(f"/api/sync?since={data['token']}").get_json()['changes']['tasks'] == \
+        {'changed': [], 'deleted': []}
+
+
+def test_sync_pages_by_version(client):
+    seen, token, more = 0, 0, True
+    while more:
+        data = client.get(f'/api/sync?since={token}&limit=4').get_json()
+        seen += sum(len(changes['changed']) for changes in data['changes'].values())
+        token, more = data['token'], data['more']
+    assert seen == 10
+
+
+# Клиент с номером старше очищенных надгробий получает 410 и синхронизируется заново
+def test_resync_after_tombstone_purge(app, client):
+    token = client.get('/api/sync?since=0').get_json()['token']
+    task_id = client.get('/api/tasks').get_json()[0]['id']
+    client.delete(f'/api/tasks/{task_id}')
+    with app.app_context():
+        assert purge_tombstones(0) == 1
+
+    response = client.get(f'/api/sync?since={token}')
+    assert response.status_code == 410
+    assert response.get_json()['resync'] is True
+    assert client.get('/api/sync?since=0').status_code == 200